@@ -0,0 +1,448 @@
+"""
+Benchmark suite for ingestion, processing, strategy and rendering.
+
+Datasets are the 727-row FastF1 reference lap tiled 1x / 10x / 100x and a
+synthetic full-field race from telemetry.load_generator. Each benchmark
+reports the median of REPEATS timed runs (after one warm-up) and its
+throughput. Results are written as JSON and compared with a stored
+baseline:
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite --only load render --scales 1 10 --fail-on-regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.centerline import Centerline
+from processing.columnar import has_columnar, open_columnar, save_processed
+from processing.dtypes import FASTF1_SCHEMA, apply_schema
+from processing.fastf1_processing import process
+from processing.schema_registry import read_telemetry
+
+# ======================================
+# CONFIG
+# ======================================
+
+BASE_LAP_PATH = "data/fastf1/bahrain_2023_verstappen.csv"
+SCALES = (1, 10, 100)
+
+# Synthetic full-field race (telemetry.load_generator)
+FIELD_CARS = 20
+FIELD_LAPS = 57
+FIELD_HZ = 8.0                  # FastF1-like car data rate
+FIELD_SEED = 0
+
+REPEATS = 5
+RENDER_FRAMES = 20
+RENDER_REPEATS = 2              # a 100x track frame takes over a second
+
+RESULTS_PATH = "reports/benchmarks/latest.json"
+BASELINE_PATH = "benchmarks/baseline.json"
+REGRESSION_TOLERANCE = 0.15     # slower than baseline by more than this fails
+
+GROUPS = ("load", "processing", "aggregation", "strategy", "render")
+
+
+# ======================================
+# TIMING
+# ======================================
+
+def measure(fn, repeats=REPEATS, warmup=1):
+    """Median and best wall time of fn() over `repeats` runs."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)), float(np.min(times))
+
+
+def result(group, name, dataset, fn, items, unit, repeats=REPEATS):
+    """Time fn and package it as one result row (`items` per call)."""
+    median_s, best_s = measure(fn, repeats)
+    return {
+        "group": group,
+        "name": name,
+        "dataset": dataset,
+        "median_s": median_s,
+        "best_s": best_s,
+        "items": items,
+        "unit": unit,
+        "ms_per_item": median_s / items * 1e3,
+        "throughput": items / median_s if median_s > 0 else float("inf"),
+    }
+
+
+# ======================================
+# DATASETS
+# ======================================
+
+def scaled_lap(scale, path=BASE_LAP_PATH):
+    """Raw FastF1 lap repeated `scale` times on one continuous time base."""
+    raw = pd.read_csv(path)
+    t = pd.to_timedelta(raw["Time"])
+    lap_len = t.iloc[-1] - t.iloc[0] + (t.iloc[-1] - t.iloc[-2])
+    tiled = pd.concat([raw] * scale, ignore_index=True)
+    offsets = np.repeat(np.arange(scale), len(raw)) * lap_len
+    tiled["Time"] = (pd.concat([t] * scale, ignore_index=True) + offsets).astype(str)
+    return tiled
+
+
+def field_race(cars=FIELD_CARS, laps=FIELD_LAPS, hz=FIELD_HZ, seed=FIELD_SEED):
+    """Synthetic full-field race as one long table with driver and lap."""
+    from telemetry.load_generator import LoadGenerator
+
+    gen = LoadGenerator(cars=cars, hz=hz, seed=seed)
+    parts = []
+    for car in range(cars):
+        t_offset = 0.0
+        for lap in range(laps):
+            frame = gen.lap(car, lap)
+            part = pd.DataFrame(frame)
+            part["t_s"] += t_offset
+            t_offset = part["t_s"].iloc[-1] + 1.0 / hz
+            part["driver"] = f"D{car:02d}"
+            part["lap"] = lap
+            parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def prepare(scales, work_dir):
+    """Write every scaled lap as raw CSV and processed CSV + columnar."""
+    centerline = Centerline.from_csv(BASE_LAP_PATH)
+    datasets = {}
+    for scale in scales:
+        name = f"lap_{scale}x"
+        raw_path = os.path.join(work_dir, f"{name}_raw.csv")
+        proc_path = os.path.join(work_dir, f"{name}_processed.csv")
+        scaled_lap(scale).to_csv(raw_path, index=False)
+
+        df, resolution = read_telemetry(raw_path)
+        proc = process(df, resolution, centerline)
+        proc["lap"] = np.repeat(np.arange(scale), len(proc) // scale)
+        save_processed(proc, proc_path)
+        datasets[name] = {"raw": raw_path, "processed": proc_path, "rows": len(proc), "scale": scale}
+    return datasets, centerline
+
+
+# ======================================
+# BENCHMARKS
+# ======================================
+
+def reduce_columns(df):
+    """
+    Sum every column, so a load is only done once the data has been read:
+    columnar frames are memory-mapped and would otherwise be timed before
+    a single page is touched.
+    """
+    return [
+        (df[c].cat.codes if isinstance(df[c].dtype, pd.CategoricalDtype) else df[c]).to_numpy().sum()
+        for c in df.columns
+        if isinstance(df[c].dtype, pd.CategoricalDtype) or pd.api.types.is_numeric_dtype(df[c])
+    ]
+
+
+def bench_load(datasets):
+    """Raw CSV through the schema registry, processed CSV vs columnar, each read in full."""
+    rows = []
+    for name, ds in datasets.items():
+        n = ds["rows"]
+        rows.append(result("load", "raw_csv", name, lambda: reduce_columns(read_telemetry(ds["raw"])[0]), n, "rows"))
+        rows.append(result(
+            "load", "processed_csv", name,
+            lambda: reduce_columns(apply_schema(pd.read_csv(ds["processed"]), FASTF1_SCHEMA)), n, "rows",
+        ))
+        if has_columnar(ds["processed"]):
+            rows.append(result(
+                "load", "processed_columnar", name,
+                lambda: reduce_columns(open_columnar(ds["processed"]).to_frame()), n, "rows",
+            ))
+    return rows
+
+
+def bench_processing(datasets, centerline):
+    rows = []
+    for name, ds in datasets.items():
+        df, resolution = read_telemetry(ds["raw"])
+        rows.append(result(
+            "processing", "fastf1_process", name,
+            lambda: process(df, resolution, centerline), ds["rows"], "rows",
+        ))
+    return rows
+
+
+def lap_metrics(df, keys, time_col, speed_col, brake_col):
+    """Per-lap summary in one groupby (what the strategy sims tabulate)."""
+    g = df.groupby(keys, sort=True)
+    out = g.agg(
+        t_start=(time_col, "first"),
+        t_end=(time_col, "last"),
+        avg_speed=(speed_col, "mean"),
+        max_speed=(speed_col, "max"),
+        brake_density=(brake_col, "mean"),
+        samples=(speed_col, "size"),
+    )
+    out["lap_time_s"] = out["t_end"] - out["t_start"]
+    return out
+
+
+def bench_aggregation(datasets, field):
+    rows = []
+    for name, ds in datasets.items():
+        proc = open_columnar(ds["processed"]).to_frame()
+        rows.append(result(
+            "aggregation", "per_lap_metrics", name,
+            lambda: lap_metrics(proc, ["lap"], "time_s", "speed", "brake"), len(proc), "rows",
+        ))
+    if field is not None:
+        field_name = f"field_{FIELD_CARS}x{FIELD_LAPS}"
+        brake = field["brake_pct"] > 0
+        table = field.assign(brake_flag=brake)
+        rows.append(result(
+            "aggregation", "per_lap_metrics", field_name,
+            lambda: lap_metrics(table, ["driver", "lap"], "t_s", "speed_kmh", "brake_flag"),
+            len(table), "rows",
+        ))
+    return rows
+
+
+def bench_strategy():
+    """Undercut/overcut evaluation for every lap of the cached Bahrain race."""
+    from strategy.undercut_calculator import FieldState, evaluate_lap
+
+    field = FieldState()
+    laps = range(1, field.n_laps)
+    run = lambda: [evaluate_lap(field, lap) for lap in laps]
+    return [result("strategy", "undercut_evaluate_race", "bahrain_2023", run, len(laps), "laps")]
+
+
+def bench_render(datasets, field, frames=RENDER_FRAMES):
+    """Per-frame cost of both replays, drawn headless (Agg / off-screen VTK)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # draw_frame re-applies limits under an equal aspect every frame
+    logging.getLogger("matplotlib").setLevel(logging.ERROR)
+
+    from visualization.fastf1_track_replay import build_track_view, draw_frame, load_replay_data
+
+    rows = []
+    for name, ds in datasets.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = load_replay_data(ds["raw"], downsample=1)
+        fig = plt.figure(figsize=(10, 8), dpi=100)
+        view = build_track_view(fig, fig.add_subplot(111), data)
+        step = max(1, data["n_samples"] // frames)
+
+        def track_frames():
+            for i in range(frames):
+                draw_frame(view, data, i * step)
+                fig.canvas.draw()
+
+        rows.append(result("render", "track_replay_frame", name, track_frames, frames, "frames",
+                           repeats=RENDER_REPEATS))
+        plt.close(fig)
+
+    if field is not None:
+        rows.append(_bench_3d(field, frames))
+    return rows
+
+
+def _bench_3d(field_df, frames):
+    import pyvista as pv
+
+    from visualization.pyvista_3d_replay import build_scene, resample_field, update_frame
+
+    first_lap = field_df[field_df["lap"] == 0]
+    cars = [
+        {
+            "name": driver,
+            "time_s": car["t_s"].to_numpy(dtype=float),
+            "x": car["x"].to_numpy(dtype=float),
+            "y": car["y"].to_numpy(dtype=float),
+            "speed": car["speed_kmh"].to_numpy(dtype=float),
+            "gear": car["gear"].to_numpy(dtype=float),
+            "brake": (car["brake_pct"] > 0).to_numpy(dtype=float),
+        }
+        for driver, car in first_lap.groupby("driver")
+    ]
+    replay = resample_field(cars)
+
+    pv.OFF_SCREEN = True
+    plotter = pv.Plotter(off_screen=True, window_size=(1280, 720))
+    cloud, hud = build_scene(plotter, cars, replay)
+    plotter.show(auto_close=False, interactive=False)
+    step = max(1, len(replay["time_s"]) // frames)
+
+    def field_frames():
+        for i in range(frames):
+            update_frame(cloud, hud, replay, i * step)
+            plotter.render()
+
+    row = result("render", "pyvista_3d_frame", f"field_{len(cars)}_cars", field_frames, frames, "frames",
+                 repeats=RENDER_REPEATS)
+    plotter.close()
+    return row
+
+
+# ======================================
+# RESULTS + BASELINE
+# ======================================
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def environment():
+    """Where a run was recorded; timings only compare on the same machine."""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def save_results(rows, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"environment": environment(), "results": rows}, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _key(row):
+    return (row["group"], row["name"], row["dataset"])
+
+
+def compare(rows, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Ratio of each median to its baseline median. > 1 + tolerance is a
+    regression, < 1 - tolerance an improvement.
+    """
+    base = {_key(r): r for r in baseline.get("results", [])}
+    out = []
+    for row in rows:
+        ref = base.get(_key(row))
+        if ref is None:
+            out.append({**row, "baseline_s": None, "ratio": None, "verdict": "new"})
+            continue
+        ratio = row["median_s"] / ref["median_s"] if ref["median_s"] > 0 else float("inf")
+        verdict = "slower" if ratio > 1 + tolerance else "faster" if ratio < 1 - tolerance else "same"
+        out.append({**row, "baseline_s": ref["median_s"], "ratio": ratio, "verdict": verdict})
+    return out
+
+
+def print_results(rows):
+    print(f"\n{'group':<12} {'benchmark':<22} {'dataset':<14} {'median ms':>10} "
+          f"{'ms/item':>10} {'throughput':>16} {'vs base':>8}")
+    for r in rows:
+        ratio = r.get("ratio")
+        vs = f"{ratio:.2f}x" if ratio is not None else "-"
+        flag = {"slower": " ⚠️", "faster": " 🚀"}.get(r.get("verdict"), "")
+        print(f"{r['group']:<12} {r['name']:<22} {r['dataset']:<14} {r['median_s'] * 1e3:>10.2f} "
+              f"{r['ms_per_item']:>10.4g} {r['throughput']:>11,.0f} {r['unit']:<5}{vs:>8}{flag}")
+
+
+# ======================================
+# MAIN
+# ======================================
+
+def run(groups=GROUPS, scales=SCALES):
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench_") as work_dir:
+        print(f"Preparing datasets {', '.join(f'{s}x' for s in scales)} ...")
+        datasets, centerline = prepare(scales, work_dir)
+        field = None
+        if {"aggregation", "render"} & set(groups):
+            print(f"Generating synthetic field race ({FIELD_CARS} cars x {FIELD_LAPS} laps at {FIELD_HZ:.0f} Hz) ...")
+            field = field_race()
+
+        for group in groups:
+            print(f"Running {group} ...")
+            if group == "load":
+                rows += bench_load(datasets)
+            elif group == "processing":
+                rows += bench_processing(datasets, centerline)
+            elif group == "aggregation":
+                rows += bench_aggregation(datasets, field)
+            elif group == "strategy":
+                rows += bench_strategy()
+            elif group == "render":
+                rows += bench_render(datasets, field)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, processing, strategy and rendering")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--scales", nargs="+", type=int, default=list(SCALES))
+    parser.add_argument("--out", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    rows = run(args.only, args.scales)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    rows = compare(rows, baseline, args.tolerance)
+    print_results(rows)
+
+    path = save_results(rows, args.out)
+    print(f"\n✅ Results saved to {path}")
+    if args.save_baseline:
+        print(f"✅ Baseline saved to {save_results(rows, args.baseline)}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline} (run with --save-baseline to store one)")
+
+    slower = [r for r in rows if r["verdict"] == "slower"]
+    if slower:
+        print(f"⚠️ {len(slower)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Pipeline orchestrator.
+
+Declares the export -> processing -> analysis/strategy -> report scripts as
+a DAG and runs every stage whose dependencies are done concurrently on a
+process pool. Workers import numpy / pandas / matplotlib once and then run
+stage after stage in the same interpreter.
+
+A stage is skipped when the content hash of its inputs and of its code
+(the stage module plus the repo modules it imports) matches the last
+successful run and its outputs still exist. A stage whose raw inputs are
+absent (e.g. no SIM recording on a clean checkout) is reported as
+"missing" instead of failing; stages downstream of it still run on
+whatever inputs they have:
+
+    python -m pipeline.orchestrator
+    python -m pipeline.orchestrator --only pit_strategy_sim --force
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import json
+import os
+import re
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from processing.profiling import stage as profile_stage
+
+# ======================================
+# CONFIG
+# ======================================
+
+SESSION_DIR = "data/fastf1/2023/2023-03-05_Bahrain_Grand_Prix/2023-03-05_Race"
+
+STATE_PATH = ".pipeline/state.json"
+LOG_DIR = ".pipeline/logs"
+DEFAULT_WORKERS = os.cpu_count() or 2
+
+# name -> module, entry point (a function to call after importing it, or
+# none to run the script as __main__), argv, file inputs, file outputs and
+# upstream stages. Inputs may be files or directories (hashed recursively).
+# A "source" stage counts as fresh whenever its outputs exist. Optional
+# inputs are hashed but may be absent.
+STAGES = {
+    "fastf1_export": {
+        # Downloads from the F1 live timing API: only rerun when its
+        # outputs are missing (or with --force)
+        "module": "telemetry.fastf1_export",
+        "inputs": [],
+        "outputs": ["data/fastf1/bahrain_2023_verstappen.csv"],
+        "deps": [],
+        "source": True,
+    },
+    "fastf1_processing": {
+        "module": "processing.fastf1_processing",
+        "inputs": ["data/fastf1/bahrain_2023_verstappen.csv"],
+        "outputs": ["data/fastf1/processed_fastf1_race_engineering.csv"],
+        "deps": ["fastf1_export"],
+    },
+    "basic_processing": {
+        "module": "processing.basic_processing",
+        "inputs": ["data/sim_racing/telemetry-rio-5-laps.csv"],
+        "outputs": ["data/sim_racing/processed_rio.csv"],
+        "deps": [],
+    },
+    "full_race_processing": {
+        "module": "processing.full_race_processing",
+        "inputs": ["data/sim_racing/telemetry-rio-5-laps.csv"],
+        "outputs": ["data/sim_racing/processed_rio_race_engineering.csv"],
+        "deps": [],
+    },
+    "events": {
+        "module": "processing.events",
+        "entry": "main",
+        "inputs": [
+            "data/fastf1/processed_fastf1_race_engineering.csv",
+            "data/fastf1/bahrain_2023_verstappen.csv",
+        ],
+        "outputs": ["data/fastf1/events"],
+        "deps": ["fastf1_processing"],
+    },
+    "race_timeline": {
+        "module": "strategy.race_timeline",
+        "entry": "main",
+        "inputs": [SESSION_DIR],
+        "outputs": [],
+        "deps": [],
+    },
+    "weather_model": {
+        "module": "strategy.weather_model",
+        "entry": "main",
+        "inputs": [SESSION_DIR],
+        "outputs": [],
+        "deps": [],
+    },
+    "undercut_calculator": {
+        "module": "strategy.undercut_calculator",
+        "entry": "main",
+        "inputs": [SESSION_DIR],
+        "outputs": [],
+        "deps": [],
+    },
+    "pit_strategy_sim": {
+        "module": "strategy.pit_strategy_sim",
+        "inputs": ["data/sim_racing/processed_rio_race_engineering.csv"],
+        "outputs": [],
+        "deps": ["full_race_processing"],
+    },
+    "advanced_pit_strategy_sim": {
+        "module": "strategy.advanced_pit_strategy_sim",
+        "inputs": ["data/sim_racing/processed_rio_race_engineering.csv"],
+        "outputs": [],
+        "deps": ["full_race_processing"],
+    },
+    "batch_report": {
+        # Fans out per driver and lap on its own pool
+        "module": "visualization.batch_report",
+        "entry": "main",
+        "argv": ["--workers", "2"],
+        "inputs": ["data/fastf1/processed_fastf1_race_engineering.csv"],
+        "optional_inputs": ["data/sim_racing/processed_rio_race_engineering.csv"],
+        "outputs": ["reports/session/index.html"],
+        "deps": ["fastf1_processing", "full_race_processing"],
+    },
+}
+
+
+# ======================================
+# CONTENT HASHING
+# ======================================
+
+_IMPORT_RE = re.compile(r"^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w.]+))", re.M)
+_LOCAL_PACKAGES = ("telemetry", "processing", "strategy", "visualization", "pipeline")
+
+
+def module_file(module):
+    return os.path.join(*module.split(".")) + ".py"
+
+
+def code_files(module, seen=None):
+    """The stage module plus every repo module it imports, transitively."""
+    seen = set() if seen is None else seen
+    path = module_file(module)
+    if module in seen or not os.path.exists(path):
+        return seen
+    seen.add(module)
+    with open(path) as f:
+        for match in _IMPORT_RE.finditer(f.read()):
+            name = match.group(1) or match.group(2)
+            if name.split(".")[0] in _LOCAL_PACKAGES:
+                code_files(name, seen)
+    return seen
+
+
+def _hash_path(h, path):
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                _hash_path(h, os.path.join(root, name))
+        return
+    h.update(path.encode())
+    if not os.path.exists(path):
+        h.update(b"<missing>")
+        return
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+
+
+def stage_hash(name):
+    """Content hash of a stage's code and inputs."""
+    stage = STAGES[name]
+    h = hashlib.sha256()
+    for module in sorted(code_files(stage["module"])):
+        _hash_path(h, module_file(module))
+    h.update(json.dumps(stage.get("argv", [])).encode())
+    for path in stage["inputs"] + stage.get("optional_inputs", []):
+        _hash_path(h, path)
+    return h.hexdigest()
+
+
+def missing_inputs(name):
+    return [p for p in STAGES[name]["inputs"] if not os.path.exists(p)]
+
+
+def load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    with open(STATE_PATH + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(STATE_PATH + ".tmp", STATE_PATH)
+
+
+def is_fresh(name, digest, state):
+    outputs_exist = all(os.path.exists(p) for p in STAGES[name]["outputs"])
+    if STAGES[name].get("source"):
+        return outputs_exist
+    return outputs_exist and state.get(name, {}).get("hash") == digest
+
+
+# ======================================
+# WORKER
+# ======================================
+
+def _init_worker():
+    # Heavy imports once per worker, shared by every stage it runs
+    import matplotlib
+    matplotlib.use("Agg")
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import matplotlib.pyplot  # noqa: F401
+
+
+def run_stage(name, module, argv, entry=None):
+    """
+    Run one stage, logging its output to LOG_DIR. Modules with an entry
+    function are imported and called, so anything they hand to their own
+    process pool stays picklable; plain scripts run as __main__. With
+    TELEMETRY_PROFILE set, each stage is captured by processing.profiling.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{name}.log")
+    t0 = time.perf_counter()
+    ok, error = True, None
+
+    old_argv = sys.argv
+    sys.argv = [module_file(module)] + list(argv)
+    with open(log_path, "w") as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            with profile_stage(name):
+                if entry:
+                    getattr(importlib.import_module(module), entry)()
+                else:
+                    runpy.run_module(module, run_name="__main__", alter_sys=False)
+        except SystemExit as exc:
+            ok = exc.code in (None, 0)
+            error = None if ok else f"exit {exc.code}"
+        except BaseException as exc:
+            ok, error = False, f"{type(exc).__name__}: {exc}"
+            traceback.print_exc()
+        finally:
+            sys.argv = old_argv
+
+    return {"ok": ok, "error": error, "seconds": time.perf_counter() - t0, "pid": os.getpid(), "log": log_path}
+
+
+# ======================================
+# SCHEDULER
+# ======================================
+
+def select(only):
+    """Requested stages plus everything upstream of them."""
+    if not only:
+        return list(STAGES)
+    wanted, stack = set(), list(only)
+    while stack:
+        name = stack.pop()
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage '{name}'")
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(STAGES[name]["deps"])
+    return [n for n in STAGES if n in wanted]
+
+
+def run_pipeline(only=None, force=False, workers=DEFAULT_WORKERS):
+    names = select(only)
+    state = load_state()
+    results = {}
+    pending = {n: set(STAGES[n]["deps"]) & set(names) for n in names}
+    running = {}
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        while pending or running:
+            # Launch (or skip) every stage whose upstream is finished
+            for name in [n for n, deps in pending.items() if not deps]:
+                del pending[name]
+                # A "missing" upstream is not fatal: the stage still runs
+                # if what it reads exists (e.g. from an earlier run)
+                stage = STAGES[name]
+                upstream = [results[d]["status"] for d in stage["deps"] if d in results]
+                if any(s in ("failed", "blocked") for s in upstream):
+                    results[name] = {"status": "blocked", "seconds": 0.0}
+                    _finish(name, pending)
+                    continue
+
+                missing = missing_inputs(name)
+                if missing:
+                    results[name] = {"status": "missing", "seconds": 0.0, "missing": missing}
+                    _finish(name, pending)
+                    continue
+
+                digest = stage_hash(name)
+                if not force and is_fresh(name, digest, state):
+                    results[name] = {"status": "skipped", "seconds": 0.0}
+                    _finish(name, pending)
+                    continue
+
+                future = pool.submit(run_stage, name, stage["module"], stage.get("argv", []), stage.get("entry"))
+                running[future] = (name, digest)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, digest = running.pop(future)
+                result = future.result()
+                result["status"] = "ran" if result["ok"] else "failed"
+                results[name] = result
+                if result["ok"]:
+                    # Outputs may be another stage's inputs; record the hash
+                    # of what this run actually consumed
+                    state[name] = {"hash": digest, "seconds": result["seconds"], "finished": time.time()}
+                    save_state(state)
+                _finish(name, pending)
+
+    print_summary(results, time.perf_counter() - t0)
+    return results
+
+
+def _finish(name, pending):
+    for deps in pending.values():
+        deps.discard(name)
+
+
+def print_summary(results, wall):
+    print("\n===== PIPELINE SUMMARY =====")
+    print(f"{'stage':<28} {'status':<8} {'seconds':>8}  worker")
+    for name in STAGES:
+        if name not in results:
+            continue
+        r = results[name]
+        worker = r.get("pid", "")
+        print(f"{name:<28} {r['status']:<8} {r['seconds']:>8.2f}  {worker}")
+        if r["status"] == "failed":
+            print(f"    ↳ {r['error']} (log: {r['log']})")
+        elif r["status"] == "missing":
+            print(f"    ↳ input not found: {', '.join(r['missing'])}")
+
+    busy = sum(r["seconds"] for r in results.values())
+    statuses = ("ran", "skipped", "missing", "failed", "blocked")
+    counts = {s: sum(r["status"] == s for r in results.values()) for s in statuses}
+    print(f"\nWall time {wall:.2f} s, stage time {busy:.2f} s "
+          f"(concurrency {busy / wall if wall > 0 else 0:.1f}x)")
+    print(", ".join(f"{n} {s}" for s, n in counts.items()))
+    icon = "✅" if not counts["failed"] and not counts["blocked"] else "⚠️"
+    print(f"{icon} Pipeline finished")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the telemetry pipeline as a DAG")
+    parser.add_argument("--only", nargs="+", help="stages to run (their upstream stages are included)")
+    parser.add_argument("--force", action="store_true", help="run stages even if their inputs are unchanged")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--list", action="store_true", help="print the DAG and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, stage in STAGES.items():
+            deps = ", ".join(stage["deps"]) or "-"
+            print(f"{name:<28} <- {deps}")
+        return
+
+    results = run_pipeline(args.only, args.force, args.workers)
+    if any(r["status"] in ("failed", "blocked") for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import numpy as np
+
+# ======================================
+# CONFIG
+# ======================================
+
+DEFAULT_SEGMENTS = 20           # per-segment report: 20 x 5% of a lap
+
+
+# ======================================
+# CIRCULAR CROSS-CORRELATION (FFT)
+# ======================================
+
+def _standardize(x):
+    x = np.asarray(x, dtype=np.float64)
+    # Gaps (e.g. past the end of a shorter lap) carry the lap mean
+    x = np.where(np.isfinite(x), x, np.nanmean(x))
+    std = x.std()
+    return (x - x.mean()) / std if std > 0 else x - x.mean()
+
+
+def circular_cross_correlation(ref, other):
+    """
+    Normalized circular cross-correlation of two equal-length traces via
+    the FFT, O(n log n). Element k is the Pearson correlation of `ref`
+    with `other` rolled by k samples (np.roll(other, k)).
+    """
+    a = _standardize(ref)
+    b = _standardize(other)
+    n = len(a)
+
+    corr = np.fft.irfft(np.fft.rfft(a) * np.conj(np.fft.rfft(b)), n=n)
+    return corr / n
+
+
+def estimate_circular_offset(ref, other):
+    """
+    Samples by which `other` must be rolled to line up with `ref`, and the
+    correlation at that shift (1.0 = identical shape, ~0 = no match).
+    """
+    corr = circular_cross_correlation(ref, other)
+    shift = int(np.argmax(corr))
+
+    # Report the shift in the -n/2..n/2 range
+    n = len(corr)
+    if shift > n // 2:
+        shift -= n
+
+    return shift, float(corr[shift % n])
+
+
+# ======================================
+# ALIGNMENT + SEGMENT REPORT
+# ======================================
+
+def align_traces(grid, ref_channels, other_channels, align_on="speed",
+                 n_segments=DEFAULT_SEGMENTS):
+    """
+    Align `other` onto `ref` on a shared (circular) lap grid.
+
+    ref_channels / other_channels: {channel: 1-D array on `grid`}.
+    The offset is estimated on `align_on` and applied to every channel.
+
+    Returns a dict with the shift (samples and grid units), correlation
+    before/after, the aligned channels and a per-segment difference table
+    (mean other - ref for each channel).
+    """
+    ref_key = np.asarray(ref_channels[align_on])
+    other_key = np.asarray(other_channels[align_on])
+
+    baseline_corr = float(circular_cross_correlation(ref_key, other_key)[0])
+    shift, corr = estimate_circular_offset(ref_key, other_key)
+
+    aligned = {name: np.roll(np.asarray(values), shift) for name, values in other_channels.items()}
+
+    step = grid[1] - grid[0] if len(grid) > 1 else 0.0
+
+    # Per-segment mean differences, one vectorized reduction per channel
+    n = len(grid)
+    bounds = np.linspace(0, n, n_segments + 1).astype(int)
+    segments = {
+        "start": grid[bounds[:-1]],
+        "end": grid[np.minimum(bounds[1:], n - 1)],
+    }
+    for name in ref_channels:
+        if name not in aligned:
+            continue
+        diff = aligned[name] - np.asarray(ref_channels[name])
+        seg_sum = np.add.reduceat(np.nan_to_num(diff), bounds[:-1])
+        seg_cnt = np.add.reduceat(np.isfinite(diff).astype(int), bounds[:-1])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            segments[f"{name}_diff"] = seg_sum / seg_cnt
+
+    return {
+        "shift_samples": shift,
+        "shift_grid": shift * step,
+        "correlation_before": baseline_corr,
+        "correlation": corr,
+        "aligned": aligned,
+        "segments": segments,
+    }
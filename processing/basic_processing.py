@@ -1,6 +1,8 @@
-import pandas as pd
 import numpy as np
 
+from processing.dtypes import SIM_SCHEMA, apply_schema
+from processing.schema_registry import read_telemetry, time_seconds
+
 # ==========================
 # CONFIG
 # ==========================
@@ -10,44 +12,29 @@ OUTPUT_PATH = "data/sim_racing/processed_rio.csv"
 # ==========================
 # LOAD TELEMETRY
 # ==========================
-df = pd.read_csv(INPUT_PATH)
+# The schema registry recognises the export from its header and reads only
+# the channels below, already renamed to our names
+CHANNELS = ["time", "speed", "throttle", "brake", "rpm", "gear"]
+
+df, resolution = read_telemetry(INPUT_PATH, channels=CHANNELS)
 
-print("Loaded telemetry with columns:")
+print(f"Loaded telemetry ({resolution['source']} export) with columns:")
 print(df.columns.tolist())
 print("\nTotal samples:", len(df))
 
-# ==========================
-# BASIC NORMALIZATION
-# ==========================
-# Try to auto-detect common racing signal names
-column_map = {
-    "speed": ["Speed", "speed", "Velocity", "velocity"],
-    "throttle": ["Throttle", "throttle", "ThrottlePos"],
-    "brake": ["Brake", "brake", "BrakePressure"],
-    "rpm": ["RPM", "rpm", "EngineRPM"],
-    "gear": ["Gear", "gear", "nGear"]
-}
-
-normalized = {}
-
-for key, aliases in column_map.items():
-    found = False
-    for col in aliases:
-        if col in df.columns:
-            normalized[key] = df[col]
-            found = True
-            break
-    if not found:
+for key in CHANNELS:
+    if key not in df.columns:
         print(f"WARNING: Could not find column for {key}")
 
 # Build normalized dataframe
-proc = pd.DataFrame(normalized)
+proc = df[[c for c in CHANNELS if c != "time" and c in df.columns]].copy()
 
 # ==========================
 # TIME BASE (IF MISSING)
 # ==========================
-if "Time" in df.columns:
-    proc["time"] = df["Time"]
+if "time" in df.columns:
+    # In seconds whatever the source unit (ms, timedelta text, ...)
+    proc["time"] = time_seconds(df, resolution)
 else:
     # Assume 100 Hz sample rate if time is missing
     proc["time"] = np.arange(len(proc)) * 0.01
@@ -81,6 +68,11 @@ if "gear" in proc.columns:
 else:
     proc["gear_shift"] = 0
 
+# ==========================
+# COMPACT DTYPES
+# ==========================
+proc = apply_schema(proc, SIM_SCHEMA)
+
 # ==========================
 # SAVE PROCESSED TELEMETRY
 # ==========================
@@ -92,7 +84,7 @@ WHAT THIS FILE IS DOING (IN RACE TERMS)
 
 | Code Section     | What It Means in Racing                             |
 | ---------------- | --------------------------------------------------- |
-| Column detection | Adapts automatically to different telemetry formats |
+| Schema registry  | Adapts automatically to different telemetry formats |
 | Time base        | Builds a proper sampling timeline                   |
 | Acceleration     | Detects corner entry & exit force                   |
 | Brake events     | Detects braking zones                               |
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+from processing.profiling import count, timed
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:             # grid index below is used instead
+    cKDTree = None
+
+# ======================================
+# CONFIG
+# ======================================
+
+# FastF1 X/Y positions are in 1/10 m
+XY_UNITS_PER_M = 10.0
+
+# Vertex spacing of the resampled centreline
+CENTERLINE_SPACING_M = 1.0
+
+# Grid index cell size; lateral offsets beyond this are not searched
+GRID_CELL_M = 25.0
+GRID_STRIDE = 5                 # grid buckets every 5th vertex, then refines
+
+# Samples projected per vectorized block (bounds temporary memory)
+PROJECT_CHUNK = 200_000
+
+
+# ======================================
+# SPATIAL INDEX (NEAREST CENTRELINE VERTEX)
+# ======================================
+
+class GridIndex:
+    """
+    Uniform-grid nearest-vertex lookup, used when SciPy is not installed.
+
+    Every `stride`-th vertex is bucketed into cells, padded to a fixed
+    width, so a bulk query is a gather over the 3x3 neighbourhood plus one
+    argmin; the coarse hit is then refined over the neighbouring `stride`
+    vertices on either side. Points farther than one cell from the
+    centreline get -1.
+    """
+
+    def __init__(self, vertices, cell=GRID_CELL_M, stride=GRID_STRIDE):
+        self.vertices = vertices
+        self.coarse = vertices[::stride]
+        self.stride = stride
+        self.cell = cell
+        self.origin = self.coarse.min(axis=0) - cell
+
+        ij = np.floor((self.coarse - self.origin) / cell).astype(np.int64)
+        self.shape = tuple(ij.max(axis=0) + 2)
+        flat = ij[:, 0] * self.shape[1] + ij[:, 1]
+
+        order = np.argsort(flat, kind="stable")
+        counts = np.bincount(flat, minlength=self.shape[0] * self.shape[1])
+        width = max(1, counts.max())
+
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rank = np.arange(len(flat)) - starts[flat[order]]
+
+        self.slots = np.full((self.shape[0] * self.shape[1], width), -1, dtype=np.int64)
+        self.slots[flat[order], rank] = order
+
+    def query(self, points):
+        ij = np.floor((points - self.origin) / self.cell).astype(np.int64)
+        coarse = np.full(len(points), -1, dtype=np.int64)
+        best = np.full(len(points), np.inf)
+
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                ci = np.clip(ij[:, 0] + di, 0, self.shape[0] - 1)
+                cj = np.clip(ij[:, 1] + dj, 0, self.shape[1] - 1)
+                cand = self.slots[ci * self.shape[1] + cj]            # (n, width)
+
+                valid = cand >= 0
+                diff = self.coarse[np.where(valid, cand, 0)] - points[:, None, :]
+                d2 = np.where(valid, np.einsum("nkd,nkd->nk", diff, diff), np.inf)
+
+                k = np.argmin(d2, axis=1)
+                d2_min = d2[np.arange(len(points)), k]
+                better = d2_min < best
+                best[better] = d2_min[better]
+                coarse[better] = cand[better, k[better]]
+
+        # Refine around the coarse hit on the full-resolution vertices
+        n = len(self.vertices)
+        window = np.arange(-self.stride, self.stride + 1)
+        cand = (coarse[:, None] * self.stride + window) % n
+        diff = self.vertices[cand] - points[:, None, :]
+        k = np.argmin(np.einsum("nkd,nkd->nk", diff, diff), axis=1)
+        nearest = cand[np.arange(len(points)), k]
+
+        return np.where(coarse >= 0, nearest, -1)
+
+
+class KDTreeIndex:
+    def __init__(self, vertices):
+        self.tree = cKDTree(vertices)
+
+    def query(self, points):
+        _, nearest = self.tree.query(points, workers=-1)
+        return nearest
+
+
+# ======================================
+# CENTRELINE MODEL
+# ======================================
+
+class Centerline:
+    """
+    Closed track centreline in metres, resampled to evenly spaced vertices,
+    with a spatial index for projecting X/Y samples to (lap distance,
+    lateral offset) in bulk. Lateral offset is positive to the left of the
+    driving direction.
+    """
+
+    def __init__(self, x, y, units_per_m=XY_UNITS_PER_M, spacing_m=CENTERLINE_SPACING_M,
+                 index="auto"):
+        pts = np.column_stack([x, y]).astype(np.float64) / units_per_m
+
+        # Drop repeated samples, then close the loop
+        keep = np.r_[True, np.any(np.diff(pts, axis=0) != 0, axis=1)]
+        pts = pts[keep]
+        pts = np.vstack([pts, pts[:1]])
+
+        seg = np.hypot(*np.diff(pts, axis=0).T)
+        s_raw = np.concatenate([[0.0], np.cumsum(seg)])
+        self.length_m = s_raw[-1]
+
+        n = max(8, int(round(self.length_m / spacing_m)))
+        self.s = np.linspace(0.0, self.length_m, n, endpoint=False)
+        self.vertices = np.column_stack([
+            np.interp(self.s, s_raw, pts[:, 0]),
+            np.interp(self.s, s_raw, pts[:, 1]),
+        ])
+        self.units_per_m = units_per_m
+
+        if index == "grid" or (index == "auto" and cKDTree is None):
+            self.index = GridIndex(self.vertices)
+        else:
+            self.index = KDTreeIndex(self.vertices)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """Build from the X/Y columns of a reference lap (e.g. a FastF1 export)."""
+        df = pd.read_csv(path, usecols=["X", "Y"])
+        return cls(df["X"].values, df["Y"].values, **kwargs)
+
+    @timed
+    def project(self, x, y):
+        """
+        Project X/Y samples (in source units) onto the centreline.
+
+        Returns (distance_m, lateral_m) arrays; distance is in [0, length).
+        Samples the grid index could not place come back as NaN.
+        """
+        pts = np.column_stack([x, y]).astype(np.float64) / self.units_per_m
+        distance = np.empty(len(pts))
+        lateral = np.empty(len(pts))
+
+        for start in range(0, len(pts), PROJECT_CHUNK):
+            block = slice(start, start + PROJECT_CHUNK)
+            distance[block], lateral[block] = self._project_block(pts[block])
+
+        count("points_projected", len(pts))
+        return distance, lateral
+
+    def _project_block(self, pts):
+        n = len(self.vertices)
+        nearest = self.index.query(pts)
+        missing = nearest < 0
+        nearest = np.where(missing, 0, nearest)
+
+        best_d2 = np.full(len(pts), np.inf)
+        distance = np.zeros(len(pts))
+        lateral = np.zeros(len(pts))
+
+        # The foot of the perpendicular lies on one of the two segments
+        # touching the nearest vertex
+        for a_idx in ((nearest - 1) % n, nearest):
+            b_idx = (a_idx + 1) % n
+            a = self.vertices[a_idx]
+            ab = self.vertices[b_idx] - a
+            ap = pts - a
+
+            seg_len2 = np.einsum("nd,nd->n", ab, ab)
+            t = np.clip(np.einsum("nd,nd->n", ap, ab) / seg_len2, 0.0, 1.0)
+            foot = a + t[:, None] * ab
+            d2 = np.einsum("nd,nd->n", pts - foot, pts - foot)
+
+            better = d2 < best_d2
+            seg_len = np.sqrt(seg_len2)
+            best_d2 = np.where(better, d2, best_d2)
+            distance = np.where(better, self.s[a_idx] + t * seg_len, distance)
+            lateral = np.where(better, (ab[:, 0] * ap[:, 1] - ab[:, 1] * ap[:, 0]) / seg_len, lateral)
+
+        distance = np.mod(distance, self.length_m)
+        distance[missing] = np.nan
+        lateral[missing] = np.nan
+
+        return distance, lateral
+
+    def lap_distance(self, x, y):
+        """
+        Distance along a continuous run of samples (e.g. one lap), unwrapped
+        across the start/finish line and starting at 0 — a drop-in
+        replacement for integrated distance_m.
+        """
+        distance, lateral = self.project(x, y)
+        unwrapped = unwrap_distance(distance, self.length_m)
+        return unwrapped - unwrapped[0], lateral
+
+
+def unwrap_distance(distance, length_m):
+    """Remove start/finish wrap-arounds from a sequence of track positions."""
+    jumps = np.diff(distance, prepend=distance[:1])
+    laps = np.cumsum(np.where(jumps < -length_m / 2, 1, 0) - np.where(jumps > length_m / 2, 1, 0))
+    return distance + laps * length_m
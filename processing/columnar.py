@@ -0,0 +1,201 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from processing.dtypes import TELEMETRY_SCHEMA, apply_schema
+from processing.profiling import count, timed
+
+# ======================================
+# CONFIG
+# ======================================
+
+COLUMNAR_SUFFIX = ".columns"
+SCHEMA_FILE = "_schema.json"
+FORMAT_NAME = "npy-columns"
+FORMAT_VERSION = 2              # 2: categoricals stored as codes + category list
+
+
+# ======================================
+# PATHS
+# ======================================
+
+def columnar_path(path):
+    """Columnar directory that sits next to a CSV: foo.csv -> foo.columns/"""
+    root, ext = os.path.splitext(path)
+    return path if ext == COLUMNAR_SUFFIX else root + COLUMNAR_SUFFIX
+
+
+# ======================================
+# WRITE
+# ======================================
+
+def _column_array(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Integer codes; the category list goes into the schema
+        return np.ascontiguousarray(series.cat.codes.to_numpy())
+    values = series.to_numpy()
+    if values.dtype.kind in "biuf":
+        return np.ascontiguousarray(values)
+    # Strings / objects: fixed-width unicode so the column stays mappable
+    return np.asarray(series.astype(str).to_numpy(), dtype=str)
+
+
+@timed
+def write_columnar(df, path):
+    """
+    Write a DataFrame as one raw .npy file per column plus a JSON schema.
+
+    Columns are written into a staging directory; the old table is renamed
+    aside before the staging directory is renamed into place, so `path`
+    always holds a complete table (only the instant between the two
+    renames has none, and a reader then falls back to the CSV).
+    """
+    path = columnar_path(path)
+    staging = path + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    schema = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "n_rows": len(df),
+        "columns": [],
+    }
+    for i, name in enumerate(df.columns):
+        values = _column_array(df[name])
+        filename = f"{i:03d}.npy"
+        np.save(os.path.join(staging, filename), values, allow_pickle=False)
+        column = {"name": str(name), "dtype": values.dtype.str, "file": filename}
+        if isinstance(df[name].dtype, pd.CategoricalDtype):
+            column["categorical"] = True
+            column["categories"] = df[name].cat.categories.tolist()
+        schema["columns"].append(column)
+
+    with open(os.path.join(staging, SCHEMA_FILE), "w") as f:
+        json.dump(schema, f, indent=2)
+
+    retired = path + ".old"
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, retired)
+    os.replace(staging, path)
+    shutil.rmtree(retired, ignore_errors=True)
+    return path
+
+
+# ======================================
+# READ (MEMORY-MAPPED)
+# ======================================
+
+class ColumnarTable:
+    """
+    Read-only view of a columnar directory. Opening it only parses the
+    schema; each column is memory-mapped on first access, so the OS pages
+    in just the columns (and ranges) a consumer actually touches.
+    """
+
+    def __init__(self, path):
+        self.path = columnar_path(path)
+        with open(os.path.join(self.path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        if schema.get("format") != FORMAT_NAME:
+            raise ValueError(f"{self.path} is not a {FORMAT_NAME} table")
+
+        self.n_rows = schema["n_rows"]
+        self._files = {c["name"]: c["file"] for c in schema["columns"]}
+        self.dtypes = {c["name"]: np.dtype(c["dtype"]) for c in schema["columns"]}
+        self._categorical = {c["name"] for c in schema["columns"] if c.get("categorical")}
+        # Version 2 stores categoricals as codes; version 1 as their labels
+        self.categories = {
+            c["name"]: c["categories"] for c in schema["columns"] if "categories" in c
+        }
+        self._maps = {}
+
+    @property
+    def columns(self):
+        return list(self._files)
+
+    def __len__(self):
+        return self.n_rows
+
+    def __contains__(self, name):
+        return name in self._files
+
+    def _map(self, name, mode="r"):
+        return np.load(os.path.join(self.path, self._files[name]), mmap_mode=mode)
+
+    def __getitem__(self, name):
+        """Raw mapped column (integer codes for categoricals, see decode)."""
+        if name not in self._maps:
+            self._maps[name] = self._map(name)
+        return self._maps[name]
+
+    def decode(self, name, values):
+        """Categorical for coded values of `name`; other columns pass through."""
+        if name in self.categories:
+            return pd.Categorical.from_codes(values, self.categories[name])
+        return values
+
+    def to_frame(self, columns=None):
+        """
+        DataFrame over selected columns (default: all) without copying them.
+        Columns are mapped copy-on-write, so pages are read from disk only
+        when touched and in-place edits stay private to the frame.
+        """
+        columns = self.columns if columns is None else columns
+        df = pd.DataFrame(
+            {name: self.decode(name, self._map(name, "c")) for name in columns}, copy=False
+        )
+        for name in self._categorical.intersection(columns).difference(self.categories):
+            df[name] = df[name].astype("category")
+        return df
+
+
+def open_columnar(path):
+    return ColumnarTable(path)
+
+
+def has_columnar(path):
+    return os.path.exists(os.path.join(columnar_path(path), SCHEMA_FILE))
+
+
+# ======================================
+# SHARED LOADER FOR PROCESSED TELEMETRY
+# ======================================
+
+def save_processed(df, csv_path):
+    """Write a processed table as CSV (for people) and columnar (for tools)."""
+    df.to_csv(csv_path, index=False)
+    return write_columnar(df, csv_path)
+
+
+@timed
+def load_processed(path, columns=None, schema=TELEMETRY_SCHEMA):
+    """
+    Load processed telemetry, preferring the memory-mapped columnar copy
+    next to `path` and falling back to the CSV when it has not been
+    written (or is older than the CSV). CSV columns are cast to `schema`
+    so both paths hand back the same compact dtypes.
+
+    Pass `columns` to load only what the caller uses; names the file does
+    not have are skipped, so optional channels can be listed too.
+    """
+    if has_columnar(path):
+        stale = os.path.exists(path) and path != columnar_path(path) and (
+            os.path.getmtime(path) > os.path.getmtime(os.path.join(columnar_path(path), SCHEMA_FILE))
+        )
+        if not stale:
+            table = open_columnar(path)
+            if columns is not None:
+                columns = [name for name in columns if name in table]
+            df = table.to_frame(columns)
+            count("rows_loaded", len(df))
+            return df
+
+    usecols = None if columns is None else (lambda name: name in columns)
+    df = apply_schema(pd.read_csv(path, usecols=usecols), schema)
+    count("rows_loaded", len(df))
+    return df
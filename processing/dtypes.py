@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from processing.profiling import timed
+
+# ======================================
+# CONFIG
+# ======================================
+
+# Compact dtype for every processed telemetry column. Values are computed
+# in float64 and cast once on output.
+#   float32: ~7 significant digits — 0.5 ms resolution at 2 h session
+#            time, 2 mm at 30 km of cumulative distance
+#   int8:    0/1 flags and small signed codes (gear_shift is a diff)
+TELEMETRY_SCHEMA = {
+    # time / position
+    "time_s": "float32",
+    "lap": "int16",
+    "distance_m": "float32",
+    "lateral_m": "float32",
+    "race_pos": "uint8",
+    "driver": "category",
+
+    # driver inputs / powertrain
+    "speed": "float32",
+    "wheel_speed_avg": "float32",
+    "long_accel": "float32",
+    "accel": "float32",
+    "throttle": "float32",
+    "rpm": "uint16",
+    "gear": "uint8",
+    "gear_shift": "int8",
+    "drs": "uint8",
+    "power": "float32",
+    "torque": "float32",
+    "boost": "float32",
+
+    # flags
+    "full_throttle": "int8",
+    "full_throttle_proxy": "int8",
+    "brake_event": "int8",
+    "traction_loss": "int8",
+
+    # tires
+    "tire_temp_avg": "float32",
+    "tire_temp_rate": "float32",
+    "tire_slip_avg": "float32",
+}
+
+# "brake" is a 0/1 flag in FastF1 output but a 0-100 pressure in the sim
+FASTF1_SCHEMA = {**TELEMETRY_SCHEMA, "brake": "int8"}
+SIM_SCHEMA = {**TELEMETRY_SCHEMA, "brake": "float32"}
+
+REPORT_DATASETS = {
+    "SIM": ("data/sim_racing/processed_rio_race_engineering.csv", SIM_SCHEMA),
+    "F1": ("data/fastf1/processed_fastf1_race_engineering.csv", FASTF1_SCHEMA),
+}
+
+# Synthetic full-field session for the memory report
+FIELD_DRIVERS = 20
+FIELD_LAPS = 57
+
+
+# ======================================
+# CASTING
+# ======================================
+
+def to_flag(values):
+    """0/1 int8 from bools, "True"/"False" strings or numbers."""
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return (pd.to_numeric(values).fillna(0) > 0).astype("int8")
+    return values.astype(str).str.strip().str.lower().isin(["true", "1", "1.0"]).astype("int8")
+
+
+def _cast(values, dtype):
+    if dtype == "category":
+        return values.astype("category")
+
+    if dtype == "int8" and not pd.api.types.is_numeric_dtype(values):
+        return to_flag(values)
+
+    values = pd.to_numeric(values, errors="coerce")
+
+    if np.dtype(dtype).kind in "iu":
+        if values.isna().any():
+            return values.astype("float32")      # keep gaps instead of inventing zeros
+        info = np.iinfo(dtype)
+        return values.round().clip(info.min, info.max).astype(dtype)
+
+    return values.astype(dtype)
+
+
+@timed
+def apply_schema(df, schema=TELEMETRY_SCHEMA):
+    """Cast the schema's columns in place of the defaults; others are kept as-is."""
+    df = df.copy()
+    for name, dtype in schema.items():
+        if name in df.columns:
+            df[name] = _cast(df[name], dtype)
+    return df
+
+
+# ======================================
+# MEMORY REPORT
+# ======================================
+
+def memory_report(before, after):
+    """Per-column resident bytes before/after casting (deep, incl. strings)."""
+    b = before.memory_usage(index=False, deep=True)
+    a = after.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_before": b,
+        "bytes_after": a,
+    })
+    report.loc["TOTAL"] = ["", "", b.sum(), a.sum()]
+    report["ratio"] = report["bytes_before"] / report["bytes_after"]
+    return report
+
+
+def full_field(df, drivers=FIELD_DRIVERS, laps=FIELD_LAPS):
+    """Tile one lap into a drivers x laps session with a driver column."""
+    n = len(df)
+    field = pd.concat([df] * (drivers * laps), ignore_index=True)
+    field["lap"] = np.tile(np.repeat(np.arange(laps), n), drivers)
+    field["driver"] = np.repeat([f"D{i:02d}" for i in range(drivers)], n * laps)
+    return field
+
+
+def _print_report(name, before, after):
+    report = memory_report(before, after)
+    total = report.loc["TOTAL"]
+    print(f"\n===== {name}: {len(before):,} rows =====")
+    print(report.to_string(float_format=lambda v: f"{v:.1f}"))
+    print(f"{total['bytes_before'] / 1e6:.2f} MB -> {total['bytes_after'] / 1e6:.2f} MB "
+          f"({total['ratio']:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    for name, (path, schema) in REPORT_DATASETS.items():
+        try:
+            raw = pd.read_csv(path)
+        except FileNotFoundError:
+            print(f"\n{name}: {path} not found, skipped")
+            continue
+
+        _print_report(name, raw, apply_schema(raw, schema))
+
+        if name == "F1":
+            field = full_field(raw)
+            _print_report("F1 FULL FIELD (synthetic)", field, apply_schema(field, schema))
@@ -0,0 +1,359 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from processing.centerline import Centerline
+from processing.columnar import load_processed
+
+# ======================================
+# CONFIG
+# ======================================
+
+INPUT_PATH = "data/fastf1/processed_fastf1_race_engineering.csv"
+REFERENCE_LAP_PATH = "data/fastf1/bahrain_2023_verstappen.csv"
+EVENTS_DIR = "data/fastf1/events"
+
+# Catalogues are read from CATALOGUE_DIR/<track>_corners.csv, and detected
+# and saved there when missing (rebuild with load_corner_catalogue(rebuild=True)).
+# With the centreline available every bend is found from curvature, flat-out
+# ones (Bahrain T3, T5, T12) included. Linked bends in the same direction
+# with no straighter section between them (Bahrain T9-T10, T14-T15) come
+# out as one corner, so numbers past T8 run behind the official ones.
+TRACK_NAME = "bahrain"
+CATALOGUE_DIR = "data/tracks"
+
+# Flags encoded as intervals: table name -> (column, threshold)
+EVENT_FLAGS = {
+    "braking": ("brake", 0),
+    "full_throttle": ("full_throttle", 0),
+    "drs": ("drs", 9),          # FastF1 DRS codes 10-14 = flap open
+}
+
+# How each interval table is tied to the catalogue: braking ends in the
+# corner it is for; full throttle starts on the exit of the corner before
+EVENT_CORNERS = {
+    "braking": "end",
+    "full_throttle": "exit",
+}
+
+# Channels read from the processed file
+INPUT_COLUMNS = ["time_s", "distance_m", "lap", "speed", "long_accel"]
+INPUT_COLUMNS += [column for column, _ in EVENT_FLAGS.values()]
+
+# Corner detection on a 1 m grid
+CORNER_MIN_SEPARATION_M = 100   # two apexes closer than this are one corner
+CORNER_MIN_PROMINENCE_KMH = 10  # speed must recover this much on both sides
+CORNER_MIN_CURVATURE = 1 / 200  # 1/m at the apex; weaker bends are kinks
+CORNER_EXTENT_CURVATURE = 1 / 1000  # 1/m; a corner spans the bend tighter than this
+CURVATURE_SMOOTH_M = 25
+
+# Written CSVs: the processed channels are float32, printed in full they
+# carry repr noise (558.2969360351562)
+EVENTS_FLOAT_FORMAT = "%.4f"
+
+
+# ======================================
+# RUN-LENGTH ENCODING → INTERVAL TABLES
+# ======================================
+
+def run_intervals(flag, breaks=None):
+    """
+    Start/end indices (inclusive) of every run where `flag` is true.
+    `breaks` (bool, same length) forces a new run, e.g. at lap changes.
+    """
+    flag = np.asarray(flag, dtype=bool)
+    if breaks is None:
+        breaks = np.zeros(len(flag), dtype=bool)
+
+    prev = np.r_[False, flag[:-1]] & ~np.asarray(breaks, dtype=bool)
+    nxt = np.r_[flag[1:], False] & ~np.r_[np.asarray(breaks, dtype=bool)[1:], True]
+
+    starts = np.flatnonzero(flag & ~prev)
+    ends = np.flatnonzero(flag & ~nxt)
+    return starts, ends
+
+
+def interval_table(df, flag, breaks=None):
+    """
+    Encode a per-sample flag into one row per interval with distance,
+    time, entry/min/exit speed and peak deceleration — all computed with
+    reduceat over the run boundaries, no per-interval Python loop.
+    """
+    starts, ends = run_intervals(flag, breaks)
+    columns = [
+        "lap", "start_idx", "end_idx", "start_distance_m", "end_distance_m",
+        "start_time_s", "end_time_s", "duration_s",
+        "entry_speed", "min_speed", "exit_speed", "peak_decel",
+    ]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=columns)
+
+    speed = df["speed"].to_numpy(dtype=np.float64)
+    accel = df["long_accel"].to_numpy(dtype=np.float64)
+    distance = df["distance_m"].to_numpy(dtype=np.float64)
+    time_s = df["time_s"].to_numpy(dtype=np.float64)
+    lap = df["lap"].to_numpy() if "lap" in df.columns else np.zeros(len(df), dtype=int)
+
+    # reduceat over [start, end] needs the run bounds interleaved
+    bounds = np.column_stack([starts, ends + 1]).ravel()
+    if bounds[-1] == len(df):
+        bounds = bounds[:-1]
+
+    min_speed = np.minimum.reduceat(speed, bounds)[::2]
+    peak_decel = -np.minimum.reduceat(accel, bounds)[::2]
+
+    return pd.DataFrame({
+        "lap": lap[starts],
+        "start_idx": starts,
+        "end_idx": ends,
+        "start_distance_m": distance[starts],
+        "end_distance_m": distance[ends],
+        "start_time_s": time_s[starts],
+        "end_time_s": time_s[ends],
+        "duration_s": time_s[ends] - time_s[starts],
+        "entry_speed": speed[starts],
+        "min_speed": min_speed,
+        "exit_speed": speed[ends],
+        "peak_decel": np.maximum(peak_decel, 0.0),
+    })
+
+
+def extract_events(df, flags=EVENT_FLAGS):
+    """Interval tables for every configured flag present in `df`."""
+    breaks = None
+    if "lap" in df.columns:
+        breaks = np.r_[False, np.diff(df["lap"].to_numpy()) != 0]
+
+    tables = {}
+    for name, (column, threshold) in flags.items():
+        if column not in df.columns:
+            continue
+        tables[name] = interval_table(df, df[column].to_numpy() > threshold, breaks)
+
+    return tables
+
+
+# ======================================
+# CORNER DETECTION
+# ======================================
+
+def _rolling(values, window, fn):
+    """Centered rolling reduction with edge padding (window in samples, odd)."""
+    half = window // 2
+    padded = np.pad(values, half, mode="edge")
+    return fn(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+
+
+def track_curvature(centerline, smooth_m=CURVATURE_SMOOTH_M):
+    """Signed curvature (1/m, + = left) at every centreline vertex."""
+    v = centerline.vertices
+    step = centerline.length_m / len(v)
+
+    # The closing segment spans whatever is left of the lap (often a
+    # fraction of a metre), so its heading is noise: reuse the last one
+    d = np.roll(v, -1, axis=0) - v
+    d[-1] = d[-2]
+    heading = np.unwrap(np.arctan2(d[:, 1], d[:, 0]))
+    curvature = np.gradient(heading, step)
+
+    window = max(3, int(smooth_m / step) | 1)
+    kernel = np.ones(window) / window
+    wrapped = np.r_[curvature[-window:], curvature, curvature[:window]]
+    return np.convolve(wrapped, kernel, mode="same")[window:-window]
+
+
+def detect_corners(distance, speed, curvature_s=None, curvature=None,
+                   min_separation_m=CORNER_MIN_SEPARATION_M,
+                   min_prominence_kmh=CORNER_MIN_PROMINENCE_KMH,
+                   min_curvature=CORNER_MIN_CURVATURE,
+                   extent_curvature=CORNER_EXTENT_CURVATURE):
+    """
+    With curvature supplied, corners are bends: runs of same-sign
+    curvature tighter than extent_curvature whose peak is tighter than
+    min_curvature, apex at the peak, so flat-out bends are found as well
+    as braking corners. Without it, corners are speed minima that are the
+    lowest point within ±min_separation_m and recover by
+    min_prominence_kmh on both sides.
+
+    Returns a catalogue table ordered by distance.
+    """
+    grid = np.arange(0.0, distance[-1], 1.0)
+    v = np.interp(grid, distance, speed)
+
+    if curvature is None:
+        return _speed_corners(grid, v, min_separation_m, min_prominence_kmh)
+
+    k = np.interp(grid, curvature_s, curvature, period=curvature_s[-1] + 1.0)
+    k_abs = np.abs(k)
+    starts, ends = run_intervals(k_abs >= extent_curvature, np.r_[False, np.diff(np.sign(k)) != 0])
+
+    apex = np.array([a + np.argmax(k_abs[a:b + 1]) for a, b in zip(starts, ends)], dtype=int)
+    keep = k_abs[apex] >= min_curvature if len(apex) else np.zeros(0, dtype=bool)
+    starts, ends, apex = starts[keep], ends[keep], apex[keep]
+
+    return pd.DataFrame({
+        "corner": np.arange(1, len(apex) + 1),
+        "entry_distance_m": grid[starts],
+        "apex_distance_m": grid[apex],
+        "exit_distance_m": grid[ends],
+        "apex_speed": [v[a:b + 1].min() for a, b in zip(starts, ends)],
+        "peak_curvature": k_abs[apex],
+        "direction": np.where(k[apex] >= 0, "left", "right"),
+    })
+
+
+def _speed_corners(grid, v, min_separation_m, min_prominence_kmh):
+    """Speed-minimum corners, for laps without a centreline."""
+    window = 2 * int(min_separation_m) + 1
+    local_min = _rolling(v, window, np.min)
+    local_max_left = _rolling(np.r_[v, np.full(window // 2, v[-1])], window, np.max)[window // 2:]
+    local_max_right = _rolling(np.r_[np.full(window // 2, v[0]), v], window, np.max)[:len(v)]
+
+    is_apex = (v == local_min)
+    is_apex &= (local_max_left - v >= min_prominence_kmh)
+    is_apex &= (local_max_right - v >= min_prominence_kmh)
+
+    # Plateaus: keep the first sample of each flat minimum
+    apex_idx = np.flatnonzero(is_apex)
+    apex_idx = apex_idx[np.r_[True, np.diff(apex_idx) > 1]] if len(apex_idx) else apex_idx
+
+    # Corner extent: entry at the speed peak since the previous apex (the
+    # braking point), exit once half of the entry-to-apex drop is regained
+    entry = np.empty(len(apex_idx))
+    exit_ = np.empty(len(apex_idx))
+    bounds = np.r_[0, apex_idx, len(v) - 1]
+    for i, a in enumerate(apex_idx):
+        start = bounds[i] + np.argmax(v[bounds[i]:a + 1])
+        target = v[a] + 0.5 * (v[start] - v[a])
+        after = v[a:bounds[i + 2] + 1]
+        recovered = np.flatnonzero(after >= target)
+        entry[i] = grid[start]
+        exit_[i] = grid[a + (recovered[0] if len(recovered) else np.argmax(after))]
+
+    return pd.DataFrame({
+        "corner": np.arange(1, len(apex_idx) + 1),
+        "entry_distance_m": entry,
+        "apex_distance_m": grid[apex_idx],
+        "exit_distance_m": exit_,
+        "apex_speed": v[apex_idx],
+        "peak_curvature": np.full(len(apex_idx), np.nan),
+        "direction": np.full(len(apex_idx), ""),
+    })
+
+
+# ======================================
+# PERSISTENT CORNER CATALOGUE
+# ======================================
+
+def catalogue_path(track=TRACK_NAME, catalogue_dir=CATALOGUE_DIR):
+    return os.path.join(catalogue_dir, f"{track}_corners.csv")
+
+
+def build_corner_catalogue(reference_lap_path=REFERENCE_LAP_PATH, processed=None):
+    """
+    Detect corners on a reference lap: speed from the processed lap,
+    curvature from the X/Y centreline.
+    """
+    centerline = Centerline.from_csv(reference_lap_path)
+    curvature = track_curvature(centerline)
+
+    if processed is None:
+        processed = load_processed(INPUT_PATH, columns=INPUT_COLUMNS)
+
+    return detect_corners(
+        processed["distance_m"].to_numpy(dtype=np.float64),
+        processed["speed"].to_numpy(dtype=np.float64),
+        curvature_s=centerline.s,
+        curvature=curvature,
+    )
+
+
+def load_corner_catalogue(track=TRACK_NAME, rebuild=False, **build_kwargs):
+    """Read the track's catalogue from disk, building and saving it if missing."""
+    path = catalogue_path(track)
+    if os.path.exists(path) and not rebuild:
+        return pd.read_csv(path)
+
+    catalogue = build_corner_catalogue(**build_kwargs)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    catalogue.round({"apex_speed": 1, "peak_curvature": 5}).to_csv(path, index=False)
+    print(f"Corner catalogue saved to: {path}")
+    return catalogue
+
+
+def corner_at(catalogue, distance_m):
+    """
+    Corner number for each distance (vectorized binary search), 0 on the
+    straights between corners.
+    """
+    distance_m = np.asarray(distance_m, dtype=np.float64)
+    idx = np.searchsorted(catalogue["entry_distance_m"].to_numpy(), distance_m, side="right") - 1
+    idx_c = np.clip(idx, 0, len(catalogue) - 1)
+    inside = (idx >= 0) & (distance_m <= catalogue["exit_distance_m"].to_numpy()[idx_c])
+    return np.where(inside, catalogue["corner"].to_numpy()[idx_c], 0)
+
+
+def exit_corner_at(catalogue, distance_m):
+    """
+    Last corner whose apex is at or before each distance, wrapping to the
+    final corner of the previous lap before the first apex.
+    """
+    distance_m = np.asarray(distance_m, dtype=np.float64)
+    idx = np.searchsorted(catalogue["apex_distance_m"].to_numpy(), distance_m, side="right") - 1
+    return catalogue["corner"].to_numpy()[idx]
+
+
+def assign_corners(intervals, catalogue):
+    """
+    Tag braking-type intervals with the corner their end point falls in
+    (0 when they end on a straight).
+    """
+    intervals = intervals.copy()
+    intervals["corner"] = corner_at(catalogue, intervals["end_distance_m"])
+    return intervals
+
+
+def assign_exit_corners(intervals, catalogue):
+    """Tag acceleration intervals with the corner they start out of."""
+    intervals = intervals.copy()
+    intervals["from_corner"] = exit_corner_at(catalogue, intervals["start_distance_m"])
+    return intervals
+
+
+# ======================================
+# SCRIPT
+# ======================================
+
+def main():
+    df = load_processed(INPUT_PATH, columns=INPUT_COLUMNS)
+    print("Loaded processed telemetry with", len(df), "samples")
+
+    catalogue = load_corner_catalogue(processed=df)
+    print(f"\n===== CORNER CATALOGUE ({TRACK_NAME.upper()}) =====")
+    print(catalogue.to_string(index=False))
+
+    os.makedirs(EVENTS_DIR, exist_ok=True)
+    for name, table in extract_events(df).items():
+        path = os.path.join(EVENTS_DIR, f"{name}_intervals.csv")
+        if table.empty:
+            # e.g. DRS: the Bahrain export reports 0 throughout the lap
+            print(f"\n⚠️ No {name} intervals ({EVENT_FLAGS[name][0]} never set); {path} not written")
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+
+        anchor = EVENT_CORNERS.get(name)
+        if anchor == "end":
+            table = assign_corners(table, catalogue)
+        elif anchor == "exit":
+            table = assign_exit_corners(table, catalogue)
+
+        table.to_csv(path, index=False, float_format=EVENTS_FLOAT_FORMAT)
+        print(f"\n===== {name.upper()} INTERVALS ({len(table)}) =====")
+        print(table.head(10).to_string(index=False))
+        print(f"Saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
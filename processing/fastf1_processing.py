@@ -1,6 +1,14 @@
 import pandas as pd
 import numpy as np
 
+from processing.centerline import Centerline
+from processing.filters import apply_filters, sample_rate
+from processing.columnar import save_processed
+from processing.dtypes import FASTF1_SCHEMA, apply_schema, to_flag
+from processing.profiling import timed
+from processing.schema_registry import read_telemetry, time_seconds
+from processing.telemetry_store import F1_SESSION, TelemetryStore
+
 # ======================================
 # CONFIG
 # ======================================
@@ -8,108 +16,169 @@ import numpy as np
 INPUT_PATH = "data/fastf1/bahrain_2023_verstappen.csv"
 OUTPUT_PATH = "data/fastf1/processed_fastf1_race_engineering.csv"
 
-# ======================================
-# LOAD FASTF1 TELEMETRY
-# ======================================
+# "centerline": project X/Y onto a reference-lap centreline (no drift)
+# "integrated": integrate speed over time (legacy, drifts over a lap)
+DISTANCE_SOURCE = "centerline"
+CENTERLINE_REF_PATH = "data/fastf1/bahrain_2023_verstappen.csv"
 
-df = pd.read_csv(INPUT_PATH)
+# Per-channel noise filters (processing.filters): channel -> (filter, params).
+# long_accel is filtered after differentiation; integer km/h speed steps
+# otherwise show up as acceleration spikes.
+CHANNEL_FILTERS = {
+    "long_accel": ("savgol", {"window": 7, "polyorder": 2}),
+}
+
+# ======================================
+# PROCESSING
+# ======================================
+
+@timed
+def process(df, resolution, centerline=None):
+    """
+    Engineer-ready channels for one continuous FastF1 run: time base,
+    acceleration, filtering, flags and track distance, cast to the compact
+    schema. Distance comes from `centerline` when given (and X/Y are
+    present), otherwise from integrating speed over time.
+    """
 
-print("Loaded FastF1 telemetry with", len(df), "samples")
-print("Columns:", df.columns.tolist())
+    # ======================================
+    # TIME BASE (seconds)
+    # ======================================
 
-# ======================================
-# TIME BASE (seconds)
-# ======================================
+    # FastF1 Time is timedelta text; the registry knows the unit
+    time = time_seconds(df, resolution)
 
-# FastF1 Time column is usually a timedelta string or numeric
-if df["Time"].dtype == object:
-    time = pd.to_timedelta(df["Time"]).dt.total_seconds()
-else:
-    time = df["Time"]
+    # Normalize time to start at 0
+    time = time - time.iloc[0]
 
-# Normalize time to start at 0
-time = time - time.iloc[0]
+    # ======================================
+    # CORE SIGNALS
+    # ======================================
 
-# ======================================
-# CORE SIGNALS
-# ======================================
+    speed = df["speed"]                 # km/h
+    throttle = df["throttle"]           # %
+    brake = df["brake"]                 # True/False or 0/1
+    rpm = df["rpm"]                     # engine RPM
+    gear = df["gear"]                   # gear number
+    drs = df["drs"]                     # DRS state (0/1)
 
-speed = df["Speed"]                 # km/h
-throttle = df["Throttle"]           # %
-brake = df["Brake"]                 # True/False or 0/1
-rpm = df["RPM"]                     # engine RPM
-gear = df["nGear"]                  # gear number
-drs = df["DRS"]                     # DRS state (0/1)
+    # ======================================
+    # DERIVED LONGITUDINAL ACCELERATION
+    # ======================================
 
-# ======================================
-# DERIVED LONGITUDINAL ACCELERATION
-# ======================================
+    speed_ms = speed / 3.6
+    long_accel = np.gradient(speed_ms, time)
 
-speed_ms = speed / 3.6
-long_accel = np.gradient(speed_ms, time)
+    # ======================================
+    # NOISE FILTERING (PER CHANNEL)
+    # ======================================
 
-# ======================================
-# BRAKING ZONE DETECTION
-# ======================================
+    signals = {"speed": speed, "throttle": throttle, "rpm": rpm, "long_accel": long_accel}
+    filtered = apply_filters(signals, CHANNEL_FILTERS, fs=sample_rate(time))
 
-# If Brake is boolean, convert to int
-if brake.dtype == bool:
-    brake_event = brake.astype(int)
-else:
-    brake_event = (brake > 0).astype(int)
+    speed = pd.Series(filtered.get("speed", speed), index=df.index)
+    throttle = pd.Series(filtered.get("throttle", throttle), index=df.index)
+    rpm = pd.Series(filtered.get("rpm", rpm), index=df.index)
+    long_accel = filtered.get("long_accel", long_accel)
 
-# ======================================
-# FULL THROTTLE DETECTION
-# ======================================
+    # ======================================
+    # BRAKING ZONE DETECTION
+    # ======================================
 
-full_throttle = (throttle > 95).astype(int)
+    # Brake arrives as bool, "True"/"False" text or 0/1 depending on export
+    brake_event = to_flag(brake)
 
-# ======================================
-# GEAR SHIFT DETECTION
-# ======================================
+    # ======================================
+    # FULL THROTTLE DETECTION
+    # ======================================
 
-gear_shift = gear.diff().fillna(0)
+    full_throttle = (throttle > 95).astype(int)
 
-# ======================================
-# TRACK DISTANCE (RECONSTRUCTED)
-# ======================================
+    # ======================================
+    # GEAR SHIFT DETECTION
+    # ======================================
 
-# Approximate distance by integrating speed over time
-distance_m = np.cumsum(speed_ms * np.gradient(time))
+    gear_shift = gear.diff().fillna(0)
 
-# Normalize to start at 0
-distance_m = distance_m - distance_m.iloc[0]
+    # ======================================
+    # TRACK DISTANCE
+    # ======================================
 
-# ======================================
-# BUILD ENGINEER-READY OUTPUT
-# ======================================
+    if centerline is not None and {"x", "y"}.issubset(df.columns):
+        # Project X/Y onto the reference centreline, unwrapped from 0
+        distance_m, lateral_m = centerline.lap_distance(df["x"].values, df["y"].values)
+        distance_m = pd.Series(distance_m, index=df.index)
+        lateral_m = pd.Series(lateral_m, index=df.index)
+    else:
+        # Approximate distance by integrating speed over time
+        distance_m = np.cumsum(speed_ms * np.gradient(time))
 
-proc = pd.DataFrame({
-    "time_s": time,
-    "distance_m": distance_m,
-    "speed": speed,
-    "long_accel": long_accel,
-    "throttle": throttle,
-    "full_throttle": full_throttle,
-    "brake": brake_event,
-    "gear": gear,
-    "gear_shift": gear_shift,
-    "rpm": rpm,
-    "drs": drs
-})
+        # Normalize to start at 0
+        distance_m = distance_m - distance_m.iloc[0]
+        lateral_m = pd.Series(np.nan, index=df.index)
 
-# ======================================
-# PREVIEW IN TERMINAL (CLEAN)
-# ======================================
+    # ======================================
+    # BUILD ENGINEER-READY OUTPUT
+    # ======================================
+
+    proc = pd.DataFrame({
+        "time_s": time,
+        "distance_m": distance_m,
+        "lateral_m": lateral_m,
+        "speed": speed,
+        "long_accel": long_accel,
+        "throttle": throttle,
+        "full_throttle": full_throttle,
+        "brake": brake_event,
+        "gear": gear,
+        "gear_shift": gear_shift,
+        "rpm": rpm,
+        "drs": drs
+    })
+
+    # Compact dtypes (int8 flags, uint8 gear, float32 signals)
+    return apply_schema(proc, FASTF1_SCHEMA)
 
-print("\n===== SAMPLE FASTF1 PROCESSED OUTPUT =====")
-print(proc.head(10).to_string(index=False))
 
 # ======================================
-# SAVE OUTPUT
+# MAIN
 # ======================================
 
-proc.to_csv(OUTPUT_PATH, index=False)
+def main():
+    # The schema registry maps FastF1 column names to our channel names
+    df, resolution = read_telemetry(INPUT_PATH)
+
+    print(f"Loaded FastF1 telemetry ({resolution['source']} export) with", len(df), "samples")
+    print("Channels:", df.columns.tolist())
+
+    centerline = None
+    if DISTANCE_SOURCE == "centerline" and {"x", "y"}.issubset(df.columns):
+        centerline = Centerline.from_csv(CENTERLINE_REF_PATH)
+        print(f"Distance from centreline projection (track length {centerline.length_m:.0f} m)")
+
+    proc = process(df, resolution, centerline)
+    for name, (kind, _) in CHANNEL_FILTERS.items():
+        print(f"Filtered {name} with {kind}")
+
+    # ======================================
+    # PREVIEW IN TERMINAL (CLEAN)
+    # ======================================
+
+    print("\n===== SAMPLE FASTF1 PROCESSED OUTPUT =====")
+    print(proc.head(10).to_string(index=False))
+
+    # ======================================
+    # SAVE OUTPUT
+    # ======================================
+
+    columnar_dir = save_processed(proc, OUTPUT_PATH)
+    n_chunks = TelemetryStore().ingest(proc, *F1_SESSION)
+
+    print("\n✅ Processed FastF1 telemetry saved to:")
+    print(OUTPUT_PATH)
+    print(columnar_dir)
+    print(f"Telemetry store: {'/'.join(F1_SESSION)} ({n_chunks} lap chunks)")
+
 
-print("\n✅ Processed FastF1 telemetry saved to:")
-print(OUTPUT_PATH)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
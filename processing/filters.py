@@ -0,0 +1,264 @@
+import numpy as np
+
+from processing.profiling import timed
+
+try:
+    from scipy import signal
+except ImportError:             # pure-NumPy recursions below are used instead
+    signal = None
+
+# ======================================
+# CONFIG
+# ======================================
+
+DEFAULT_WINDOW = 9              # samples, moving average / Savitzky-Golay
+DEFAULT_POLYORDER = 2
+DEFAULT_ALPHA = 0.2             # EMA weight of the newest sample
+BUTTERWORTH_Q = 1 / np.sqrt(2)
+
+
+# ======================================
+# FILTER DESIGN
+# ======================================
+
+def lowpass_biquad(cutoff_hz, fs):
+    """
+    2nd-order Butterworth low-pass as normalized biquad coefficients
+    (b, a) with a[0] == 1 — bilinear transform with prewarping, identical
+    to scipy.signal.butter(2, cutoff_hz, fs=fs).
+    """
+    w0 = 2 * np.pi * cutoff_hz / fs
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2 * BUTTERWORTH_Q)
+
+    a0 = 1 + alpha
+    b = np.array([(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]) / a0
+    a = np.array([1.0, -2 * cos_w0 / a0, (1 - alpha) / a0])
+    return b, a
+
+
+def savgol_coefficients(window, polyorder):
+    """Least-squares smoothing weights for the centre sample of a window."""
+    half = window // 2
+    offsets = np.arange(-half, half + 1)
+    vander = offsets[:, None] ** np.arange(polyorder + 1)
+    return np.linalg.pinv(vander)[0]
+
+
+def sample_rate(time_s):
+    """Nominal sample rate (Hz) from a time column, robust to dropouts."""
+    dt = np.diff(np.asarray(time_s, dtype=np.float64))
+    return 1.0 / np.median(dt[dt > 0])
+
+
+# ======================================
+# ONLINE FILTERS (O(1) PER SAMPLE, LIVE PATH)
+# ======================================
+
+class EMAFilter:
+    """Exponential moving average: y = y_prev + alpha * (x - y_prev)."""
+
+    def __init__(self, alpha=DEFAULT_ALPHA):
+        self.alpha = alpha
+        self.y = None
+
+    def update(self, x):
+        self.y = x if self.y is None else self.y + self.alpha * (x - self.y)
+        return self.y
+
+    def reset(self):
+        self.y = None
+
+
+class BiquadFilter:
+    """
+    Recursive 2nd-order IIR section (transposed direct form II). The state
+    starts at steady state for the first sample, so a constant input
+    passes through without a start-up transient.
+    """
+
+    def __init__(self, b, a):
+        self.b = np.asarray(b, dtype=np.float64)
+        self.a = np.asarray(a, dtype=np.float64)
+        self.z = None
+
+    @classmethod
+    def lowpass(cls, cutoff_hz, fs):
+        return cls(*lowpass_biquad(cutoff_hz, fs))
+
+    def update(self, x):
+        b, a = self.b, self.a
+        if self.z is None:
+            self.z = _biquad_zi(b, a) * x
+
+        y = b[0] * x + self.z[0]
+        self.z[0] = b[1] * x - a[1] * y + self.z[1]
+        self.z[1] = b[2] * x - a[2] * y
+        return y
+
+    def reset(self):
+        self.z = None
+
+
+class MovingAverageFilter:
+    """Trailing moving average over the last `window` samples (running sum)."""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self._ring = np.zeros(window)
+        self._sum = 0.0
+        self._count = 0
+
+    def update(self, x):
+        i = self._count % self.window
+        self._sum += x - self._ring[i]
+        self._ring[i] = x
+        self._count += 1
+        return self._sum / min(self._count, self.window)
+
+    def reset(self):
+        self._ring[:] = 0.0
+        self._sum = 0.0
+        self._count = 0
+
+
+def _biquad_zi(b, a):
+    """Steady-state filter state for a unit step (scipy.signal.lfilter_zi)."""
+    dc_gain = b.sum() / a.sum()
+    z1 = b[2] - a[2] * dc_gain
+    z0 = b[1] - a[1] * dc_gain + z1
+    return np.array([z0, z1])
+
+
+# ======================================
+# BATCH FILTERS (VECTORIZED, WHOLE CHANNEL)
+# ======================================
+
+def moving_average(x, window=DEFAULT_WINDOW, causal=False):
+    """
+    Moving average via a cumulative sum, O(n) regardless of window.
+    Centred by default; causal=True gives the trailing mean and matches
+    MovingAverageFilter sample for sample. Edges average what is available.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    csum = np.concatenate([[0.0], np.cumsum(x)])
+    idx = np.arange(len(x))
+
+    if causal:
+        lo, hi = np.maximum(idx - window + 1, 0), idx + 1
+    else:
+        half = window // 2
+        lo, hi = np.maximum(idx - half, 0), np.minimum(idx + half + 1, len(x))
+
+    return (csum[hi] - csum[lo]) / (hi - lo)
+
+
+def savgol(x, window=DEFAULT_WINDOW, polyorder=DEFAULT_POLYORDER):
+    """
+    Savitzky-Golay smoothing: keeps peak heights (e.g. minimum corner
+    speed) better than a moving average of the same width. Edges are
+    padded by reflection.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    window = min(window | 1, (len(x) - 1) | 1)
+    if window <= polyorder:
+        return x.copy()
+
+    half = window // 2
+    padded = np.pad(x, half, mode="reflect")
+    return np.convolve(padded, savgol_coefficients(window, polyorder)[::-1], mode="valid")
+
+
+def ema(x, alpha=DEFAULT_ALPHA):
+    """Batch EMA, identical to feeding EMAFilter one sample at a time."""
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) == 0:
+        return x.copy()
+    if signal is not None:
+        zi = np.array([(1 - alpha) * x[0]])
+        return signal.lfilter([alpha], [1.0, alpha - 1.0], x, zi=zi)[0]
+    return _run_online(EMAFilter(alpha), x)
+
+
+def biquad(x, b, a):
+    """Causal biquad over a whole channel; matches BiquadFilter exactly."""
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) == 0:
+        return x.copy()
+    if signal is not None:
+        b, a = np.asarray(b, dtype=np.float64), np.asarray(a, dtype=np.float64)
+        return signal.lfilter(b, a, x, zi=_biquad_zi(b, a) * x[0])[0]
+    return _run_online(BiquadFilter(b, a), x)
+
+
+def lowpass(x, cutoff_hz, fs):
+    """
+    Zero-phase Butterworth low-pass: the biquad is run forwards and then
+    backwards, so braking points are not shifted later in distance. Has
+    no online equivalent — the live path uses the causal BiquadFilter.
+    """
+    b, a = lowpass_biquad(cutoff_hz, fs)
+    forward = biquad(x, b, a)
+    return biquad(forward[::-1], b, a)[::-1]
+
+
+def _run_online(filt, x):
+    return np.fromiter((filt.update(v) for v in x), dtype=np.float64, count=len(x))
+
+
+# ======================================
+# PER-CHANNEL SELECTION
+# ======================================
+
+BATCH_FILTERS = {
+    "moving_average": moving_average,
+    "savgol": savgol,
+    "ema": ema,
+    "lowpass": lowpass,
+}
+
+ONLINE_FILTERS = {
+    "moving_average": MovingAverageFilter,
+    "ema": EMAFilter,
+    "lowpass": BiquadFilter.lowpass,
+}
+
+
+@timed
+def apply_filters(channels, spec, fs=None):
+    """
+    Filter selected channels of a DataFrame (or dict of arrays).
+
+    spec: {channel: (filter_name, params)}, e.g.
+        {"speed": ("savgol", {"window": 9}), "rpm": ("ema", {"alpha": 0.3})}
+    "lowpass" takes its sample rate from `fs` unless params give one.
+
+    Returns a dict of filtered arrays; unlisted channels are left out.
+    """
+    out = {}
+    for channel, (name, params) in spec.items():
+        if channel not in channels:
+            continue
+        params = dict(params)
+        if name == "lowpass":
+            params.setdefault("fs", fs)
+        out[channel] = BATCH_FILTERS[name](np.asarray(channels[channel], dtype=np.float64), **params)
+    return out
+
+
+def make_online_filters(spec, fs=None):
+    """
+    Online counterparts for a per-channel spec: {channel: filter object}.
+    Zero-phase "lowpass" and the centred moving average need future
+    samples, so they map to their causal versions (same cutoff / window).
+    """
+    out = {}
+    for channel, (name, params) in spec.items():
+        if name not in ONLINE_FILTERS:
+            raise ValueError(f"No online version of filter '{name}' (channel {channel})")
+        params = dict(params)
+        params.pop("causal", None)
+        if name == "lowpass":
+            params.setdefault("fs", fs)
+        out[channel] = ONLINE_FILTERS[name](**params)
+    return out
@@ -1,6 +1,13 @@
 import pandas as pd
 import numpy as np
 
+from processing.filters import apply_filters, sample_rate
+from processing.streaming_quantile import P2Quantile, running_threshold
+from processing.columnar import save_processed
+from processing.dtypes import SIM_SCHEMA, apply_schema
+from processing.schema_registry import CORNERS, read_telemetry, time_seconds
+from processing.telemetry_store import SIM_SESSION, TelemetryStore
+
 # ======================================
 # CONFIG
 # ======================================
@@ -8,32 +15,56 @@ import numpy as np
 INPUT_PATH = "data/sim_racing/telemetry-rio-5-laps.csv"
 OUTPUT_PATH = "data/sim_racing/processed_rio_race_engineering.csv"
 
+# Per-channel noise filters (processing.filters): channel -> (filter, params).
+# Accelerometer noise is removed zero-phase so braking points do not shift;
+# tire temperature is smoothed before it is differentiated.
+CHANNEL_FILTERS = {
+    "long_accel": ("lowpass", {"cutoff_hz": 5.0}),
+    "tire_temp_avg": ("moving_average", {"window": 25}),
+}
+
+# Power percentile above which the car counts as on full throttle.
+# "streaming": one-pass P² estimate over the race (bounded memory)
+# "running":   causal per-sample estimate, as a live consumer would see it
+# "exact":     power.quantile() over the whole race in memory (legacy)
+FULL_THROTTLE_QUANTILE = 0.85
+THRESHOLD_MODE = "streaming"
+
+# Canonical channels this script reads (processing.schema_registry)
+CHANNELS = [
+    "time", "race_time", "speed", "brake", "rpm", "gear", "power", "torque", "boost",
+    "long_accel", "distance_m", "lap", "race_pos",
+    *(f"{name}_{c}" for name in ("wheel_speed", "tire_slip", "tire_temp") for c in CORNERS),
+]
+
 # ======================================
 # LOAD TELEMETRY
 # ======================================
 
-df = pd.read_csv(INPUT_PATH)
+# Raw sim column names are resolved by the schema registry; only the
+# channels this script uses are parsed
+df, resolution = read_telemetry(INPUT_PATH, CHANNELS)
 
-print("Loaded telemetry with", len(df), "samples")
+print(f"Loaded telemetry ({resolution['source']} export) with", len(df), "samples")
 
 # ======================================
 # TIME BASE (seconds)
 # ======================================
 
-if "timestamp_ms" in df.columns:
-    time = df["timestamp_ms"] / 1000.0
-elif "current_race_time" in df.columns:
-    time = df["current_race_time"]
+if "time" in df.columns:
+    time = time_seconds(df, resolution)
+elif "race_time" in df.columns:
+    time = df["race_time"]
 else:
     time = np.arange(len(df)) * 0.01
 
 # ======================================
-# CORE SIGNALS (LOCKED TO YOUR DATASET)
+# CORE SIGNALS
 # ======================================
 
 speed = df["speed"]
 brake = df["brake"]
-rpm = df["current_engine_rpm"]
+rpm = df["rpm"]
 gear = df["gear"]
 power = df["power"]
 torque = df["torque"]
@@ -43,17 +74,17 @@ boost = df["boost"]
 # TRUE LONGITUDINAL ACCELERATION
 # ======================================
 
-long_accel = df["acceleration_x"]
+long_accel = df["long_accel"]
 
 # ======================================
 # WHEEL SPEED AVERAGE (VEHICLE SPEED ESTIMATE)
 # ======================================
 
 wheel_speed_avg = (
-    df["wheel_rotation_speed_front_left"]
-    + df["wheel_rotation_speed_front_right"]
-    + df["wheel_rotation_speed_rear_left"]
-    + df["wheel_rotation_speed_rear_right"]
+    df["wheel_speed_fl"]
+    + df["wheel_speed_fr"]
+    + df["wheel_speed_rl"]
+    + df["wheel_speed_rr"]
 ) / 4.0
 
 # ======================================
@@ -61,10 +92,10 @@ wheel_speed_avg = (
 # ======================================
 
 slip_avg = (
-    df["tire_slip_rotation_front_left"]
-    + df["tire_slip_rotation_front_right"]
-    + df["tire_slip_rotation_rear_left"]
-    + df["tire_slip_rotation_rear_right"]
+    df["tire_slip_fl"]
+    + df["tire_slip_fr"]
+    + df["tire_slip_rl"]
+    + df["tire_slip_rr"]
 ) / 4.0
 
 traction_loss = (slip_avg > 0.15).astype(int)
@@ -74,12 +105,23 @@ traction_loss = (slip_avg > 0.15).astype(int)
 # ======================================
 
 tire_temp_avg = (
-    df["tire_temp_front_left"]
-    + df["tire_temp_front_right"]
-    + df["tire_temp_rear_left"]
-    + df["tire_temp_rear_right"]
+    df["tire_temp_fl"]
+    + df["tire_temp_fr"]
+    + df["tire_temp_rl"]
+    + df["tire_temp_rr"]
 ) / 4.0
 
+# ======================================
+# NOISE FILTERING (PER CHANNEL)
+# ======================================
+
+signals = {"speed": speed, "long_accel": long_accel, "tire_temp_avg": tire_temp_avg}
+filtered = apply_filters(signals, CHANNEL_FILTERS, fs=sample_rate(time))
+
+speed = pd.Series(filtered.get("speed", speed), index=df.index)
+long_accel = pd.Series(filtered.get("long_accel", long_accel), index=df.index)
+tire_temp_avg = pd.Series(filtered.get("tire_temp_avg", tire_temp_avg), index=df.index)
+
 tire_temp_rate = np.gradient(tire_temp_avg, time)
 
 # ======================================
@@ -92,7 +134,14 @@ brake_event = (brake > 5).astype(int)
 # THROTTLE INTENT PROXY (USING POWER)
 # ======================================
 
-full_throttle_proxy = (power > power.quantile(0.85)).astype(int)
+if THRESHOLD_MODE == "running":
+    power_threshold = running_threshold(power, FULL_THROTTLE_QUANTILE)
+elif THRESHOLD_MODE == "exact":
+    power_threshold = power.quantile(FULL_THROTTLE_QUANTILE)
+else:
+    power_threshold = P2Quantile(FULL_THROTTLE_QUANTILE).update_many(power).value
+
+full_throttle_proxy = (power > power_threshold).astype(int)
 
 # ======================================
 # GEAR SHIFT DETECTION
@@ -104,9 +153,9 @@ gear_shift = df["gear"].diff().fillna(0)
 # POSITION & DISTANCE
 # ======================================
 
-distance = df["distance_traveled"]
-lap = df["lap_number"]
-race_pos = df["race_position"]
+distance = df["distance_m"]
+lap = df["lap"]
+race_pos = df["race_pos"]
 
 # ======================================
 # BUILD ENGINEER-READY OUTPUT
@@ -135,14 +184,20 @@ proc = pd.DataFrame({
     "race_pos": race_pos
 })
 
+# Compact dtypes (int8 flags, uint8 gear, float32 signals)
+proc = apply_schema(proc, SIM_SCHEMA)
+
 # ======================================
 # SAVE OUTPUT
 # ======================================
 
-proc.to_csv(OUTPUT_PATH, index=False)
+columnar_dir = save_processed(proc, OUTPUT_PATH)
+n_chunks = TelemetryStore().ingest(proc, *SIM_SESSION)
 
 print("✅ Full race-engineering telemetry saved to:")
 print(OUTPUT_PATH)
+print(columnar_dir)
+print(f"Telemetry store: {'/'.join(SIM_SESSION)} ({n_chunks} lap chunks)")
 
 """
 WHAT THIS SCRIPT NOW DOES
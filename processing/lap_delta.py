@@ -0,0 +1,50 @@
+import numpy as np
+
+from processing.resampling import ABSOLUTE_RESAMPLER
+
+# ======================================
+# CONFIG
+# ======================================
+
+ELAPSED_COL = "lap_elapsed_s"
+
+
+# ======================================
+# DELTA-TIME MATRIX
+# ======================================
+
+def elapsed_time_laps(laps, time_col="time_s"):
+    """Add time since the start of each lap (processed time_s is session time)."""
+    return {
+        key: lap_df.assign(**{ELAPSED_COL: lap_df[time_col] - lap_df[time_col].iloc[0]})
+        for key, lap_df in laps.items()
+    }
+
+
+def compute_lap_deltas(laps, reference="fastest", resampler=ABSOLUTE_RESAMPLER, time_col="time_s"):
+    """
+    Cumulative time delta of every lap against a reference lap, over distance.
+
+    laps: {key: lap_df} with time_s and distance_m columns.
+    reference: "fastest" or one of the lap keys.
+
+    Returns (grid, delta, keys, ref_key) where delta is a (laps x grid)
+    matrix in seconds: positive = time lost to the reference at that
+    distance, negative = time gained. Rows follow `keys`.
+    """
+    keys = list(laps.keys())
+
+    grid, out = resampler.resample(elapsed_time_laps(laps, time_col), [ELAPSED_COL])
+    elapsed = out[ELAPSED_COL]
+
+    if reference == "fastest":
+        lap_times = np.array([
+            lap_df[time_col].iloc[-1] - lap_df[time_col].iloc[0] for lap_df in laps.values()
+        ])
+        ref_idx = int(np.nanargmin(lap_times))
+    else:
+        ref_idx = keys.index(reference)
+
+    delta = elapsed - elapsed[ref_idx]
+
+    return grid, delta, keys, keys[ref_idx]
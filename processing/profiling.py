@@ -0,0 +1,495 @@
+"""
+Opt-in profiling for processing, strategy and visualization code.
+
+Off unless TELEMETRY_PROFILE is set, in which case it holds a comma list of
+modes:
+
+    sections   named timers (section() / @timed) and counters (count())
+    alloc      + net bytes allocated per section (tracemalloc)
+    sample     + a sampling profiler on the stage's thread
+    cprofile   + a cProfile capture per stage (.pstats)
+
+"1" means "sections". With profiling off, @timed hands back the function
+unchanged and section() returns one shared no-op context, so the hooks can
+stay in hot paths.
+
+Each stage (an orchestrator stage, or a script run through this module)
+writes to TELEMETRY_PROFILE_DIR: a JSON summary, collapsed stacks
+(<stage>.sections.folded / <stage>.sampled.folded, the input format of
+flamegraph.pl and speedscope) and an SVG flame graph:
+
+    TELEMETRY_PROFILE=sections,sample python -m pipeline.orchestrator --force
+    python -m processing.profiling --mode sections,cprofile processing.fastf1_processing
+    python -m processing.profiling --flamegraph reports/profile/fastf1_processing.sampled.folded
+"""
+
+import argparse
+import atexit
+import contextlib
+import cProfile
+import functools
+import importlib
+import io
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+
+# ======================================
+# CONFIG
+# ======================================
+
+ENV_VAR = "TELEMETRY_PROFILE"
+DIR_ENV_VAR = "TELEMETRY_PROFILE_DIR"
+DEFAULT_DIR = "reports/profile"
+MODES = ("sections", "alloc", "sample", "cprofile")
+
+SAMPLE_INTERVAL_S = 0.002
+PSTATS_TOP = 25                 # functions printed from a cProfile capture
+
+FLAME_WIDTH_IN = 14
+FLAME_ROW_IN = 0.22
+FLAME_MIN_FRACTION = 0.002      # frames narrower than this are not drawn
+
+
+def _parse_modes(value):
+    modes = {m.strip().lower() for m in (value or "").split(",") if m.strip()}
+    if modes & {"1", "on", "true", "yes"}:
+        modes = (modes - {"1", "on", "true", "yes"}) | {"sections"}
+    if modes - {"0", "off", "false", "no"}:
+        modes.add("sections")
+    unknown = modes - set(MODES) - {"0", "off", "false", "no"}
+    if unknown:
+        raise ValueError(f"{ENV_VAR}: unknown mode(s) {sorted(unknown)}, expected {MODES}")
+    return modes & set(MODES)
+
+
+_modes = _parse_modes(os.environ.get(ENV_VAR))
+ENABLED = bool(_modes)
+if "alloc" in _modes:
+    tracemalloc.start()
+
+
+def configure(modes):
+    """Switch modes at runtime (before the instrumented modules import)."""
+    global _modes, ENABLED
+    _modes = _parse_modes(modes) if isinstance(modes, str) else set(modes)
+    ENABLED = bool(_modes)
+    if "alloc" in _modes and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def output_dir():
+    return os.environ.get(DIR_ENV_VAR, DEFAULT_DIR)
+
+
+# ======================================
+# SECTIONS + COUNTERS
+# ======================================
+
+# (section path) -> [calls, total ns, net bytes allocated]
+_sections = {}
+_counters = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSection()
+
+
+class _Section:
+    __slots__ = ("name", "path", "t0", "mem0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.path = tuple(stack)
+        self.mem0 = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.t0
+        allocated = tracemalloc.get_traced_memory()[0] - self.mem0 if tracemalloc.is_tracing() else 0
+        _local.stack.pop()
+        with _lock:
+            entry = _sections.get(self.path)
+            if entry is None:
+                entry = _sections[self.path] = [0, 0, 0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += allocated
+        return False
+
+
+def section(name):
+    """Time a block: `with section("centerline.project"): ...`"""
+    if not ENABLED:
+        return _NULL
+    return _Section(name)
+
+
+def timed(name=None):
+    """
+    Decorator form of section(); the label defaults to module.function.
+    Decided at import time, so a disabled run calls the original function.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        # File stem rather than __module__, which is "__main__" for scripts
+        module = os.path.splitext(os.path.basename(fn.__code__.co_filename))[0]
+        label = name or f"{module}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Section(label):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    if callable(name):          # bare @timed
+        fn, name = name, None
+        return decorate(fn)
+    return decorate
+
+
+def count(name, n=1):
+    """Add n to a named counter (rows processed, frames drawn, ...)."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def reset():
+    with _lock:
+        _sections.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """Sections (with self time) and counters as JSON-ready dicts."""
+    with _lock:
+        sections = {path: list(v) for path, v in _sections.items()}
+        counters = dict(_counters)
+
+    child_ns = {}
+    for path, (_, total, _) in sections.items():
+        if len(path) > 1:
+            child_ns[path[:-1]] = child_ns.get(path[:-1], 0) + total
+
+    rows = []
+    for path, (calls, total, allocated) in sorted(sections.items()):
+        rows.append({
+            "section": ";".join(path),
+            "depth": len(path) - 1,
+            "calls": calls,
+            "total_ms": total / 1e6,
+            "self_ms": (total - child_ns.get(path, 0)) / 1e6,
+            "mean_us": total / calls / 1e3,
+            "alloc_mb": allocated / 1e6,
+        })
+    return {"sections": rows, "counters": counters}
+
+
+def format_snapshot(snap):
+    lines = [f"{'section':<48} {'calls':>8} {'total ms':>10} {'self ms':>10} {'mean µs':>10} {'alloc MB':>9}"]
+    for r in snap["sections"]:
+        label = "  " * r["depth"] + r["section"].rsplit(";", 1)[-1]
+        lines.append(
+            f"{label[:48]:<48} {r['calls']:>8} {r['total_ms']:>10.2f} {r['self_ms']:>10.2f} "
+            f"{r['mean_us']:>10.1f} {r['alloc_mb']:>9.2f}"
+        )
+    for name, value in sorted(snap["counters"].items()):
+        lines.append(f"{'# ' + name:<48} {value:>8,}")
+    return "\n".join(lines)
+
+
+# ======================================
+# SAMPLING PROFILER
+# ======================================
+
+_SKIP_MODULES = ("profiling", "contextlib")
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a
+    background thread and counts collapsed stacks ("mod:fn;mod:fn").
+    """
+
+    def __init__(self, root="stage", thread_id=None, interval=SAMPLE_INTERVAL_S):
+        self.root = root
+        self.base = []
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _names(frame):
+        """Root-first frame names, leaving out this module and contextlib."""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            filename = code.co_filename
+            module = filename.strip("<>") if filename.startswith("<") else os.path.splitext(os.path.basename(filename))[0]
+            if module not in _SKIP_MODULES:
+                names.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+        return names[::-1]
+
+    def _run(self):
+        base = len(self.base)
+        while not self._stop.wait(self.interval):
+            names = self._names(sys._current_frames().get(self.thread_id))
+            # Drop the frames that were already on the stack at start()
+            if names[:base] == self.base:
+                names = names[base:]
+            if names:
+                key = ";".join([self.root] + names)
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def start(self):
+        self.base = self._names(sys._getframe())
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profile-sampler")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+
+# ======================================
+# STAGE CAPTURE + OUTPUT
+# ======================================
+
+def _section_stacks(stage):
+    """Self time per section path in µs, as collapsed stacks under `stage`."""
+    with _lock:
+        sections = {path: v[1] for path, v in _sections.items()}
+    child = {}
+    for path, total in sections.items():
+        if len(path) > 1:
+            child[path[:-1]] = child.get(path[:-1], 0) + total
+    return {
+        ";".join((stage,) + path): int((total - child.get(path, 0)) / 1e3)
+        for path, total in sections.items()
+        if total - child.get(path, 0) > 0
+    }
+
+
+def write_folded(stacks, path):
+    with open(path, "w") as f:
+        for stack, value in sorted(stacks.items()):
+            f.write(f"{stack} {value}\n")
+    return path
+
+
+def read_folded(path):
+    stacks = {}
+    with open(path) as f:
+        for line in f:
+            stack, _, value = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[stack] = stacks.get(stack, 0) + int(value)
+    return stacks
+
+
+@contextlib.contextmanager
+def stage(name, out_dir=None):
+    """
+    Profile one pipeline stage. Sections and counters are reset on entry;
+    on exit the summary, collapsed stacks, flame graphs and (with cprofile)
+    a .pstats file are written to out_dir. A no-op when profiling is off.
+    """
+    if not ENABLED:
+        yield
+        return
+
+    out_dir = out_dir or output_dir()
+    reset()
+    if "alloc" in _modes and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    sampler = StackSampler(name).start() if "sample" in _modes else None
+    profiler = cProfile.Profile() if "cprofile" in _modes else None
+
+    t0 = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with _Section(name):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - t0
+        sampled = sampler.stop() if sampler is not None else None
+        _write_stage(name, out_dir, wall, sampled, profiler)
+
+
+def _write_stage(name, out_dir, wall, sampled, profiler):
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, name)
+    snap = snapshot()
+    summary = {"stage": name, "wall_s": wall, "modes": sorted(_modes), "pid": os.getpid(), **snap}
+    if tracemalloc.is_tracing():
+        summary["peak_alloc_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+
+    files = [base + ".json"]
+    files.append(write_folded(_section_stacks(name), base + ".sections.folded"))
+    files.append(render_flamegraph(files[-1], base + ".sections.svg", f"{name}: timed sections (µs)"))
+    if sampled:
+        files.append(write_folded(sampled, base + ".sampled.folded"))
+        files.append(render_flamegraph(files[-1], base + ".sampled.svg",
+                                       f"{name}: sampled stacks ({SAMPLE_INTERVAL_S * 1e3:g} ms)"))
+    if profiler is not None:
+        profiler.dump_stats(base + ".pstats")
+        files.append(base + ".pstats")
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PSTATS_TOP)
+        summary["cprofile_top"] = out.getvalue()
+
+    summary["files"] = files
+    with open(base + ".json", "w") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n===== PROFILE: {name} ({wall:.2f} s) =====")
+    print(format_snapshot(snap))
+    print(f"Profile written to {out_dir}/{name}.*")
+    reset()
+
+
+# ======================================
+# FLAME GRAPH
+# ======================================
+
+def render_flamegraph(folded_path, svg_path=None, title=None):
+    """Static icicle-style flame graph (SVG) from a collapsed-stack file."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    stacks = read_folded(folded_path)
+    svg_path = svg_path or os.path.splitext(folded_path)[0] + ".svg"
+    total = sum(stacks.values())
+    if total == 0:
+        return None
+
+    # Merge stacks into a tree: node = (frames prefix) -> value
+    widths = {}
+    for stack, value in stacks.items():
+        frames = stack.split(";")
+        for depth in range(1, len(frames) + 1):
+            key = tuple(frames[:depth])
+            widths[key] = widths.get(key, 0) + value
+
+    # Lay children out left to right inside their parent, widest first
+    x0 = {}
+    children = {}
+    for key in widths:
+        children.setdefault(key[:-1], []).append(key)
+    queue, x0[()] = [()], 0
+    while queue:
+        parent = queue.pop()
+        cursor = x0[parent]
+        for key in sorted(children.get(parent, []), key=lambda k: -widths[k]):
+            x0[key] = cursor
+            cursor += widths[key]
+            queue.append(key)
+
+    depth = max(len(k) for k in widths)
+    fig, ax = plt.subplots(figsize=(FLAME_WIDTH_IN, max(2.0, FLAME_ROW_IN * (depth + 2))))
+    cmap = plt.get_cmap("autumn")
+    for key, width in widths.items():
+        frac = width / total
+        if frac < FLAME_MIN_FRACTION:
+            continue
+        left = x0[key] / total
+        ax.barh(len(key) - 1, frac, left=left, height=0.95,
+                color=cmap((zlib.crc32(key[-1].encode()) % 100) / 100.0), edgecolor="white", linewidth=0.3)
+        label = f"{key[-1]} ({frac:.1%})"
+        if frac > 0.03:
+            ax.text(left + 0.002, len(key) - 1, label[: int(frac * 160)], va="center", fontsize=7, clip_on=True)
+
+    ax.set_xlim(0, 1)
+    ax.set_ylim(-0.5, depth - 0.5)
+    ax.set_yticks([])
+    ax.set_xlabel("fraction of samples / time")
+    ax.set_title(title or os.path.basename(folded_path))
+    fig.tight_layout()
+    fig.savefig(svg_path)
+    plt.close(fig)
+    return svg_path
+
+
+# ======================================
+# SCRIPTS RUN OUTSIDE A STAGE
+# ======================================
+
+def _write_unstaged():
+    # Sections recorded by a script that never entered a stage()
+    if ENABLED and (_sections or _counters):
+        script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        _write_stage(script, output_dir(), time.perf_counter() - _started, None, None)
+
+
+_started = time.perf_counter()
+atexit.register(_write_unstaged)
+
+
+# ======================================
+# MAIN
+# ======================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a module as one stage, or draw a flame graph")
+    parser.add_argument("--mode", default=os.environ.get(ENV_VAR) or "sections,sample",
+                        help=f"comma list of {', '.join(MODES)}")
+    parser.add_argument("--out", default=None, help=f"output directory (default {DEFAULT_DIR})")
+    parser.add_argument("--flamegraph", metavar="FOLDED", help="render an SVG from a .folded file and exit")
+    parser.add_argument("module", nargs="?", help="module to run as __main__, e.g. processing.fastf1_processing")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.flamegraph:
+        print(f"✅ Flame graph: {render_flamegraph(args.flamegraph)}")
+        return
+    if not args.module:
+        parser.error("a module (or --flamegraph) is required")
+
+    # Instrumented modules import processing.profiling, not this __main__
+    profiling = importlib.import_module("processing.profiling")
+    profiling.configure(args.mode)
+
+    sys.argv = [args.module.replace(".", os.sep) + ".py"] + args.args
+    with profiling.stage(args.module.rsplit(".", 1)[-1], args.out):
+        runpy.run_module(args.module, run_name="__main__", alter_sys=False)
+
+
+if __name__ == "__main__":
+    main()
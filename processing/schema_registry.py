@@ -0,0 +1,197 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from processing.profiling import count, timed
+
+# ======================================
+# CONFIG
+# ======================================
+
+CORNERS = ("fl", "fr", "rl", "rr")
+_SIM_CORNERS = ("front_left", "front_right", "rear_left", "rear_right")
+
+# Known telemetry sources.
+#   signature: raw columns that must all be present to recognise the source
+#   channels:  canonical channel -> (raw column, read dtype or None to infer)
+#              (sim exports may write integers as "3.0", so they read as float;
+#              FastF1 channels that get differentiated read as float64, the
+#              processed output is compacted by processing.dtypes afterwards)
+#   time:      (canonical channel, unit) used for the time base
+SOURCES = {
+    "fastf1": {
+        "signature": ["Time", "Speed", "Throttle", "Brake", "RPM", "nGear"],
+        "channels": {
+            "time": ("Time", "str"),                # timedelta text
+            "speed": ("Speed", "float64"),
+            "throttle": ("Throttle", "float64"),
+            "brake": ("Brake", None),               # bool, "True"/"False" or 0/1
+            "rpm": ("RPM", "float64"),
+            "gear": ("nGear", "int16"),
+            "drs": ("DRS", "int16"),
+            "x": ("X", "float64"),
+            "y": ("Y", "float64"),
+        },
+        "time": ("time", "timedelta"),
+    },
+    "rio_sim": {
+        "signature": ["current_engine_rpm", "distance_traveled", "lap_number", "acceleration_x"],
+        "channels": {
+            "time": ("timestamp_ms", "float64"),
+            "race_time": ("current_race_time", "float64"),
+            "speed": ("speed", "float32"),
+            "brake": ("brake", "float32"),
+            "rpm": ("current_engine_rpm", "float32"),
+            "gear": ("gear", "float32"),
+            "power": ("power", "float32"),
+            "torque": ("torque", "float32"),
+            "boost": ("boost", "float32"),
+            "long_accel": ("acceleration_x", "float32"),
+            "distance_m": ("distance_traveled", "float64"),
+            "lap": ("lap_number", "float32"),
+            "race_pos": ("race_position", "float32"),
+            **{f"wheel_speed_{c}": (f"wheel_rotation_speed_{s}", "float32") for c, s in zip(CORNERS, _SIM_CORNERS)},
+            **{f"tire_slip_{c}": (f"tire_slip_rotation_{s}", "float32") for c, s in zip(CORNERS, _SIM_CORNERS)},
+            **{f"tire_temp_{c}": (f"tire_temp_{s}", "float32") for c, s in zip(CORNERS, _SIM_CORNERS)},
+        },
+        "time": ("time", "ms"),
+    },
+    # Frames from telemetry.telemetry_ingestion / the live stream, as logged
+    "udp_frame": {
+        "signature": ["t_s", "speed_kmh", "rpm", "throttle_pct", "brake_pct"],
+        "channels": {
+            "time": ("t_s", "float64"),
+            "speed": ("speed_kmh", "float32"),
+            "rpm": ("rpm", "float32"),
+            "throttle": ("throttle_pct", "float32"),
+            "brake": ("brake_pct", "float32"),
+            **{f"tire_temp_{c}": (f"tire_temp_{c}", "float32") for c in CORNERS},
+        },
+        "time": ("time", "s"),
+    },
+}
+
+# Unknown exports: first alias found wins (the old basic_processing map)
+GENERIC_ALIASES = {
+    "time": ["Time", "time", "timestamp", "t_s"],
+    "speed": ["Speed", "speed", "Velocity", "velocity", "speed_kmh"],
+    "throttle": ["Throttle", "throttle", "ThrottlePos", "throttle_pct"],
+    "brake": ["Brake", "brake", "BrakePressure", "brake_pct"],
+    "rpm": ["RPM", "rpm", "EngineRPM", "current_engine_rpm"],
+    "gear": ["Gear", "gear", "nGear"],
+}
+
+
+# ======================================
+# RESOLUTION (CACHED BY HEADER FINGERPRINT)
+# ======================================
+
+_CACHE = {}
+
+
+def header_fingerprint(columns):
+    """Stable key for a header: column names in order."""
+    return hashlib.sha1("\x1f".join(map(str, columns)).encode()).hexdigest()
+
+
+def detect_source(columns):
+    """Name of the first known source whose signature the header contains."""
+    present = set(columns)
+    for name, spec in SOURCES.items():
+        if present.issuperset(spec["signature"]):
+            return name
+    return "generic"
+
+
+def _resolve(columns):
+    present = set(columns)
+    source = detect_source(columns)
+
+    if source == "generic":
+        mapping, dtypes = {}, {}
+        for channel, aliases in GENERIC_ALIASES.items():
+            raw = next((a for a in aliases if a in present), None)
+            if raw is not None:
+                mapping[channel] = raw
+        missing = [c for c in GENERIC_ALIASES if c not in mapping]
+        time = ("time", "auto")
+    else:
+        spec = SOURCES[source]
+        mapping = {c: raw for c, (raw, _) in spec["channels"].items() if raw in present}
+        dtypes = {raw: dt for raw, dt in spec["channels"].values() if raw in present and dt}
+        missing = [c for c in spec["channels"] if c not in mapping]
+        time = spec["time"]
+
+    return {
+        "source": source,
+        "mapping": mapping,
+        "dtypes": dtypes,
+        "missing": missing,
+        "time": time,
+    }
+
+
+def resolve(columns):
+    """
+    Map a raw header to canonical channels. The result is cached by
+    header fingerprint, so every file from the same exporter resolves once.
+
+    Returns a dict: source, mapping {channel: raw column}, dtypes
+    {raw column: dtype}, missing channels and the time (channel, unit).
+    """
+    columns = list(columns)
+    key = header_fingerprint(columns)
+    if key not in _CACHE:
+        _CACHE[key] = _resolve(columns)
+    return _CACHE[key]
+
+
+def projection(resolution, channels=None):
+    """usecols / dtype / rename arguments for reading only `channels`."""
+    mapping = resolution["mapping"]
+    if channels is not None:
+        mapping = {c: mapping[c] for c in channels if c in mapping}
+
+    usecols = list(dict.fromkeys(mapping.values()))
+    dtype = {raw: resolution["dtypes"][raw] for raw in usecols if raw in resolution["dtypes"]}
+    rename = {raw: channel for channel, raw in mapping.items()}
+    return usecols, dtype, rename
+
+
+# ======================================
+# READERS
+# ======================================
+
+def read_header(path):
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+@timed
+def read_telemetry(path, channels=None):
+    """
+    Read a raw telemetry CSV with canonical channel names, parsing only the
+    requested channels (default: every channel the source provides) with
+    explicit dtypes.
+
+    Returns (df, resolution).
+    """
+    resolution = resolve(read_header(path))
+    usecols, dtype, rename = projection(resolution, channels)
+    df = pd.read_csv(path, usecols=usecols, dtype=dtype).rename(columns=rename)
+    count("rows_read", len(df))
+    return df, resolution
+
+
+def time_seconds(df, resolution, default_hz=100.0):
+    """Time base in seconds from the source's time channel and unit."""
+    channel, unit = resolution["time"]
+    if channel not in df.columns:
+        return pd.Series(np.arange(len(df)) / default_hz, index=df.index)
+
+    values = df[channel]
+    if unit == "ms":
+        return values / 1000.0
+    if unit == "timedelta" or (unit == "auto" and not pd.api.types.is_numeric_dtype(values)):
+        return pd.to_timedelta(values).dt.total_seconds()
+    return values.astype(np.float64)
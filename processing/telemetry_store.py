@@ -0,0 +1,221 @@
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from processing.columnar import ColumnarTable, load_processed, write_columnar
+from processing.profiling import count, timed
+
+# ======================================
+# CONFIG
+# ======================================
+
+STORE_ROOT = "data/store"
+CATALOG_FILE = "catalog.sqlite"
+
+# Lap-relative time, written into every chunk and used for lap_time queries
+LAP_TIME_COL = "lap_time_s"
+
+# Sessions of the processed files already in the repo
+F1_SESSION = ("2023", "Bahrain", "R", "VER")
+SIM_SESSION = ("sim", "Rio", "Race", "SIM")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    season   TEXT NOT NULL,
+    event    TEXT NOT NULL,
+    session  TEXT NOT NULL,
+    driver   TEXT NOT NULL,
+    lap      INTEGER NOT NULL,
+    n_rows   INTEGER NOT NULL,
+    t_start  REAL NOT NULL,     -- session time of first / last sample
+    t_end    REAL NOT NULL,
+    lap_time REAL NOT NULL,     -- lap-relative time of the last sample
+    path     TEXT NOT NULL,
+    PRIMARY KEY (season, event, session, driver, lap)
+);
+CREATE INDEX IF NOT EXISTS chunks_time ON chunks (season, event, session, t_start, t_end);
+"""
+
+
+# ======================================
+# STORE
+# ======================================
+
+class TelemetryStore:
+    """
+    Embedded local telemetry store: one columnar chunk per
+    (season, event, session, driver, lap), sorted by time, plus a SQLite
+    catalog of chunk keys and time bounds.
+
+    A query first prunes chunks in SQL (key, lap range, time bounds), then
+    binary-searches each surviving chunk's memory-mapped time column, so
+    only the requested rows of the requested channels are read.
+    """
+
+    def __init__(self, root=STORE_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, CATALOG_FILE))
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # ----------------------------------
+    # WRITE
+    # ----------------------------------
+
+    @timed
+    def ingest(self, df, season, event, session, driver, lap_col="lap", time_col="time_s"):
+        """Split a processed table into per-lap chunks and (re)register them."""
+        key = tuple(str(k) for k in (season, event, session, driver))
+        self.drop(*key)
+        if lap_col not in df.columns:
+            df = df.assign(**{lap_col: 0})
+
+        rows = []
+        for lap, lap_df in df.groupby(lap_col, sort=True):
+            lap_df = lap_df.sort_values(time_col, kind="stable").reset_index(drop=True)
+            t = lap_df[time_col].to_numpy(dtype=np.float64)
+            lap_df[LAP_TIME_COL] = (t - t[0]).astype(np.float32)
+
+            path = os.path.join(self.root, *key, f"lap_{int(lap):03d}.columns")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_columnar(lap_df, path)
+
+            rows.append((*key, int(lap), len(lap_df), t[0], t[-1], t[-1] - t[0], path))
+
+        with self.db:
+            self.db.executemany("INSERT INTO chunks VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+
+        count("rows_ingested", len(df))
+        return len(rows)
+
+    def drop(self, season, event, session, driver=None):
+        """Remove a session (or one driver of it) from the store."""
+        for path in self.laps(season, event, session, driver)["path"]:
+            shutil.rmtree(path, ignore_errors=True)
+        sql, args = _where(season, event, session, driver)
+        with self.db:
+            self.db.execute("DELETE FROM chunks" + sql, args)
+
+    # ----------------------------------
+    # CATALOG
+    # ----------------------------------
+
+    def sessions(self):
+        return pd.read_sql_query(
+            "SELECT season, event, session, driver, COUNT(*) AS laps, SUM(n_rows) AS samples "
+            "FROM chunks GROUP BY season, event, session, driver",
+            self.db,
+        )
+
+    def has(self, season, event, session, driver=None):
+        sql, args = _where(season, event, session, driver)
+        return self.db.execute("SELECT 1 FROM chunks" + sql + " LIMIT 1", args).fetchone() is not None
+
+    def laps(self, season, event, session, driver=None, laps=None, time=None, lap_time=None):
+        """Catalog rows of the chunks a query would touch."""
+        sql, args = _where(season, event, session, driver, laps, time, lap_time)
+        return pd.read_sql_query(
+            "SELECT * FROM chunks" + sql + " ORDER BY driver, lap", self.db, params=args
+        )
+
+    # ----------------------------------
+    # READ
+    # ----------------------------------
+
+    @timed
+    def query(self, season, event, session, driver=None, laps=None, channels=None,
+              time=None, lap_time=None, time_col="time_s"):
+        """
+        Rows for the given key, e.g. VER laps 10-20, speed + brake, 40-55 s
+        into each lap:
+
+            store.query("2023", "Bahrain", "R", "VER", laps=(10, 20),
+                        channels=["speed", "brake"], lap_time=(40, 55))
+
+        laps: (first, last) inclusive or a list of laps.
+        time / lap_time: (start, end) in session / lap-relative seconds.
+        Returns a DataFrame with driver and lap columns plus the channels.
+        """
+        parts = []
+        for chunk in self.laps(season, event, session, driver, laps, time, lap_time).itertuples():
+            table = ColumnarTable(chunk.path)
+
+            lo, hi = 0, chunk.n_rows
+            for col, bounds in ((time_col, time), (LAP_TIME_COL, lap_time)):
+                if bounds is not None:
+                    t = table[col]
+                    lo = max(lo, int(np.searchsorted(t, bounds[0], side="left")))
+                    hi = min(hi, int(np.searchsorted(t, bounds[1], side="right")))
+            if hi <= lo:
+                continue
+
+            cols = table.columns if channels is None else [c for c in channels if c in table]
+            part = pd.DataFrame({
+                c: table.decode(c, np.asarray(table[c][lo:hi])) for c in cols if c not in ("driver", "lap")
+            })
+            part.insert(0, "lap", np.int16(chunk.lap))
+            part.insert(0, "driver", chunk.driver)
+            parts.append(part)
+            count("rows_queried", len(part))
+
+        if not parts:
+            if channels is None:
+                # Keep the session's columns so callers can still index them
+                any_chunk = self.laps(season, event, session, driver)["path"]
+                channels = ColumnarTable(any_chunk.iloc[0]).columns if len(any_chunk) else []
+            channels = [c for c in channels if c not in ("driver", "lap")]
+            return pd.DataFrame(columns=["driver", "lap"] + channels)
+        return pd.concat(parts, ignore_index=True)
+
+
+def _where(season, event, session, driver=None, laps=None, time=None, lap_time=None):
+    clauses = ["season=?", "event=?", "session=?"]
+    args = [str(season), str(event), str(session)]
+
+    if driver is not None:
+        drivers = [driver] if isinstance(driver, str) else list(driver)
+        clauses.append(f"driver IN ({','.join('?' * len(drivers))})")
+        args += drivers
+    if laps is not None:
+        if isinstance(laps, tuple):
+            clauses.append("lap BETWEEN ? AND ?")
+            args += [int(laps[0]), int(laps[1])]
+        else:
+            laps = [int(lap) for lap in laps]
+            clauses.append(f"lap IN ({','.join('?' * len(laps))})")
+            args += laps
+    if time is not None:
+        clauses.append("t_end >= ? AND t_start <= ?")
+        args += [float(time[0]), float(time[1])]
+    if lap_time is not None:
+        clauses.append("lap_time >= ?")
+        args.append(float(lap_time[0]))
+
+    return " WHERE " + " AND ".join(clauses), args
+
+
+# ======================================
+# SHARED READ API
+# ======================================
+
+def ensure_session(key, csv_path, store=None):
+    """Import a session from its processed file if the store lacks it."""
+    store = store or TelemetryStore()
+    if not store.has(*key) and csv_path is not None:
+        store.ingest(load_processed(csv_path), *key)
+    return store
+
+
+def load_session(key, csv_path=None, channels=None, laps=None, store=None):
+    """
+    Read a session through the store, importing it from its processed
+    file on first use. `key` is (season, event, session, driver).
+    """
+    store = ensure_session(key, csv_path, store)
+    return store.query(*key, laps=laps, channels=channels)
@@ -1,17 +1,40 @@
 import pandas as pd
 import numpy as np
 
+import os
+
+from processing.profiling import count, timed
+from processing.telemetry_store import SIM_SESSION, load_session
+from strategy.fastf1_cache import session_dir_for
+from strategy.race_timeline import load_timeline
+from strategy.weather_model import lap_multipliers
+
 # ======================================
 # CONFIG
 # ======================================
 
 INPUT_PATH = "data/sim_racing/processed_rio_race_engineering.csv"
 
+# Only these channels are read from the telemetry store
+INPUT_COLUMNS = [
+    "time_s", "lap", "speed", "tire_temp_avg",
+    "brake_event", "tire_slip_avg", "traction_loss",
+]
+
 TARGET_RACE_LAPS = 20           # hypothetical race length
 PIT_LOSS_SECONDS = 20.0         # fixed pit loss
 
 WARMUP_LAPS = 1                 # laps dominated by warm-up / driver adaptation
 
+# Track status and weather of the analysed session: laps run under
+# SC/VSC/yellow are left out of the degradation fit, stops under caution
+# get the reduced pit loss and tire wear follows the track temperature.
+# None looks up the FastF1 cache of SIM_SESSION; sim sessions have none,
+# so they race fully green at reference conditions. Pointing this at a
+# real race's cache replays that race onto the sim laps.
+RACE_TIMELINE_DIR = None
+RACE_LAP_OFFSET = 1             # sim lap 0 is race lap 1
+
 COMPOUNDS = {
     "Soft": {
         "deg_mult": 1.3,        # degrades faster
@@ -31,7 +54,7 @@ COMPOUNDS = {
 # LOAD DATA
 # ======================================
 
-df = pd.read_csv(INPUT_PATH)
+df = load_session(SIM_SESSION, INPUT_PATH, channels=INPUT_COLUMNS)
 print(f"Loaded processed sim telemetry: {len(df)} samples")
 
 if "lap" not in df.columns:
@@ -40,6 +63,46 @@ if "lap" not in df.columns:
 laps = sorted(df["lap"].unique())
 print(f"Found laps in data: {laps}")
 
+# ======================================
+# RACE TIMELINE (TRACK STATUS)
+# ======================================
+
+timeline_dir = RACE_TIMELINE_DIR or session_dir_for(SIM_SESSION)
+timeline = None
+if timeline_dir and os.path.isdir(timeline_dir):
+    timeline = load_timeline(timeline_dir)
+    if RACE_TIMELINE_DIR:
+        print(f"Race timeline replayed from {RACE_TIMELINE_DIR} (not the sim session's own)")
+    print(f"Race timeline: neutralized race laps {timeline.laps_under()}")
+else:
+    print("Race timeline: none for this session, all laps green")
+
+
+def pit_loss_at(lap, green_loss=PIT_LOSS_SECONDS):
+    """Pit loss for a stop on sim lap `lap` (reduced under SC/VSC)."""
+    if timeline is None:
+        return green_loss
+    return timeline.pit_loss(lap + RACE_LAP_OFFSET, green_loss)
+
+# ======================================
+# WEATHER (PER-LAP DEGRADATION MULTIPLIER)
+# ======================================
+
+# weather_deg[lap] scales the tire wear of sim lap `lap`; precomputed once so
+# the strategy loops below only index arrays
+sim_laps = np.arange(max(TARGET_RACE_LAPS, int(max(laps)) + 1) + 1)
+# Same session gate as the timeline: no cached weather means 1.0 every lap
+weather_laps = timeline.laps if timeline is not None else None
+weather_deg = lap_multipliers(sim_laps + RACE_LAP_OFFSET, weather_laps, timeline_dir)
+print(f"Weather degradation multiplier: {weather_deg.min():.3f}-{weather_deg.max():.3f}")
+wear_cum = np.concatenate([[0.0], np.cumsum(weather_deg)])
+
+
+def stint_wear(start_lap, age):
+    """Weather-weighted tire age after `age` laps of a stint from `start_lap`."""
+    return wear_cum[start_lap + age] - wear_cum[start_lap]
+
+
 # ======================================
 # PER-LAP METRICS (STINT ANALYSIS)
 # ======================================
@@ -81,6 +144,11 @@ for lap_id in laps:
     })
 
 lap_stats_df = pd.DataFrame(lap_stats).sort_values("lap").reset_index(drop=True)
+count("laps_aggregated", len(lap_stats_df))
+
+# Laps run under SC/VSC/yellow say nothing about tire degradation
+neutralized_laps = [] if timeline is None else timeline.laps_under()
+lap_stats_df["neutralized"] = (lap_stats_df["lap"] + RACE_LAP_OFFSET).isin(neutralized_laps)
 
 print("\n===== PER-LAP METRICS (SIM) =====")
 print(lap_stats_df.to_string(index=False))
@@ -92,7 +160,7 @@ print(lap_stats_df.to_string(index=False))
 if len(lap_stats_df) >= 3:
     # Treat first WARMUP_LAPS as dominated by warm-up / driver adaptation
     warmup_mask = lap_stats_df["lap"] < (lap_stats_df["lap"].min() + WARMUP_LAPS)
-    deg_mask = ~warmup_mask
+    deg_mask = ~warmup_mask & ~lap_stats_df["neutralized"]
 
     if deg_mask.sum() >= 2:
         x = lap_stats_df.loc[deg_mask, "lap"].values
@@ -117,6 +185,12 @@ if raw_slope < 0:
 else:
     base_deg = raw_slope
 
+# The fitted slope includes the weather of the observed laps; express it at
+# reference conditions so stint_wear() can re-apply each lap's weather
+green_laps = lap_stats_df.loc[~lap_stats_df["neutralized"], "lap"].astype(int).to_numpy()
+observed_weather = weather_deg[green_laps].mean() if len(green_laps) else 1.0
+base_deg /= observed_weather
+
 # Stress-driven scaling: higher average tire stress → faster degradation
 mean_stress = lap_stats_df["tire_stress"].mean()
 max_stress = lap_stats_df["tire_stress"].max()
@@ -131,11 +205,16 @@ effective_base_deg = base_deg * (0.5 + stress_norm)  # scale between ~0.5x and ~
 print("\n===== DEGREDATION MODEL (ADVANCED) =====")
 print(f"Raw slope from degradation laps: {raw_slope:.4f} s/lap")
 print(f"Mean tire stress: {mean_stress:.4f} (normalized factor: {stress_norm:.3f})")
-print(f"Effective base degradation per lap: {effective_base_deg:.4f} s/lap")
+print(f"Observed weather multiplier: {observed_weather:.3f}")
+print(f"Effective base degradation per lap: {effective_base_deg:.4f} s/lap (reference conditions)")
 print(f"Warm-up laps treated separately: first {WARMUP_LAPS} lap(s)")
+print(f"Neutralized laps excluded from the fit: {lap_stats_df.loc[lap_stats_df['neutralized'], 'lap'].tolist()}")
 
-# Base lap time from first non-warmup lap
-base_ref_row = lap_stats_df.iloc[min(WARMUP_LAPS, len(lap_stats_df)-1)]
+# Base lap time from first non-warmup green lap
+green_df = lap_stats_df[~lap_stats_df["neutralized"]]
+if green_df.empty:
+    green_df = lap_stats_df
+base_ref_row = green_df.iloc[min(WARMUP_LAPS, len(green_df)-1)]
 base_lap_time = base_ref_row["lap_time_s"]
 
 print(f"\nReference base lap time (post-warmup): {base_lap_time:.3f} s")
@@ -144,9 +223,10 @@ print(f"\nReference base lap time (post-warmup): {base_lap_time:.3f} s")
 # STRATEGY SIMULATION HELPERS
 # ======================================
 
-def simulate_stint(stint_laps: int, compound_name: str) -> float:
+def simulate_stint(stint_laps: int, compound_name: str, start_lap: int = 0) -> float:
     """
-    Simulate one stint: tire starts 'fresh' and degrades each lap.
+    Simulate one stint: tire starts 'fresh' and degrades each lap,
+    faster on laps with a hotter track (weather_deg).
     """
     compound = COMPOUNDS[compound_name]
     deg = effective_base_deg * compound["deg_mult"]
@@ -154,10 +234,11 @@ def simulate_stint(stint_laps: int, compound_name: str) -> float:
 
     total = 0.0
     for i in range(stint_laps):
-        lap_time = base_lap_time + offset + deg * i
+        lap_time = base_lap_time + offset + deg * stint_wear(start_lap, i)
         total += lap_time
     return total
 
+@timed
 def simulate_strategy(stints, pit_loss=PIT_LOSS_SECONDS):
     """
     stints: list of dicts like:
@@ -172,15 +253,17 @@ def simulate_strategy(stints, pit_loss=PIT_LOSS_SECONDS):
         comp = stint["compound"]
         total_laps += laps
 
-        stint_time = simulate_stint(laps, comp)
+        stint_time = simulate_stint(laps, comp, start_lap=total_laps - laps)
         total_time += stint_time
 
         desc_parts.append(f"{laps}L on {comp}")
 
-        # Add pit stop time between stints (but not after final stint)
+        # Add pit stop time between stints (but not after final stint);
+        # the stop is made on the last lap of the stint
         if idx < len(stints) - 1:
-            total_time += pit_loss
+            total_time += pit_loss_at(total_laps - 1, pit_loss)
 
+    count("strategies_simulated")
     return total_laps, total_time, " | ".join(desc_parts)
 
 # ======================================
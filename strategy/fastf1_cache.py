@@ -0,0 +1,74 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+# ======================================
+# CONFIG
+# ======================================
+
+# FastF1 session cache written by telemetry/fastf1_export.py
+SESSION_DIR = "data/fastf1/2023/2023-03-05_Bahrain_Grand_Prix/2023-03-05_Race"
+
+# Telemetry store session (season, event, session) -> its FastF1 cache.
+# Sim sessions have no entry: they never ran on a real timing feed.
+SESSION_DIRS = {
+    ("2023", "Bahrain", "R"): SESSION_DIR,
+}
+
+
+# ======================================
+# CACHE ACCESS
+# ======================================
+
+def load_cache(name, session_dir=SESSION_DIR):
+    """
+    Payload of one cached FastF1 API response (e.g. "track_status_data").
+    Each .ff1pkl file is a pickled {"version", "data"} dict.
+    """
+    with open(os.path.join(session_dir, f"{name}.ff1pkl"), "rb") as f:
+        return pickle.load(f)["data"]
+
+
+def load_cache_table(name, session_dir=SESSION_DIR):
+    """Cached response as a DataFrame (dict-of-lists payloads)."""
+    data = load_cache(name, session_dir)
+    return data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+
+def session_dir_for(session):
+    """
+    FastF1 cache directory of a store session key (e.g. F1_SESSION), or
+    None when the session has no cached timing data.
+    """
+    session_dir = SESSION_DIRS.get(tuple(str(k) for k in session[:3]))
+    return session_dir if session_dir and os.path.isdir(session_dir) else None
+
+
+def session_seconds(values):
+    """Session time (timedelta) -> float seconds, NaN for missing."""
+    return pd.to_timedelta(values).dt.total_seconds().to_numpy(dtype=np.float64)
+
+
+# ======================================
+# LAP WINDOWS
+# ======================================
+
+def race_window(session_dir=SESSION_DIR):
+    """(start, end) of the race in session seconds."""
+    ss = load_cache_table("session_status_data", session_dir)
+    ss_t = dict(zip(ss["Status"], session_seconds(ss["Time"])))
+    return ss_t.get("Started", 0.0), ss_t.get("Finished", np.inf)
+
+
+def load_lap_windows(session_dir=SESSION_DIR):
+    """Leader lap windows: one row per race lap with t_start / t_end."""
+    race_start, race_end = race_window(session_dir)
+    lc = load_cache_table("lap_count", session_dir)
+    lap_t = np.maximum(session_seconds(lc["Time"]), race_start)
+    return pd.DataFrame({
+        "lap": lc["CurrentLap"].astype(int).to_numpy(),
+        "t_start": lap_t,
+        "t_end": np.append(lap_t[1:], race_end),
+    })
@@ -1,23 +1,46 @@
 import pandas as pd
 import numpy as np
 
+import os
+
+from processing.profiling import count
+from processing.telemetry_store import SIM_SESSION, load_session
+from strategy.fastf1_cache import session_dir_for
+from strategy.race_timeline import load_timeline
+from strategy.weather_model import lap_multipliers
+
 # ======================================
 # CONFIG
 # ======================================
 
 INPUT_PATH = "data/sim_racing/processed_rio_race_engineering.csv"
 
+# Only these channels are read from the telemetry store
+INPUT_COLUMNS = [
+    "time_s", "lap", "speed", "tire_temp_avg",
+    "brake_event", "tire_slip_avg", "traction_loss",
+]
+
 # Assume a hypothetical race length
 TARGET_RACE_LAPS = 20
 
 # Assume a fixed pit loss in seconds
 PIT_LOSS_SECONDS = 20.0
 
+# Track status and weather of the analysed session: laps run under
+# SC/VSC/yellow are left out of the degradation fit, stops under caution
+# get the reduced pit loss and tire wear follows the track temperature.
+# None looks up the FastF1 cache of SIM_SESSION; sim sessions have none,
+# so they race fully green at reference conditions. Pointing this at a
+# real race's cache replays that race onto the sim laps.
+RACE_TIMELINE_DIR = None
+RACE_LAP_OFFSET = 1             # sim lap 0 is race lap 1
+
 # ======================================
 # LOAD DATA
 # ======================================
 
-df = pd.read_csv(INPUT_PATH)
+df = load_session(SIM_SESSION, INPUT_PATH, channels=INPUT_COLUMNS)
 print(f"Loaded processed sim telemetry: {len(df)} samples")
 
 if "lap" not in df.columns:
@@ -26,6 +49,46 @@ if "lap" not in df.columns:
 laps = sorted(df["lap"].unique())
 print(f"Found laps in data: {laps}")
 
+# ======================================
+# RACE TIMELINE (TRACK STATUS)
+# ======================================
+
+timeline_dir = RACE_TIMELINE_DIR or session_dir_for(SIM_SESSION)
+timeline = None
+if timeline_dir and os.path.isdir(timeline_dir):
+    timeline = load_timeline(timeline_dir)
+    if RACE_TIMELINE_DIR:
+        print(f"Race timeline replayed from {RACE_TIMELINE_DIR} (not the sim session's own)")
+    print(f"Race timeline: neutralized race laps {timeline.laps_under()}")
+else:
+    print("Race timeline: none for this session, all laps green")
+
+
+def pit_loss_at(lap, green_loss=PIT_LOSS_SECONDS):
+    """Pit loss for a stop on sim lap `lap` (reduced under SC/VSC)."""
+    if timeline is None:
+        return green_loss
+    return timeline.pit_loss(lap + RACE_LAP_OFFSET, green_loss)
+
+# ======================================
+# WEATHER (PER-LAP DEGRADATION MULTIPLIER)
+# ======================================
+
+# weather_deg[lap] scales the tire wear of sim lap `lap`; precomputed once so
+# the strategy loops below only index arrays
+sim_laps = np.arange(max(TARGET_RACE_LAPS, int(max(laps)) + 1) + 1)
+# Same session gate as the timeline: no cached weather means 1.0 every lap
+weather_laps = timeline.laps if timeline is not None else None
+weather_deg = lap_multipliers(sim_laps + RACE_LAP_OFFSET, weather_laps, timeline_dir)
+print(f"Weather degradation multiplier: {weather_deg.min():.3f}-{weather_deg.max():.3f}")
+wear_cum = np.concatenate([[0.0], np.cumsum(weather_deg)])
+
+
+def stint_wear(start_lap, age):
+    """Weather-weighted tire age after `age` laps of a stint from `start_lap`."""
+    return wear_cum[start_lap + age] - wear_cum[start_lap]
+
+
 # ======================================
 # PER-LAP METRICS
 # ======================================
@@ -67,6 +130,11 @@ for lap_id in laps:
     })
 
 lap_stats_df = pd.DataFrame(lap_stats).sort_values("lap").reset_index(drop=True)
+count("laps_aggregated", len(lap_stats_df))
+
+# Laps run under SC/VSC/yellow say nothing about tire degradation
+neutralized_laps = [] if timeline is None else timeline.laps_under()
+lap_stats_df["neutralized"] = (lap_stats_df["lap"] + RACE_LAP_OFFSET).isin(neutralized_laps)
 
 print("\n===== PER-LAP METRICS (SIM) =====")
 print(lap_stats_df.to_string(index=False))
@@ -75,9 +143,13 @@ print(lap_stats_df.to_string(index=False))
 # SIMPLE TIRE DEGRADATION MODEL
 # ======================================
 
-if len(lap_stats_df) >= 3:
-    x = lap_stats_df["lap"].values
-    y = lap_stats_df["lap_time_s"].values
+fit_df = lap_stats_df[~lap_stats_df["neutralized"]]
+if len(fit_df) < len(lap_stats_df):
+    print(f"\nExcluding neutralized laps from the fit: {lap_stats_df.loc[lap_stats_df['neutralized'], 'lap'].tolist()}")
+
+if len(fit_df) >= 3:
+    x = fit_df["lap"].values
+    y = fit_df["lap_time_s"].values
 
     coeffs = np.polyfit(x, y, deg=1)
     slope = coeffs[0]
@@ -86,6 +158,11 @@ if len(lap_stats_df) >= 3:
     print("\n===== DEGRADATION MODEL =====")
     print(f"Lap time ≈ {slope:.3f} * lap + {intercept:.3f}")
     print(f"Estimated degradation per lap: {slope:.3f} s/lap")
+
+    # The fitted slope includes the weather of the observed laps; express it
+    # at reference conditions so stint_wear() can re-apply each lap's weather
+    slope /= weather_deg[x.astype(int)].mean()
+    print(f"Degradation at reference conditions: {slope:.3f} s/lap")
 else:
     slope = 0.0
     print("\nNot enough laps to fit a degradation model. Using zero degradation.")
@@ -109,28 +186,31 @@ for pit_lap in candidate_pit_laps:
     laps_before_pit = pit_lap - first_lap
     laps_after_pit = TARGET_RACE_LAPS - laps_before_pit
 
-    base_lap_time = lap_stats_df["lap_time_s"].iloc[0]
+    base_lap_time = fit_df["lap_time_s"].iloc[0] if len(fit_df) else lap_stats_df["lap_time_s"].iloc[0]
 
     times_before = [
-        base_lap_time + slope * max(0, (first_lap + i) - first_lap)
+        base_lap_time + slope * stint_wear(first_lap, i)
         for i in range(laps_before_pit)
     ]
 
     times_after = [
-        base_lap_time + slope * max(0, i)
+        base_lap_time + slope * stint_wear(pit_lap, i)
         for i in range(laps_after_pit)
     ]
 
-    total_race_time = sum(times_before) + PIT_LOSS_SECONDS + sum(times_after)
+    pit_loss = pit_loss_at(pit_lap)
+    total_race_time = sum(times_before) + pit_loss + sum(times_after)
 
     strategy_rows.append({
         "pit_lap": pit_lap,
         "laps_before_pit": laps_before_pit,
         "laps_after_pit": laps_after_pit,
+        "pit_loss_s": pit_loss,
         "total_race_time_s": total_race_time
     })
 
 strategy_df = pd.DataFrame(strategy_rows)
+count("strategies_simulated", len(strategy_df))
 
 if not strategy_df.empty:
     best_row = strategy_df.loc[strategy_df["total_race_time_s"].idxmin()]
@@ -140,7 +220,7 @@ if not strategy_df.empty:
 
     print("\n===== RECOMMENDED PIT WINDOW (SIMPLE MODEL) =====")
     print(f"Hypothetical race length: {TARGET_RACE_LAPS} laps")
-    print(f"Assumed pit loss: {PIT_LOSS_SECONDS:.1f} s")
+    print(f"Assumed pit loss: {PIT_LOSS_SECONDS:.1f} s (green), {best_row['pit_loss_s']:.1f} s at the best pit lap")
 
     print(f"\nBest pit lap (1-stop): Lap {int(best_row['pit_lap'])}")
     print(f"Estimated total race time: {best_row['total_race_time_s']:.2f} s")
@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+
+from processing.profiling import timed
+from strategy.fastf1_cache import SESSION_DIR, load_cache_table, load_lap_windows, race_window, session_seconds
+
+# ======================================
+# CONFIG
+# ======================================
+
+# FastF1 track status codes -> timeline state
+TRACK_STATUS = {
+    "1": "GREEN",
+    "2": "YELLOW",
+    "4": "SC",
+    "5": "RED",
+    "6": "VSC",
+    "7": "VSC",       # VSC ending: field still neutralized
+}
+
+# States that neutralize a lap for degradation fitting. Local yellows only
+# count when they last long enough to cost real lap time.
+NEUTRALIZED = ("SC", "VSC", "RED", "YELLOW")
+YELLOW_MIN_DURATION_S = 10.0
+
+# Pit loss under caution relative to a green-flag stop (the field is slow
+# while the car is in the pit lane)
+GREEN_PIT_LOSS_S = 20.0
+PIT_LOSS_FACTOR = {
+    "SC": 0.55,
+    "VSC": 0.65,
+}
+
+# Race control messages carry wall-clock times; these categories are
+# matched against track status changes to find the session time offset
+RCM_ALIGN_CATEGORIES = ("Flag", "SafetyCar")
+
+
+# ======================================
+# TIMELINE
+# ======================================
+
+class RaceTimeline:
+    """
+    Sorted, non-overlapping track status intervals of one session plus lap
+    windows and race control messages, all on session time (seconds).
+
+    Every lookup is a binary search over the sorted interval starts, so
+    "status at t" is O(log n) and "laps under SC/VSC" is O(laps · log n).
+    """
+
+    def __init__(self, status, laps, messages=None, session_end=np.inf):
+        # status: DataFrame(t, state), laps: DataFrame(lap, t_start, t_end)
+        status = status.sort_values("t", kind="stable").reset_index(drop=True)
+        self.t_start = status["t"].to_numpy(dtype=np.float64)
+        self.t_end = np.append(self.t_start[1:], session_end)
+        self.state = status["state"].to_numpy(dtype=object)
+
+        self.laps = laps.sort_values("lap").reset_index(drop=True)
+        self.messages = (
+            messages.sort_values("t", kind="stable").reset_index(drop=True)
+            if messages is not None else pd.DataFrame(columns=["t"])
+        )
+
+    # ----------------------------------
+    # POINT LOOKUPS
+    # ----------------------------------
+
+    def status_at(self, t):
+        """Track state at session time(s) t (scalar or array)."""
+        idx = np.searchsorted(self.t_start, t, side="right") - 1
+        state = np.where(idx >= 0, self.state[np.maximum(idx, 0)], "GREEN")
+        return state.item() if np.ndim(t) == 0 else state
+
+    def lap_at(self, t):
+        """Race lap being run at session time(s) t (0 before the start)."""
+        idx = np.searchsorted(self.laps["t_start"].to_numpy(), t, side="right") - 1
+        lap = np.where(idx >= 0, self.laps["lap"].to_numpy()[np.maximum(idx, 0)], 0)
+        return lap.item() if np.ndim(t) == 0 else lap
+
+    # ----------------------------------
+    # INTERVALS
+    # ----------------------------------
+
+    def intervals(self, states=NEUTRALIZED, min_yellow_s=YELLOW_MIN_DURATION_S):
+        """Merged (t_start, t_end, state) intervals whose state is in `states`."""
+        keep = np.isin(self.state, list(states))
+        short_yellow = (self.state == "YELLOW") & (self.t_end - self.t_start < min_yellow_s)
+        keep &= ~short_yellow
+
+        out = pd.DataFrame({
+            "t_start": self.t_start[keep],
+            "t_end": self.t_end[keep],
+            "state": self.state[keep],
+        })
+        if out.empty:
+            return out
+
+        # Adjacent intervals of the same state (e.g. VSC deployed -> ending)
+        new_run = (out["t_start"].to_numpy()[1:] != out["t_end"].to_numpy()[:-1]) | (
+            out["state"].to_numpy()[1:] != out["state"].to_numpy()[:-1]
+        )
+        run = np.concatenate([[0], np.cumsum(new_run)])
+        return out.groupby(run).agg(
+            t_start=("t_start", "first"), t_end=("t_end", "last"), state=("state", "first")
+        ).reset_index(drop=True)
+
+    def _lap_overlap(self, states, min_yellow_s):
+        """Per lap: the neutralizing state overlapping it, or None."""
+        iv = self.intervals(states, min_yellow_s)
+        lap_start = self.laps["t_start"].to_numpy()
+        lap_end = self.laps["t_end"].to_numpy()
+        if iv.empty:
+            return np.full(len(lap_start), None, dtype=object)
+
+        # First interval ending after each lap starts; overlap if it also
+        # starts before the lap ends (intervals are sorted and disjoint)
+        iv_end = iv["t_end"].to_numpy()
+        idx = np.searchsorted(iv_end, lap_start, side="right")
+        hit = idx < len(iv)
+        idx = np.minimum(idx, len(iv) - 1)
+        hit &= iv["t_start"].to_numpy()[idx] < lap_end
+        return np.where(hit, iv["state"].to_numpy()[idx], None)
+
+    def laps_under(self, states=NEUTRALIZED, min_yellow_s=YELLOW_MIN_DURATION_S):
+        """Race laps that overlap any interval in `states`."""
+        hit = self._lap_overlap(states, min_yellow_s)
+        return self.laps["lap"].to_numpy()[hit != None].tolist()  # noqa: E711
+
+    def lap_table(self):
+        """Lap windows with the neutralizing state each lap ran under."""
+        table = self.laps.copy()
+        table["neutralized_by"] = self._lap_overlap(NEUTRALIZED, YELLOW_MIN_DURATION_S)
+        table["neutralized"] = table["neutralized_by"].notna()
+        return table
+
+    def messages_between(self, t0, t1):
+        """Race control messages with t0 <= t < t1."""
+        t = self.messages["t"].to_numpy(dtype=np.float64)
+        lo, hi = np.searchsorted(t, [t0, t1], side="left")
+        return self.messages.iloc[lo:hi]
+
+    # ----------------------------------
+    # STRATEGY HELPERS
+    # ----------------------------------
+
+    def pit_loss(self, lap, green_loss=GREEN_PIT_LOSS_S):
+        """
+        Pit loss for stopping on race lap(s) `lap`: reduced when the lap ran
+        under SC/VSC, green-flag loss otherwise.
+        """
+        caution = self._lap_overlap(tuple(PIT_LOSS_FACTOR), 0.0)
+        factor = np.array([PIT_LOSS_FACTOR.get(s, 1.0) for s in caution])
+
+        lap_ids = self.laps["lap"].to_numpy()
+        idx = np.clip(np.searchsorted(lap_ids, lap), 0, len(lap_ids) - 1)
+        found = lap_ids[idx] == np.asarray(lap)
+        loss = green_loss * np.where(found, factor[idx], 1.0)
+        return float(loss) if np.ndim(lap) == 0 else loss
+
+
+# ======================================
+# BUILD FROM THE FASTF1 CACHE
+# ======================================
+
+def _rcm_offset(rcm_seconds, status_seconds):
+    """
+    Wall-clock -> session time offset (seconds). Flag messages are issued
+    with the track status changes they announce, so the most common
+    pairwise difference (1 s bins) is the offset.
+    """
+    diffs = np.round(rcm_seconds[:, None] - status_seconds[None, :]).ravel()
+    values, counts = np.unique(diffs, return_counts=True)
+    return float(values[np.argmax(counts)])
+
+
+@timed
+def load_timeline(session_dir=SESSION_DIR):
+    """RaceTimeline for one cached FastF1 session."""
+    ts = load_cache_table("track_status_data", session_dir)
+    status = pd.DataFrame({
+        "t": session_seconds(ts["Time"]),
+        "state": ts["Status"].astype(str).map(TRACK_STATUS).fillna("GREEN"),
+    })
+
+    _, race_end = race_window(session_dir)
+    laps = load_lap_windows(session_dir)
+
+    rcm = load_cache_table("race_control_messages", session_dir)
+    wall = (rcm["Time"] - rcm["Time"].dt.normalize()).dt.total_seconds().to_numpy()
+    align = rcm["Category"].isin(RCM_ALIGN_CATEGORIES).to_numpy()
+    offset = _rcm_offset(wall[align], status["t"].to_numpy()) if align.any() else 0.0
+    messages = rcm.drop(columns="Time").assign(t=wall - offset)
+
+    return RaceTimeline(status, laps, messages, session_end=race_end)
+
+
+# ======================================
+# MAIN
+# ======================================
+
+def main():
+    timeline = load_timeline()
+
+    print("===== NEUTRALIZED PERIODS =====")
+    iv = timeline.intervals()
+    iv["laps"] = [
+        f"{timeline.lap_at(a)}-{timeline.lap_at(b)}" for a, b in zip(iv["t_start"], iv["t_end"])
+    ]
+    print(iv.to_string(index=False))
+
+    print(f"\nLaps excluded from degradation fits: {timeline.laps_under()}")
+
+    caution = timeline.laps_under(tuple(PIT_LOSS_FACTOR))
+    print(f"Laps run under SC/VSC: {caution}")
+    for lap in caution:
+        print(f"  Lap {lap}: pit loss {timeline.pit_loss(lap):.1f} s (green {GREEN_PIT_LOSS_S:.1f} s)")
+
+    print("\n===== RACE CONTROL (NEUTRALIZED PERIODS) =====")
+    msgs = pd.concat([
+        timeline.messages_between(a - 5.0, b + 5.0) for a, b in zip(iv["t_start"], iv["t_end"])
+    ])
+    for _, m in msgs[~msgs.index.duplicated()].iterrows():
+        print(f"  [{m['t']:8.1f} s] lap {m['Lap']:>2}  {m['Message']}")
+
+    print("\n✅ Race timeline built from cached track status and race control messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.profiling import count, timed
+from strategy.fastf1_cache import SESSION_DIR, load_cache, session_seconds
+from strategy.race_timeline import load_timeline
+
+# ======================================
+# CONFIG
+# ======================================
+
+EVAL_LAP = 12                   # lap printed in detail by main()
+
+# Laps the attacker runs on fresh tyres before the rival stops
+UNDERCUT_LAPS = 2
+
+FUEL_EFFECT_S_PER_LAP = 0.06    # lap time gained per lap of fuel burned
+OUTLAP_PENALTY_S = 1.0          # first lap on cold new tyres
+MIN_FIT_LAPS = 4                # clean laps needed for a per-stint fit
+OUTLIER_FACTOR = 1.07           # laps slower than 107% of the stint median
+MIN_GAIN_MARGIN_S = 0.3         # clearance needed to come out ahead
+
+# Compound fitted for a stop (what-if, not the compound actually fitted)
+NEXT_COMPOUND = {
+    "SOFT": "HARD",
+    "MEDIUM": "HARD",
+    "HARD": "MEDIUM",
+}
+
+
+# ======================================
+# LOAD FIELD TIMING
+# ======================================
+
+def load_field_laps(session_dir=SESSION_DIR):
+    """
+    One row per (driver, lap) for the whole field: lap end time, lap time,
+    pit flags, stint, compound and tyre age.
+    """
+    laps_raw = load_cache("_extended_timing_data", session_dir)[0]
+    laps = pd.DataFrame({
+        "driver": laps_raw["Driver"].astype(str),
+        "lap": laps_raw["NumberOfLaps"].astype(int),
+        "lap_end": session_seconds(laps_raw["Time"]),
+        "lap_time": session_seconds(laps_raw["LapTime"]),
+        "pit_in": laps_raw["PitInTime"].notna().to_numpy(),
+        "pit_out": (laps_raw["PitOutTime"].notna() & (laps_raw["NumberOfLaps"] > 1)).to_numpy(),
+        "stint": laps_raw["NumberOfPitStops"].astype(int),
+    })
+
+    # Stint details; later rows correct earlier ones, so keep the last
+    # reported compound / starting age per stint
+    app = load_cache("timing_app_data", session_dir)
+    stints = app.groupby([app["Driver"].astype(str), "Stint"]).agg(
+        compound=("Compound", "last"), start_laps=("StartLaps", "last")
+    )
+    stints.index.names = ["driver", "stint"]
+    laps = laps.join(stints, on=["driver", "stint"])
+    laps["compound"] = laps["compound"].fillna("UNKNOWN")
+    laps["start_laps"] = laps["start_laps"].fillna(0).astype(int)
+
+    laps = laps.sort_values(["driver", "lap"]).reset_index(drop=True)
+    laps["tyre_age"] = laps.groupby(["driver", "stint"]).cumcount() + 1 + laps["start_laps"]
+
+    info = load_cache("driver_info", session_dir)
+    laps["tla"] = laps["driver"].map({k: v.get("Tla", k) for k, v in info.items()})
+    return laps
+
+
+# ======================================
+# DEGRADATION FIT (PER STINT, VECTORIZED)
+# ======================================
+
+def fit_degradation(laps, neutralized_laps=()):
+    """
+    Linear pace model per (driver, stint) on fuel-corrected lap time:
+        lap_time ≈ a + b * tyre_age
+    fitted from closed-form least-squares sums (one groupby, no loops).
+    In/out laps, lap 1, neutralized laps and slow outliers are excluded.
+    Stints with too few clean laps use their compound's median slope.
+    """
+    laps = laps.copy()
+    laps["pace"] = laps["lap_time"] + FUEL_EFFECT_S_PER_LAP * (laps["lap"] - 1)
+
+    clean = (
+        laps["lap_time"].notna()
+        & ~laps["pit_in"] & ~laps["pit_out"]
+        & (laps["lap"] > 1)
+        & ~laps["lap"].isin(list(neutralized_laps))
+    )
+    median = laps[clean].groupby(["driver", "stint"])["pace"].transform("median")
+    clean &= laps["pace"] <= OUTLIER_FACTOR * median.reindex(laps.index)
+
+    c = laps[clean]
+    x, y = c["tyre_age"].astype(np.float64), c["pace"]
+    sums = pd.DataFrame({
+        "n": 1.0, "sx": x, "sy": y, "sxx": x * x, "sxy": x * y,
+        "driver": c["driver"], "stint": c["stint"],
+    }).groupby(["driver", "stint"]).sum()
+
+    denom = sums["n"] * sums["sxx"] - sums["sx"] ** 2
+    slope = (sums["n"] * sums["sxy"] - sums["sx"] * sums["sy"]) / denom.where(denom > 0)
+    fits = pd.DataFrame({"n_laps": sums["n"].astype(int), "slope": slope.clip(lower=0.0)})
+
+    compound = laps.groupby(["driver", "stint"])["compound"].first()
+    fits = fits.join(compound)
+    fits.loc[fits["n_laps"] < MIN_FIT_LAPS, "slope"] = np.nan
+    compound_slope = fits.groupby("compound")["slope"].median()
+    fits["slope"] = fits["slope"].fillna(fits["compound"].map(compound_slope)).fillna(0.0)
+    fits["intercept"] = (sums["sy"] - fits["slope"] * sums["sx"]) / sums["n"]
+
+    # Fresh-tyre pace by compound relative to each driver's mean intercept
+    driver_mean = fits.groupby("driver")["intercept"].transform("mean")
+    compound_offset = (fits["intercept"] - driver_mean).groupby(fits["compound"]).median()
+
+    return fits, compound_slope.fillna(0.0), compound_offset.fillna(0.0)
+
+
+# ======================================
+# FIELD STATE
+# ======================================
+
+class FieldState:
+    """
+    Per (driver, lap) arrays prepared once for the race, sorted by lap and
+    then by crossing time, so a lap's running order is one contiguous
+    slice found by binary search.
+    """
+
+    @timed
+    def __init__(self, session_dir=SESSION_DIR):
+        self.timeline = load_timeline(session_dir)
+        laps = load_field_laps(session_dir)
+        fits, compound_slope, compound_offset = fit_degradation(laps, self.timeline.laps_under())
+        self.fits = fits
+
+        laps = laps.join(fits[["slope", "intercept"]], on=["driver", "stint"])
+        driver_pace = fits.groupby("driver")["intercept"].mean()
+        next_compound = laps["compound"].map(NEXT_COMPOUND).fillna("HARD")
+        laps["new_intercept"] = laps["driver"].map(driver_pace) + next_compound.map(compound_offset).fillna(0.0)
+        laps["new_slope"] = next_compound.map(compound_slope).fillna(laps["slope"])
+
+        laps = laps.dropna(subset=["lap_end"]).sort_values(["lap", "lap_end"]).reset_index(drop=True)
+        self.laps = laps
+
+        self._lap = laps["lap"].to_numpy()
+        self._cols = {
+            c: laps[c].to_numpy(dtype=np.float64)
+            for c in ("lap_end", "tyre_age", "slope", "intercept", "new_intercept", "new_slope")
+        }
+        self.n_laps = int(self._lap.max())
+
+        # Pit loss per race lap (reduced under SC/VSC), indexed by lap
+        self.pit_loss = self.timeline.pit_loss(np.arange(self.n_laps + UNDERCUT_LAPS + 2))
+
+    def order(self, lap):
+        """Row slice of the cars that completed `lap`, in running order."""
+        lo, hi = np.searchsorted(self._lap, [lap, lap + 1], side="left")
+        return slice(lo, hi)
+
+
+# ======================================
+# PAIRWISE EVALUATION
+# ======================================
+
+@timed
+def evaluate_lap(field, lap, k=UNDERCUT_LAPS):
+    """
+    Undercut and overcut for every pair of adjacent cars after `lap`.
+
+    Undercut: the car behind stops at the end of lap+1 and runs k laps on
+    new tyres while the car ahead stays out on old ones, then stops.
+    Overcut:  the car ahead stops first and the car behind stays out.
+    Gains are in seconds; a move works when its gain exceeds the gap plus
+    MIN_GAIN_MARGIN_S. Pit loss comes from the race timeline, so stopping
+    under SC/VSC is cheaper.
+    """
+    rows = field.order(lap)
+    col = {c: v[rows] for c, v in field._cols.items()}
+    if len(col["lap_end"]) < 2:
+        return pd.DataFrame()
+
+    ahead, behind = slice(0, -1), slice(1, None)
+    gap = col["lap_end"][behind] - col["lap_end"][ahead]
+
+    j = np.arange(1, k + 1)[None, :]                # (1, k) laps after the stop
+    warmup = np.where(j == 1, OUTLAP_PENALTY_S, 0.0)
+
+    def old_tyres(car):
+        return col["intercept"][car, None] + col["slope"][car, None] * (col["tyre_age"][car, None] + 1 + j)
+
+    def new_tyres(car):
+        return col["new_intercept"][car, None] + col["new_slope"][car, None] * (j - 1) + warmup
+
+    last = len(field.pit_loss) - 1
+    first_stop = field.pit_loss[min(lap + 1, last)]
+    second_stop = field.pit_loss[min(lap + 1 + k, last)]
+
+    undercut_gain = (old_tyres(ahead) - new_tyres(behind)).sum(axis=1) + (second_stop - first_stop)
+    overcut_gain = (new_tyres(ahead) - old_tyres(behind)).sum(axis=1) + (first_stop - second_stop)
+
+    tla = field.laps["tla"].to_numpy()[rows]
+    return pd.DataFrame({
+        "lap": lap,
+        "ahead": tla[ahead],
+        "behind": tla[behind],
+        "gap_s": gap,
+        "undercut_gain_s": undercut_gain,
+        "undercut_works": undercut_gain > gap + MIN_GAIN_MARGIN_S,
+        "overcut_gain_s": overcut_gain,
+        "overcut_works": overcut_gain > gap + MIN_GAIN_MARGIN_S,
+    })
+
+
+def evaluate_race(field, k=UNDERCUT_LAPS):
+    """evaluate_lap for every lap; returns (table, seconds per lap)."""
+    t0 = time.perf_counter()
+    parts = [evaluate_lap(field, lap, k) for lap in range(1, field.n_laps)]
+    per_lap = (time.perf_counter() - t0) / max(1, len(parts))
+    count("laps_evaluated", len(parts))
+    return pd.concat(parts, ignore_index=True), per_lap
+
+
+# ======================================
+# MAIN
+# ======================================
+
+def main():
+    field = FieldState()
+
+    print("===== DEGRADATION FITS (FUEL-CORRECTED, PER STINT) =====")
+    fits = field.fits.reset_index()
+    fits["driver"] = fits["driver"].map(field.laps.drop_duplicates("driver").set_index("driver")["tla"])
+    print(fits.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    print(f"\n===== UNDERCUT / OVERCUT AFTER LAP {EVAL_LAP} ({UNDERCUT_LAPS} laps on new tyres) =====")
+    table = evaluate_lap(field, EVAL_LAP)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    race, per_lap = evaluate_race(field)
+    print(f"\nWhole race: {len(race)} pairs over {race['lap'].nunique()} laps, "
+          f"{per_lap * 1000:.2f} ms per lap")
+    print(f"Undercut windows: {int(race['undercut_works'].sum())}, "
+          f"overcut windows: {int(race['overcut_works'].sum())}")
+    print("\n✅ Undercut/overcut evaluated for the whole field")
+
+
+if __name__ == "__main__":
+    main()
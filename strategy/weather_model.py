@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from processing.profiling import timed
+from strategy.fastf1_cache import SESSION_DIR, load_cache_table, load_lap_windows, session_seconds
+
+# ======================================
+# CONFIG
+# ======================================
+
+# Cached weather column -> model channel (sampled about once a minute)
+WEATHER_CHANNELS = {
+    "TrackTemp": "track_temp",
+    "AirTemp": "air_temp",
+    "Humidity": "humidity",
+}
+RAIN_CHANNEL = ("Rainfall", "rainfall")      # boolean: held, not interpolated
+
+# Thermal degradation relative to a reference track temperature:
+# every degree above it wears the tires DEG_PER_TRACK_C faster
+REF_TRACK_TEMP_C = 30.0
+REF_AIR_TEMP_C = 26.0
+DEG_PER_TRACK_C = 0.03
+DEG_PER_AIR_C = 0.01
+RAIN_DEG_FACTOR = 0.6        # a wet track keeps slicks out of their thermal window
+DEG_MULT_RANGE = (0.5, 2.0)
+
+
+# ======================================
+# LOAD + INTERPOLATE
+# ======================================
+
+def load_weather(session_dir=SESSION_DIR):
+    """Cached weather samples on session time (seconds), sorted."""
+    w = load_cache_table("weather_data", session_dir)
+    out = pd.DataFrame({"t": session_seconds(w["Time"])})
+    for raw, name in WEATHER_CHANNELS.items():
+        out[name] = w[raw].astype(np.float64)
+    out[RAIN_CHANNEL[1]] = w[RAIN_CHANNEL[0]].astype(bool)
+    return out.sort_values("t", kind="stable").reset_index(drop=True)
+
+
+def interpolate_weather(weather, t):
+    """
+    Weather at session times `t` in one vectorized pass: a single binary
+    search gives every query's bracketing samples, then all continuous
+    channels are blended at once. Rainfall holds its last reported value.
+    Queries outside the sampled range clamp to the nearest sample.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    ts = weather["t"].to_numpy()
+    channels = list(WEATHER_CHANNELS.values())
+    values = weather[channels].to_numpy()                 # (samples, channels)
+
+    hi = np.clip(np.searchsorted(ts, t, side="right"), 1, len(ts) - 1)
+    lo = hi - 1
+    span = ts[hi] - ts[lo]
+    w = np.clip((t - ts[lo]) / np.where(span > 0, span, 1.0), 0.0, 1.0)[:, None]
+    blended = values[lo] * (1.0 - w) + values[hi] * w
+
+    out = pd.DataFrame(blended, columns=channels)
+    last = np.clip(np.searchsorted(ts, t, side="right") - 1, 0, len(ts) - 1)
+    out[RAIN_CHANNEL[1]] = weather[RAIN_CHANNEL[1]].to_numpy()[last]
+    return out
+
+
+# ======================================
+# DEGRADATION MULTIPLIER
+# ======================================
+
+def degradation_multiplier(conditions):
+    """Per-row tire degradation multiplier (1.0 at the reference temperatures)."""
+    mult = (
+        1.0
+        + DEG_PER_TRACK_C * (conditions["track_temp"].to_numpy() - REF_TRACK_TEMP_C)
+        + DEG_PER_AIR_C * (conditions["air_temp"].to_numpy() - REF_AIR_TEMP_C)
+    )
+    mult = np.where(conditions["rainfall"].to_numpy(), mult * RAIN_DEG_FACTOR, mult)
+    return np.clip(mult, *DEG_MULT_RANGE)
+
+
+def has_weather(session_dir):
+    return bool(session_dir) and os.path.exists(os.path.join(session_dir, "weather_data.ff1pkl"))
+
+
+@timed
+def lap_weather(laps, session_dir=SESSION_DIR):
+    """
+    Weather and degradation multiplier for every race lap, sampled at the
+    lap midpoint. `laps` holds lap, t_start and t_end in session seconds
+    (fastf1_cache.load_lap_windows or RaceTimeline.laps).
+    """
+    t_mid = 0.5 * (laps["t_start"].to_numpy() + laps["t_end"].to_numpy())
+
+    table = interpolate_weather(load_weather(session_dir), t_mid)
+    table.insert(0, "lap", laps["lap"].to_numpy())
+    table.insert(1, "t_mid", t_mid)
+    table["deg_mult"] = degradation_multiplier(table)
+    return table
+
+
+def lap_multipliers(race_laps, laps=None, session_dir=None):
+    """
+    Degradation multiplier per requested race lap as a plain array, so a
+    strategy loop only indexes it. Laps past the cached race reuse the
+    last lap's conditions; a session without weather data gets 1.0.
+    """
+    race_laps = np.asarray(race_laps)
+    if not has_weather(session_dir):
+        return np.ones(len(race_laps))
+    if laps is None:
+        laps = load_lap_windows(session_dir)
+    table = lap_weather(laps, session_dir)
+    lap_ids = table["lap"].to_numpy()
+    idx = np.clip(np.searchsorted(lap_ids, race_laps), 0, len(lap_ids) - 1)
+    return table["deg_mult"].to_numpy()[idx]
+
+
+# ======================================
+# MAIN
+# ======================================
+
+def main():
+    table = lap_weather(load_lap_windows())
+    print("===== LAP WEATHER (INTERPOLATED AT LAP MIDPOINT) =====")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    print(f"\nTrack temp {table['track_temp'].min():.1f}-{table['track_temp'].max():.1f} °C, "
+          f"rain on {int(table['rainfall'].sum())} lap(s)")
+    print(f"Degradation multiplier {table['deg_mult'].min():.3f}-{table['deg_mult'].max():.3f} "
+          f"(1.0 at {REF_TRACK_TEMP_C:.0f} °C track)")
+    print("\n✅ Weather-aware degradation multipliers computed")
+
+
+if __name__ == "__main__":
+    main()
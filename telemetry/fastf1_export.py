@@ -1,3 +1,4 @@
+import os
 import fastf1
 import pandas as pd
 
@@ -25,4 +26,21 @@ df = telemetry[[
 output_path = "data/fastf1/bahrain_2023_verstappen.csv"
 df.to_csv(output_path, index=False)
 
-print(f"Saved telemetry to {output_path}")
\ No newline at end of file
+print(f"Saved telemetry to {output_path}")
+
+# Export every driver's fastest lap for full-field replays
+FIELD_DIR = "data/fastf1/field"
+os.makedirs(FIELD_DIR, exist_ok=True)
+
+for drv in session.laps["Driver"].unique():
+    drv_laps = session.laps.pick_driver(drv)
+    drv_fastest = drv_laps.pick_fastest()
+    if drv_fastest is None or pd.isna(drv_fastest["LapTime"]):
+        continue
+
+    drv_df = drv_fastest.get_telemetry()[[
+        "Time", "Speed", "Throttle", "Brake", "RPM", "nGear", "DRS", "X", "Y"
+    ]]
+    drv_df.to_csv(f"{FIELD_DIR}/{drv}.csv", index=False)
+
+print(f"Saved field telemetry to {FIELD_DIR}/")
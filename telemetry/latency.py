@@ -0,0 +1,271 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# ======================================
+# CONFIG
+# ======================================
+
+# Hops recorded along the live path, each measured from frame receipt:
+#   process: receipt -> filtered sample (LiveIngestionThread closes it with
+#            the same clock read as ingest, after the buffered write)
+#   ingest:  receipt -> sample visible in the rolling buffer
+#   render:  receipt -> dashboard frame drawn with that sample
+STAGES = ("process", "ingest", "render")
+
+SUB_BUCKET_BITS = 7             # 64 sub-buckets per power of two: <1.6% error
+MAX_LATENCY_NS = 60 * 10**9     # larger values are clamped into the top bucket
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+DUMP_PATH = "reports/latency.json"
+DUMP_INTERVAL_S = 10.0
+
+
+# ======================================
+# HDR-STYLE HISTOGRAM
+# ======================================
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of nanosecond latencies (HdrHistogram layout):
+    exact below 2**SUB_BUCKET_BITS ns, then each power of two is split into
+    equal sub-buckets, so every recorded value keeps ~2 significant digits
+    from nanoseconds to a minute in a couple of thousand counters.
+
+    record() is a bit_length, a shift and a list increment (the total is
+    summed from the counters when read), so it can stay on in the
+    ingestion path.
+    """
+
+    def __init__(self, sub_bucket_bits=SUB_BUCKET_BITS, max_ns=MAX_LATENCY_NS):
+        self._bits = sub_bucket_bits
+        self._sub = 1 << sub_bucket_bits          # exact range
+        self._half = self._sub >> 1               # sub-buckets per power of two
+        self._max = max_ns
+        self.counts = [0] * (self._index(max_ns) + 1)
+        self.max_ns = 0
+
+    def _index(self, ns):
+        if ns < self._sub:
+            return ns
+        shift = ns.bit_length() - self._bits
+        return self._sub + (shift - 1) * self._half + (ns >> shift) - self._half
+
+    def record(self, ns):
+        # Same bucket as _index(); _sub = 2 * _half folds the offsets into
+        # shift * _half
+        if ns < self._sub:
+            if ns < 0:
+                ns = 0
+            self.counts[ns] += 1
+        else:
+            if ns > self._max:
+                ns = self._max
+            shift = ns.bit_length() - self._bits
+            self.counts[shift * self._half + (ns >> shift)] += 1
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def bucket_upper(self):
+        """Highest value each bucket can hold (what percentiles report)."""
+        idx = np.arange(len(self.counts))
+        k = np.maximum(idx - self._sub, 0)
+        shift = k // self._half + 1
+        top = k % self._half + self._half
+        upper = ((top + 1) << shift) - 1
+        return np.where(idx < self._sub, idx, upper)
+
+    def percentile(self, p):
+        cum = np.cumsum(self.counts)
+        if cum[-1] == 0:
+            return 0
+        i = int(np.searchsorted(cum, np.ceil(p / 100.0 * cum[-1]), side="left"))
+        return int(min(self.bucket_upper()[i], self.max_ns))
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "p50_us": self.percentile(50) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+            "p999_us": self.percentile(99.9) / 1e3,
+            "max_us": self.max_ns / 1e3,
+        }
+
+
+# ======================================
+# TRACKER (PER STAGE, PER CAR)
+# ======================================
+
+class LatencyTracker:
+    """
+    Latency histograms and dropped-frame counters keyed by (stage, car).
+
+    Producers call stamp() when a frame arrives and record(stage, ...) as
+    it passes each hop; latencies are monotonic_ns differences, so they are
+    comparable across threads and processes on the same host.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.dropped = {}
+        self.started = time.time()
+
+    @staticmethod
+    def stamp():
+        return time.monotonic_ns()
+
+    def histogram(self, stage, car="car0"):
+        key = (stage, car)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = LatencyHistogram()
+        return hist
+
+    def record(self, stage, t_recv_ns, car="car0"):
+        """Record receipt -> now for one hop."""
+        self.histogram(stage, car).record(time.monotonic_ns() - t_recv_ns)
+
+    def drop(self, stage, car="car0", n=1):
+        key = (stage, car)
+        self.dropped[key] = self.dropped.get(key, 0) + n
+
+    def snapshot(self):
+        """JSON-ready p50/p99/max and dropped counts for every (stage, car)."""
+        keys = sorted(set(self.histograms) | set(self.dropped))
+        rows = []
+        for stage, car in keys:
+            hist = self.histograms.get((stage, car))
+            row = {"stage": stage, "car": car}
+            row.update(hist.summary() if hist else LatencyHistogram().summary())
+            row["dropped"] = self.dropped.get((stage, car), 0)
+            rows.append(row)
+        return {"uptime_s": time.time() - self.started, "stages": rows}
+
+    def dump(self, path=DUMP_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(path + ".tmp", path)
+        return path
+
+    # ----------------------------------
+    # EXPOSURE
+    # ----------------------------------
+
+    def start_periodic_dump(self, path=DUMP_PATH, interval_s=DUMP_INTERVAL_S):
+        """Rewrite `path` every interval on a daemon thread."""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval_s):
+                self.dump(path)
+
+        threading.Thread(target=loop, daemon=True, name="latency-dump").start()
+        return stop
+
+    def serve(self, host=METRICS_HOST, port=METRICS_PORT):
+        """Local JSON endpoint: GET /metrics. Returns the running server."""
+        tracker = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(tracker.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="latency-metrics").start()
+        return server
+
+
+def format_snapshot(snapshot):
+    lines = [f"{'stage':<10} {'car':<6} {'count':>8} {'p50 µs':>9} {'p99 µs':>9} {'max µs':>10} {'dropped':>8}"]
+    for r in snapshot["stages"]:
+        lines.append(
+            f"{r['stage']:<10} {r['car']:<6} {r['count']:>8} {r['p50_us']:>9.1f} "
+            f"{r['p99_us']:>9.1f} {r['max_us']:>10.1f} {r['dropped']:>8}"
+        )
+    return "\n".join(lines)
+
+
+# ======================================
+# OVERHEAD + ACCURACY CHECK
+# ======================================
+
+def benchmark(n=1_000_000, seed=0):
+    """Per-sample cost of record() and percentile error vs numpy."""
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(mean=np.log(50_000), sigma=1.0, size=n).astype(np.int64).tolist()
+
+    hist = LatencyHistogram()
+    record = hist.record
+    t0 = time.perf_counter()
+    for v in values:
+        record(v)
+    per_sample_ns = (time.perf_counter() - t0) / n * 1e9
+
+    exact = np.percentile(values, [50, 99])
+    approx = np.array([hist.percentile(50), hist.percentile(99)])
+    return per_sample_ns, np.abs(approx - exact) / exact
+
+
+def benchmark_ingestion(n=100_000, repeats=15):
+    """
+    Per-frame cost of latency tracking on the real ingestion path:
+    LiveIngestionThread.run() over n prebuilt frames with and without a
+    tracker (runs interleaved, best of `repeats` each), so the difference
+    is what tracking adds.
+    """
+    from telemetry.live_stream import LiveIngestionThread, LiveTelemetryBuffer
+
+    frames = [
+        {"t_s": i * 0.01, "speed_kmh": 250.0, "rpm": 11000.0, "throttle_pct": 100.0,
+         "brake_pct": 0.0, "tire_temp_c": [95.0, 95.0, 97.0, 97.0]}
+        for i in range(n)
+    ]
+
+    def run(latency):
+        thread = LiveIngestionThread(
+            LiveTelemetryBuffer(), rate_hz=100.0,
+            stream_factory=lambda rate_hz: iter(frames), latency=latency,
+        )
+        t0 = time.perf_counter()
+        thread.run()                    # on this thread: no scheduling noise
+        return (time.perf_counter() - t0) / n * 1e9
+
+    runs = [(run(None), run(LatencyTracker())) for _ in range(repeats)]
+    bare = min(r[0] for r in runs)
+    tracked = min(r[1] for r in runs)
+    return tracked - bare, bare
+
+
+if __name__ == "__main__":
+    per_sample_ns, rel_err = benchmark()
+    print(f"record(): {per_sample_ns:.0f} ns per sample")
+    print(f"p50 / p99 relative error vs exact: {rel_err[0]:.2%} / {rel_err[1]:.2%}")
+
+    overhead_ns, frame_ns = benchmark_ingestion()
+    print(f"\nIngestion frame: {frame_ns / 1e3:.1f} µs untracked, +{overhead_ns:.0f} ns with latency tracking")
+    print(f"{'✅' if overhead_ns < 1000 else '⚠️'} Tracking cost per frame within the 1 µs per sample budget")
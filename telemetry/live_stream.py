@@ -0,0 +1,163 @@
+import threading
+import time
+
+import numpy as np
+
+from telemetry.telemetry_ingestion import telemetry_stream
+
+# ======================================
+# CONFIG
+# ======================================
+
+# Channels kept in the rolling window (one column each)
+LIVE_CHANNELS = (
+    "t_s",
+    "speed_kmh",
+    "rpm",
+    "throttle_pct",
+    "brake_pct",
+    "tire_temp_fl",
+    "tire_temp_fr",
+    "tire_temp_rl",
+    "tire_temp_rr",
+)
+
+DEFAULT_CAPACITY = 3000         # 30 s of history at 100 Hz
+
+
+# ======================================
+# ROLLING WINDOW (SEQLOCK SNAPSHOT)
+# ======================================
+
+class LiveTelemetryBuffer:
+    """
+    Fixed-size rolling window written by one ingestion thread and read by
+    any number of consumers (e.g. the dashboard redraw timer).
+
+    The writer never takes a lock: it bumps a sequence counter to an odd
+    value, writes the row, then bumps it back to even. Readers copy the
+    ring and retry if the counter moved while they were copying, so a slow
+    reader can never stall intake.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, channels=LIVE_CHANNELS):
+        self.capacity = capacity
+        self.channels = tuple(channels)
+        self._col = {name: i for i, name in enumerate(self.channels)}
+        self._data = np.zeros((capacity, len(self.channels)), dtype=np.float64)
+        self._count = 0         # total samples ever written
+        self._seq = 0           # odd while a write is in progress
+        self.last_recv_ns = 0   # monotonic receipt time of the newest sample
+
+    def append(self, frame):
+        """Write one ingestion frame (dict) into the ring."""
+        row = np.empty(len(self.channels))
+        for name, i in self._col.items():
+            row[i] = frame.get(name, np.nan)
+
+        tires = frame.get("tire_temp_c")
+        if tires is not None:
+            row[self._col["tire_temp_fl"]:self._col["tire_temp_rr"] + 1] = tires
+
+        self._seq += 1
+        self._data[self._count % self.capacity] = row
+        self._count += 1
+        self._seq += 1
+
+    @property
+    def total_samples(self):
+        return self._count
+
+    def snapshot(self, max_samples=None):
+        """
+        Return a consistent copy of the most recent samples, oldest first,
+        as a dict of channel name -> 1-D array.
+        """
+        while True:
+            seq_before = self._seq
+            if seq_before & 1:
+                time.sleep(0)   # writer mid-update, yield and retry
+                continue
+
+            count = self._count
+            data = self._data.copy()
+
+            if self._seq == seq_before:
+                break
+
+        n = min(count, self.capacity)
+        if max_samples is not None:
+            n = min(n, max_samples)
+
+        # Unroll the ring so the oldest retained sample comes first
+        end = count % self.capacity
+        order = (np.arange(end - n, end)) % self.capacity
+        window = data[order]
+
+        return {name: window[:, i] for name, i in self._col.items()}
+
+
+# ======================================
+# INGESTION THREAD
+# ======================================
+
+class LiveIngestionThread(threading.Thread):
+    """
+    Background thread that drains the ingestion stream into a
+    LiveTelemetryBuffer, independent of how fast the GUI redraws.
+
+    `filters` maps channel name -> online filter (anything with
+    .update(x), see processing.filters); each is applied once per frame.
+
+    `latency` (telemetry.latency.LatencyTracker) records the process and
+    ingest hops per frame from one clock read once the filtered sample is
+    buffered, and counts frames missing from the stream (gaps in t_s
+    longer than 1.5 periods) as dropped.
+    """
+
+    def __init__(self, buffer, rate_hz=100.0, stream_factory=telemetry_stream, filters=None,
+                 latency=None, car="car0"):
+        super().__init__(daemon=True, name="live-ingestion")
+        self.buffer = buffer
+        self.rate_hz = rate_hz
+        self.stream_factory = stream_factory
+        self.filters = filters or {}
+        self.latency = latency
+        self.car = car
+        self._stop_event = threading.Event()
+
+    def run(self):
+        period = 1.0 / self.rate_hz
+        last_t = None
+        clock = time.monotonic_ns
+
+        # Histograms are looked up once; per frame the tracker costs one
+        # clock read (shared by both hops) and two bound record() calls
+        tracked = self.latency is not None
+        if tracked:
+            record_process = self.latency.histogram("process", self.car).record
+            record_ingest = self.latency.histogram("ingest", self.car).record
+            max_gap = 1.5 * period
+
+        for frame in self.stream_factory(self.rate_hz):
+            t_recv = clock()
+            if self._stop_event.is_set():
+                break
+            for name, filt in self.filters.items():
+                if name in frame:
+                    frame[name] = filt.update(frame[name])
+
+            self.buffer.append(frame)
+            self.buffer.last_recv_ns = t_recv
+
+            if tracked:
+                elapsed = clock() - t_recv
+                record_process(elapsed)
+                record_ingest(elapsed)
+                t = frame.get("t_s")
+                if t is not None and last_t is not None and t - last_t > max_gap:
+                    self.latency.drop("ingest", self.car, int(round((t - last_t) / period)) - 1)
+                last_t = t
+
+    def stop(self):
+        self._stop_event.set()
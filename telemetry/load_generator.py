@@ -0,0 +1,375 @@
+"""
+Deterministic synthetic load generator.
+
+Builds physically plausible laps for N cars by warping the real Verstappen
+Bahrain lap: per-car pace, a smooth per-lap time warp, correlated channel
+noise, a small racing-line offset and a first-order tire thermal model.
+Every (seed, car, lap) draws from its own random stream, so a car's laps
+are identical whatever the size of the field.
+
+    python -m telemetry.load_generator --cars 20 --hz 300 --laps 2 --out data/loadgen
+    python -m telemetry.load_generator --cars 20 --hz 300 --udp 127.0.0.1:20777 --duration 30
+    python -m telemetry.load_generator --hz 100 --shm --car 0 --duration 60
+"""
+
+import argparse
+import os
+import socket
+import struct
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.filters import ema
+from processing.schema_registry import read_telemetry, time_seconds
+from telemetry.shm_transport import SEGMENT_NAME, ShmRingWriter
+
+# ======================================
+# CONFIG
+# ======================================
+
+BASE_LAP_PATH = "data/fastf1/bahrain_2023_verstappen.csv"
+DEFAULT_OUT_DIR = "data/loadgen"
+DEFAULT_UDP = ("127.0.0.1", 20777)
+
+PACE_SPREAD = 0.012             # per-car lap time factor, std
+LAP_WARP = 0.02                 # per-lap local time warp amplitude
+WARP_KNOT_S = 4.0               # correlation length of the warp / noise
+SPEED_NOISE_KMH = 1.5
+THROTTLE_NOISE_PCT = 2.0
+RPM_NOISE = 80.0
+LINE_OFFSET_M = 1.0             # racing-line offset from the reference lap
+START_SPACING_S = 0.8           # cars start this far apart on track
+
+# Tire thermal model: heat from braking and from speed (sliding / flexing),
+# Newtonian cooling towards the track temperature
+AMBIENT_C = 32.0
+TIRE_START_C = 85.0
+HEAT_BRAKE = 2.0                # °C/s while braking
+HEAT_SPEED = 0.012              # °C/s per km/h
+COOLING = 0.04                  # 1/s
+CORNER_BIAS_C = (1.5, 0.0, 2.5, 1.0)    # FL, FR, RL, RR (clockwise track)
+
+# UDP frame: car, lap, t_s, then the udp_frame channels plus gear, x, y
+FRAME = struct.Struct("<HHd" + "f" * 11)
+FRAME_CHANNELS = (
+    "speed_kmh", "rpm", "throttle_pct", "brake_pct",
+    "tire_temp_fl", "tire_temp_fr", "tire_temp_rl", "tire_temp_rr",
+    "gear", "x", "y",
+)
+
+
+# ======================================
+# BASE LAP
+# ======================================
+
+def load_base_lap(path=BASE_LAP_PATH):
+    """Reference lap on its own time base with distance and track tangent."""
+    df, resolution = read_telemetry(path, ["time", "speed", "throttle", "brake", "rpm", "gear", "x", "y"])
+    t = time_seconds(df, resolution).to_numpy(dtype=np.float64)
+    x = df["x"].to_numpy(dtype=np.float64)
+    y = df["y"].to_numpy(dtype=np.float64)
+
+    # FastF1 X/Y are in 1/10 m
+    tx, ty = np.gradient(x), np.gradient(y)
+    norm = np.hypot(tx, ty)
+    norm[norm == 0] = 1.0
+
+    return {
+        "t": t - t[0],
+        "speed": df["speed"].to_numpy(dtype=np.float64),
+        "throttle": df["throttle"].to_numpy(dtype=np.float64),
+        "brake": df["brake"].astype(str).str.lower().isin(["true", "1", "1.0"]).to_numpy(dtype=np.float64),
+        "rpm": df["rpm"].to_numpy(dtype=np.float64),
+        "gear": df["gear"].to_numpy(dtype=np.float64),
+        "x": x,
+        "y": y,
+        "nx": -ty / norm,       # unit normal, for the racing-line offset
+        "ny": tx / norm,
+    }
+
+
+def _smooth_noise(rng, t, knot_s, scale):
+    """Band-limited noise: random knots every knot_s seconds, linearly joined."""
+    knots = np.arange(0.0, t[-1] + 2 * knot_s, knot_s)
+    return np.interp(t, knots, rng.standard_normal(len(knots)) * scale)
+
+
+def _step(t_new, t, values):
+    """Sample-and-hold resampling for discrete channels (gear, brake)."""
+    idx = np.clip(np.searchsorted(t, t_new, side="right") - 1, 0, len(t) - 1)
+    return values[idx]
+
+
+# ======================================
+# GENERATOR
+# ======================================
+
+class LoadGenerator:
+    """
+    Synthetic field: car c's lap l is a deterministic function of
+    (seed, c, l). Laps are generated on demand at `hz`.
+    """
+
+    def __init__(self, cars=20, hz=300.0, seed=0, base=None):
+        self.cars = cars
+        self.hz = hz
+        self.seed = seed
+        self.base = base or load_base_lap()
+        self.base_lap_s = self.base["t"][-1]
+
+        pace_rng = np.random.default_rng([seed, 0xFACE])
+        self.pace = 1.0 + PACE_SPREAD * np.abs(pace_rng.standard_normal(cars))
+        self.pace[0] = 1.0
+        self._tire_state = {c: np.full(4, TIRE_START_C) for c in range(cars)}
+        self._laps_done = {c: 0 for c in range(cars)}
+
+    def _rng(self, car, lap):
+        return np.random.default_rng([self.seed, car, lap])
+
+    def lap(self, car, lap):
+        """One lap of car `car` as a dict of float32 arrays on a uniform `hz` grid."""
+        b = self.base
+        rng = self._rng(car, lap)
+
+        # Warped lap clock: u(t) is the reference-lap time reached at time t
+        lap_s = self.base_lap_s * self.pace[car] * (1.0 + 0.002 * rng.standard_normal())
+        n = int(lap_s * self.hz)
+        t = np.arange(n) / self.hz
+        rate = 1.0 + LAP_WARP * _smooth_noise(rng, t, WARP_KNOT_S, 1.0)
+        u = np.cumsum(rate) / self.hz
+        u *= self.base_lap_s / u[-1]
+
+        speed = np.interp(u, b["t"], b["speed"]) * (u[-1] / lap_s) * rate
+        speed += _smooth_noise(rng, t, 0.5, SPEED_NOISE_KMH)
+        throttle = np.clip(np.interp(u, b["t"], b["throttle"]) + _smooth_noise(rng, t, 0.3, THROTTLE_NOISE_PCT), 0, 100)
+        brake = _step(u, b["t"], b["brake"])
+        gear = _step(u, b["t"], b["gear"])
+        rpm = np.interp(u, b["t"], b["rpm"]) + _smooth_noise(rng, t, 0.3, RPM_NOISE)
+
+        offset = _smooth_noise(rng, t, WARP_KNOT_S, LINE_OFFSET_M * 10.0)   # 1/10 m units
+        x = np.interp(u, b["t"], b["x"]) + offset * np.interp(u, b["t"], b["nx"])
+        y = np.interp(u, b["t"], b["y"]) + offset * np.interp(u, b["t"], b["ny"])
+
+        tires = self._tires(car, lap, speed, brake)
+
+        frame = {
+            "t_s": t,
+            "speed_kmh": np.maximum(speed, 0.0),
+            "rpm": np.clip(rpm, 3000, 15000),
+            "throttle_pct": throttle,
+            "brake_pct": brake * 100.0,
+            "gear": gear,
+            "x": x,
+            "y": y,
+        }
+        frame.update(dict(zip(["tire_temp_fl", "tire_temp_fr", "tire_temp_rl", "tire_temp_rr"], tires)))
+        return {k: v.astype(np.float32) if k != "t_s" else v for k, v in frame.items()}
+
+    def _tires(self, car, lap, speed, brake):
+        """
+        First-order thermal model per corner, T' = heat - k (T - ambient),
+        which is an EMA towards ambient + heat / k. Lap-to-lap state is
+        carried over, so laps must be generated in order per car.
+        """
+        if lap != self._laps_done[car]:
+            # Out-of-order request: restart this car's thermal history
+            self._tire_state[car] = np.full(4, TIRE_START_C)
+        alpha = COOLING / self.hz
+        heat = HEAT_BRAKE * brake + HEAT_SPEED * speed
+        target = AMBIENT_C + heat / COOLING
+
+        out = []
+        for corner, bias in enumerate(CORNER_BIAS_C):
+            start = self._tire_state[car][corner]
+            temp = ema(np.concatenate([[start], target + bias]), alpha)[1:]
+            self._tire_state[car][corner] = temp[-1]
+            out.append(temp)
+        self._laps_done[car] = lap + 1
+        return out
+
+    def field_lap(self, lap):
+        """Lap `lap` for every car: {car: frame arrays}."""
+        return {car: self.lap(car, lap) for car in range(self.cars)}
+
+
+# ======================================
+# SINKS
+# ======================================
+
+def write_files(gen, laps, out_dir=DEFAULT_OUT_DIR):
+    """One CSV per car in the udp_frame layout (plus car, lap, gear, x, y)."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for car in range(gen.cars):
+        parts, t_offset = [], 0.0
+        for lap in range(laps):
+            frame = gen.lap(car, lap)
+            part = pd.DataFrame(frame)
+            part["t_s"] += t_offset
+            t_offset = part["t_s"].iloc[-1] + 1.0 / gen.hz
+            part.insert(0, "lap", lap)
+            part.insert(0, "car", car)
+            parts.append(part)
+        path = os.path.join(out_dir, f"car_{car:02d}.csv")
+        pd.concat(parts, ignore_index=True).to_csv(path, index=False, float_format="%.4f")
+        paths.append(path)
+    return paths
+
+
+def pack_frame(car, lap, t_s, values):
+    return FRAME.pack(car, lap, t_s, *values)
+
+
+def unpack_frame(payload):
+    """UDP datagram -> ingestion frame dict (see telemetry_ingestion)."""
+    car, lap, t_s, *values = FRAME.unpack(payload)
+    frame = dict(zip(FRAME_CHANNELS, values))
+    frame.update({"car": car, "lap": lap, "t_s": t_s})
+    frame["tire_temp_c"] = [frame[k] for k in ("tire_temp_fl", "tire_temp_fr", "tire_temp_rl", "tire_temp_rr")]
+    return frame
+
+
+def send_udp(gen, duration_s, addr=DEFAULT_UDP):
+    """
+    Stream the field at gen.hz per car for duration_s: every tick sends one
+    datagram per car, paced against absolute deadlines (as telemetry_stream
+    does) so the rate does not drift. Returns (frames sent, achieved Hz per car).
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    period = 1.0 / gen.hz
+    offsets = (np.arange(gen.cars) * START_SPACING_S * gen.hz).astype(int)
+
+    laps = {car: 0 for car in range(gen.cars)}
+    frames = {car: gen.lap(car, 0) for car in range(gen.cars)}
+    blocks = {car: np.column_stack([frames[car][c] for c in FRAME_CHANNELS]) for car in range(gen.cars)}
+    idx = offsets % np.array([len(blocks[c]) for c in range(gen.cars)])
+
+    sent, ticks = 0, int(duration_s * gen.hz)
+    t0 = time.monotonic()
+    next_deadline = t0
+    for tick in range(ticks):
+        t_s = tick * period
+        for car in range(gen.cars):
+            if idx[car] >= len(blocks[car]):
+                laps[car] += 1
+                frames[car] = gen.lap(car, laps[car])
+                blocks[car] = np.column_stack([frames[car][c] for c in FRAME_CHANNELS])
+                idx[car] = 0
+            sock.sendto(pack_frame(car, laps[car], t_s, blocks[car][idx[car]]), addr)
+            idx[car] += 1
+            sent += 1
+
+        next_deadline += period
+        delay = next_deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    elapsed = time.monotonic() - t0
+    sock.close()
+    return sent, ticks / elapsed if elapsed > 0 else 0.0
+
+
+def _lap_rows(frame, channels):
+    """Lap frame -> (samples, channels) float64 block; absent channels are NaN."""
+    missing = np.full(len(frame["t_s"]), np.nan)
+    return np.column_stack([frame.get(c, missing) for c in channels]).astype(np.float64)
+
+
+def publish_shm(gen, duration_s, car=0, name=SEGMENT_NAME):
+    """
+    Publish one car at gen.hz into the shared-memory ring `name` for
+    duration_s, paced like send_udp; the dashboard's LIVE mode reads it via
+    shm_telemetry_stream. Returns (frames written, achieved Hz).
+    """
+    writer = ShmRingWriter(name)
+    period = 1.0 / gen.hz
+    lap, frame = 0, gen.lap(car, 0)
+    block = _lap_rows(frame, writer.channels)
+    t_col = writer.channels.index("t_s")
+
+    idx, ticks = 0, int(duration_s * gen.hz)
+    t0 = time.monotonic()
+    next_deadline = t0
+    try:
+        for tick in range(ticks):
+            if idx >= len(block):
+                lap += 1
+                frame = gen.lap(car, lap)
+                block = _lap_rows(frame, writer.channels)
+                idx = 0
+            row = block[idx]
+            row[t_col] = tick * period
+            writer.append(row)
+            idx += 1
+
+            next_deadline += period
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        writer.close()
+
+    elapsed = time.monotonic() - t0
+    return ticks, ticks / elapsed if elapsed > 0 else 0.0
+
+
+def udp_telemetry_stream(addr=DEFAULT_UDP, car=None):
+    """
+    stream_factory for LiveIngestionThread: frames received on the UDP
+    path (optionally only one car's).
+    """
+    def factory(rate_hz=None):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(addr)
+        try:
+            while True:
+                frame = unpack_frame(sock.recv(FRAME.size))
+                if car is None or frame["car"] == car:
+                    yield frame
+        finally:
+            sock.close()
+    return factory
+
+
+# ======================================
+# MAIN
+# ======================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic synthetic telemetry load")
+    parser.add_argument("--cars", type=int, default=20)
+    parser.add_argument("--hz", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--laps", type=int, default=1, help="laps per car for --out")
+    parser.add_argument("--out", default=None, help="write one CSV per car here")
+    parser.add_argument("--udp", default=None, help="host:port to stream to instead")
+    parser.add_argument("--shm", nargs="?", const=SEGMENT_NAME, default=None,
+                        help="publish one car to this shared-memory segment instead")
+    parser.add_argument("--car", type=int, default=0, help="car to publish with --shm")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to stream with --udp / --shm")
+    args = parser.parse_args()
+
+    gen = LoadGenerator(cars=args.cars, hz=args.hz, seed=args.seed)
+    print(f"Field: {args.cars} cars at {args.hz:.0f} Hz, seed {args.seed}, "
+          f"reference lap {gen.base_lap_s:.1f} s")
+
+    if args.udp:
+        host, port = args.udp.rsplit(":", 1)
+        sent, hz = send_udp(gen, args.duration, (host, int(port)))
+        print(f"\n✅ Sent {sent} frames ({hz:.1f} Hz per car, target {args.hz:.0f})")
+    elif args.shm:
+        print(f"Publishing car {args.car} to shared memory '{args.shm}' for {args.duration:.0f} s...")
+        written, hz = publish_shm(gen, args.duration, args.car, args.shm)
+        print(f"\n✅ Wrote {written} frames ({hz:.1f} Hz, target {args.hz:.0f})")
+    else:
+        t0 = time.perf_counter()
+        paths = write_files(gen, args.laps, args.out or DEFAULT_OUT_DIR)
+        rows = args.cars * args.laps * int(gen.base_lap_s * args.hz)
+        print(f"\n✅ Wrote {len(paths)} files (~{rows} samples) to {args.out or DEFAULT_OUT_DIR} "
+              f"in {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+import errno
+import itertools
+import os
+import socket
+import struct
+import time
+import zlib
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from telemetry.live_stream import LIVE_CHANNELS
+
+# ======================================
+# CONFIG
+# ======================================
+
+SEGMENT_NAME = "f1_live_telemetry"
+DEFAULT_CAPACITY = 3000         # 30 s of history at 100 Hz
+NOTIFY_DIR = "/tmp"             # Unix-domain socket for "new rows" wakeups
+
+# Target for one producer -> consumer hop on the same host, measured from
+# the producer's write to the consumer holding a view of the row (p99).
+# Assumes producer and consumer run on separate cores; sharing one core
+# adds a scheduler time slice to every wakeup.
+HOP_LATENCY_TARGET_US = 100.0
+
+MAGIC = 0x46315452              # "F1TR"
+VERSION = 2
+
+# Segment header, followed by the (capacity, n_channels) float64 ring
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u2"),
+    ("n_channels", "<u2"),
+    ("schema_id", "<u4"),       # crc32 of the channel names
+    ("capacity", "<u4"),
+    ("seq", "<u8"),             # seqlock: odd while a write is in progress
+    ("write_index", "<u8"),     # total rows ever written
+    ("writer_pid", "<u4"),      # owning producer, 0 once released
+])
+HEADER_BYTES = 64
+
+_NOTE = struct.Struct("<Q")     # notification payload: write_index
+
+_reader_ids = itertools.count()  # several readers may share one process
+
+
+def schema_id(channels):
+    """Stable id for a channel layout; readers refuse a mismatched writer."""
+    return zlib.crc32("\x1f".join(channels).encode())
+
+
+def notify_path(name):
+    return os.path.join(NOTIFY_DIR, f"{name}.sock")
+
+
+def frame_to_row(frame, channels=LIVE_CHANNELS):
+    """Ingestion frame (dict) -> one float64 row in channel order."""
+    row = np.array([frame.get(c, np.nan) for c in channels], dtype=np.float64)
+    tires = frame.get("tire_temp_c")
+    if tires is not None and "tire_temp_fl" in channels:
+        i = channels.index("tire_temp_fl")
+        row[i:i + 4] = tires
+    return row
+
+
+def segment_exists(name=SEGMENT_NAME):
+    """True if a producer has published segment `name` on this host."""
+    try:
+        _attach(name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _attach(name):
+    """Attach to an existing segment without adopting it: only the writer unlinks."""
+    shm = shared_memory.SharedMemory(name=name, create=False)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _claim_stale(name):
+    """
+    Unlink an existing segment only if its producer is known to be gone;
+    refuse while another writer (or an unknown owner) may still use it.
+    """
+    existing = _attach(name)
+    try:
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=existing.buf)
+        known = existing.size >= HEADER_BYTES and header["magic"] == MAGIC
+        owner = int(header["writer_pid"]) if known else -1
+        del header
+    finally:
+        existing.close()
+
+    if not known:
+        raise FileExistsError(f"Segment '{name}' exists and was not created by ShmRingWriter")
+    if _pid_alive(owner):
+        raise FileExistsError(f"Segment '{name}' is in use by writer pid {owner}")
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.register(existing._name, "shared_memory")
+    except Exception:
+        pass
+    existing.unlink()
+
+
+# ======================================
+# WRITER
+# ======================================
+
+class ShmRingWriter:
+    """
+    Single producer of a shared-memory ring segment.
+
+    Rows are written straight into the segment; consumers in other
+    processes map the same pages, so nothing is pickled or copied between
+    processes. After each write the producer wakes subscribed readers with
+    an 8-byte datagram on a Unix-domain socket (optional: readers can also
+    just poll the header).
+    """
+
+    def __init__(self, name=SEGMENT_NAME, channels=LIVE_CHANNELS, capacity=DEFAULT_CAPACITY, notify=True):
+        self.name = name
+        self.channels = tuple(channels)
+        self.capacity = capacity
+
+        size = HEADER_BYTES + capacity * len(self.channels) * 8
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a producer that crashed or closed without unlinking
+            _claim_stale(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        self.data = np.ndarray((capacity, len(self.channels)), dtype=np.float64,
+                               buffer=self.shm.buf, offset=HEADER_BYTES)
+        self.header["seq"] = 0
+        self.header["write_index"] = 0
+        self.header["capacity"] = capacity
+        self.header["n_channels"] = len(self.channels)
+        self.header["schema_id"] = schema_id(self.channels)
+        self.header["writer_pid"] = os.getpid()
+        self.header["version"] = VERSION
+        self.header["magic"] = MAGIC     # last: readers check it first
+
+        self._sock = None
+        self._subscribers = set()
+        if notify:
+            path = notify_path(name)
+            if os.path.exists(path):
+                os.unlink(path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(path)
+            self._sock.setblocking(False)
+
+    def append(self, row):
+        """Write one row (array in channel order, or an ingestion frame dict)."""
+        if isinstance(row, dict):
+            row = frame_to_row(row, self.channels)
+        self.append_many(np.asarray(row, dtype=np.float64)[None, :])
+
+    def append_many(self, rows):
+        """Write a (n, n_channels) block in at most two slice copies."""
+        rows = np.asarray(rows, dtype=np.float64)[-self.capacity:]
+        n = len(rows)
+        start = int(self.header["write_index"]) % self.capacity
+        first = min(n, self.capacity - start)
+
+        self.header["seq"] += 1
+        self.data[start:start + first] = rows[:first]
+        self.data[:n - first] = rows[first:]
+        self.header["write_index"] += n
+        self.header["seq"] += 1
+
+        if self._sock is not None:
+            self._notify()
+
+    def _notify(self):
+        # Pick up new subscribers (readers send their socket path once)
+        while True:
+            try:
+                _, addr = self._sock.recvfrom(64)
+            except BlockingIOError:
+                break
+            if addr:
+                self._subscribers.add(addr)
+
+        note = _NOTE.pack(int(self.header["write_index"]))
+        for addr in list(self._subscribers):
+            try:
+                self._sock.sendto(note, addr)
+            except BlockingIOError:
+                pass                    # reader's queue is full: it will catch up from the header
+            except OSError as exc:
+                if exc.errno in (errno.ECONNREFUSED, errno.ENOENT):
+                    self._subscribers.discard(addr)
+                else:
+                    raise
+
+    def close(self, unlink=True):
+        if self._sock is not None:
+            self._sock.close()
+            path = notify_path(self.name)
+            if os.path.exists(path):
+                os.unlink(path)
+        self.header["writer_pid"] = 0
+        del self.header, self.data
+        self.shm.close()
+        if unlink:
+            # A reader forked from this process shares its resource tracker
+            # and unregistered the name on attach; register again so unlink
+            # does not trip the tracker
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.register(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+            self.shm.unlink()
+
+
+# ======================================
+# READER
+# ======================================
+
+class ShmRingReader:
+    """
+    Consumer of a ring segment written by ShmRingWriter in another process.
+
+    poll() returns zero-copy views of the rows written since the last call;
+    a view stays valid until the writer laps the ring (capacity rows later),
+    so copy anything kept longer. Rows the writer overwrote before they were
+    read are counted in `dropped`.
+    """
+
+    def __init__(self, name=SEGMENT_NAME, channels=LIVE_CHANNELS, notify=True, timeout_s=5.0):
+        self.name = name
+        self.channels = tuple(channels)
+
+        deadline = time.monotonic() + timeout_s
+        while True:
+            try:
+                self.shm = _attach(name)
+                self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+                if self.header["magic"] == MAGIC:
+                    break
+                del self.header
+                self.shm.close()
+            except FileNotFoundError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No shared-memory segment '{name}' after {timeout_s:.1f} s")
+            time.sleep(0.01)
+
+        if self.header["schema_id"] != schema_id(self.channels):
+            raise ValueError(f"Segment '{name}' has a different channel layout")
+
+        self.capacity = int(self.header["capacity"])
+        self.data = np.ndarray((self.capacity, len(self.channels)), dtype=np.float64,
+                               buffer=self.shm.buf, offset=HEADER_BYTES)
+        self.cursor = int(self.header["write_index"])
+        self.dropped = 0
+        self.columns = {c: i for i, c in enumerate(self.channels)}   # channel -> row index
+
+        self._sock = None
+        if notify and os.path.exists(notify_path(name)):
+            self._path = notify_path(name) + f".{os.getpid()}.{next(_reader_ids)}"
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self._path)
+            self._sock.sendto(b"subscribe", notify_path(name))
+
+    def column(self, name):
+        return self.columns[name]
+
+    def poll(self):
+        """Views of the rows written since the last poll (0, 1 or 2 blocks)."""
+        end = int(self.header["write_index"])
+        if end - self.cursor > self.capacity:
+            self.dropped += end - self.cursor - self.capacity
+            self.cursor = end - self.capacity
+        if end == self.cursor:
+            return []
+
+        start = self.cursor % self.capacity
+        n = end - self.cursor
+        self.cursor = end
+        first = min(n, self.capacity - start)
+        blocks = [self.data[start:start + first]]
+        if n > first:
+            blocks.append(self.data[:n - first])
+        return blocks
+
+    def wait(self, timeout_s=1.0):
+        """Block until the writer announces new rows (or poll if no socket)."""
+        if int(self.header["write_index"]) != self.cursor:
+            return True
+        if self._sock is None:
+            time.sleep(min(timeout_s, 0.001))
+            return int(self.header["write_index"]) != self.cursor
+        self._sock.settimeout(timeout_s)
+        try:
+            self._sock.recv(_NOTE.size)
+        except socket.timeout:
+            return False
+        # Drain queued notifications; the header holds the truth
+        self._sock.setblocking(False)
+        try:
+            while True:
+                self._sock.recv(_NOTE.size)
+        except BlockingIOError:
+            pass
+        return True
+
+    def snapshot(self, max_samples=None):
+        """
+        Consistent copy of the most recent rows, oldest first, as
+        {channel: array} (same shape as LiveTelemetryBuffer.snapshot).
+        """
+        while True:
+            seq_before = int(self.header["seq"])
+            if not seq_before & 1:
+                count = int(self.header["write_index"])
+                data = self.data.copy()
+                if int(self.header["seq"]) == seq_before:
+                    break
+            time.sleep(0)               # let the writer finish its update
+
+        n = min(count, self.capacity)
+        if max_samples is not None:
+            n = min(n, max_samples)
+        order = np.arange(count - n, count) % self.capacity
+        window = data[order]
+        return {name: window[:, i] for name, i in self.columns.items()}
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+        del self.header, self.data
+        self.shm.close()
+
+
+def shm_telemetry_stream(name=SEGMENT_NAME):
+    """
+    stream_factory for LiveIngestionThread: yields frames published to a
+    segment by another process instead of generating them locally.
+    """
+    def factory(rate_hz=None):
+        reader = ShmRingReader(name)
+        try:
+            while True:
+                reader.wait()
+                for block in reader.poll():
+                    for row in block:
+                        yield dict(zip(reader.channels, row.tolist()))
+        finally:
+            reader.close()
+    return factory
+
+
+# ======================================
+# LATENCY CHECK (PRODUCER -> CONSUMER PROCESS)
+# ======================================
+
+def _consumer(name, n_frames, results):
+    reader = ShmRingReader(name)
+    t_col = reader.column("t_s")
+    latencies = []
+    while len(latencies) < n_frames:
+        if not reader.wait(timeout_s=2.0):
+            break
+        now = time.monotonic()
+        for block in reader.poll():
+            latencies.extend(now - block[:, t_col])
+    results.put((np.asarray(latencies) * 1e6, reader.dropped))
+    reader.close()
+
+
+def measure_hop_latency(n_frames=5000, rate_hz=1000.0):
+    """p50/p99/max microseconds from write to consumer view, across processes."""
+    import multiprocessing as mp
+
+    name = f"{SEGMENT_NAME}_bench_{os.getpid()}"
+    writer = ShmRingWriter(name)
+    results = mp.Queue()
+    proc = mp.Process(target=_consumer, args=(name, n_frames, results))
+    proc.start()
+
+    # Wait for the consumer to subscribe before streaming
+    deadline = time.monotonic() + 5.0
+    while not writer._subscribers and time.monotonic() < deadline:
+        writer._notify()
+        time.sleep(0.01)
+
+    row = np.zeros(len(writer.channels))
+    t_col = writer.channels.index("t_s")
+    period = 1.0 / rate_hz
+    next_deadline = time.monotonic()
+    for _ in range(n_frames):
+        row[t_col] = time.monotonic()          # CLOCK_MONOTONIC is system-wide
+        writer.append(row)
+        next_deadline += period
+        delay = next_deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    lat_us, dropped = results.get(timeout=10.0)
+    proc.join()
+    writer.close()
+    return {
+        "frames": len(lat_us),
+        "dropped": dropped,
+        "p50_us": float(np.percentile(lat_us, 50)),
+        "p99_us": float(np.percentile(lat_us, 99)),
+        "max_us": float(lat_us.max()),
+    }
+
+
+if __name__ == "__main__":
+    print("Measuring shared-memory hop latency (producer -> consumer process)...\n")
+    stats = measure_hop_latency()
+    for key, value in stats.items():
+        print(f"  {key:>8}: {value:.1f}" if isinstance(value, float) else f"  {key:>8}: {value}")
+
+    ok = stats["p99_us"] <= HOP_LATENCY_TARGET_US
+    print(f"\n{'✅' if ok else '⚠️'} p99 {stats['p99_us']:.1f} µs vs target {HOP_LATENCY_TARGET_US:.0f} µs per hop")
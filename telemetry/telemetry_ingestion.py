@@ -17,6 +17,28 @@ def generate_telemetry():
     }
     return telemetry
 
+def telemetry_stream(rate_hz=100.0, source=generate_telemetry):
+    """
+    Yield telemetry frames at a fixed rate, each stamped with 't_s'
+    (seconds since the stream started).
+
+    Sleeps against absolute deadlines so the rate does not drift; if the
+    consumer falls behind, frames are produced back-to-back until caught up.
+    """
+    period = 1.0 / rate_hz
+    t0 = time.monotonic()
+    next_deadline = t0
+
+    while True:
+        frame = source()
+        frame["t_s"] = time.monotonic() - t0
+        yield frame
+
+        next_deadline += period
+        delay = next_deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
 if __name__ == "__main__":
     print("Starting telemetry stream...\n")
 
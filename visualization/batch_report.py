@@ -0,0 +1,312 @@
+"""
+Batch session report.
+
+Renders speed / braking / acceleration plots for every lap of every driver
+in the processed datasets, headlessly with the Agg backend, across a process
+pool, renders the session comparisons (multi-lap overlays and delta time,
+SIM vs F1, FastF1 braking zones by corner) on the same pool and writes an
+index.html linking all images:
+
+    python -m visualization.batch_report --out reports/session
+"""
+
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from processing.columnar import load_processed
+from processing.events import INPUT_COLUMNS
+from processing.profiling import count, section, timed
+from visualization import fastf1_braking_accel_plot, multi_lap_comparison, unified_sim_vs_f1_comparison
+
+# ======================================
+# CONFIG
+# ======================================
+
+DATASETS = {
+    "SIM": "data/sim_racing/processed_rio_race_engineering.csv",
+    "F1": "data/fastf1/processed_fastf1_race_engineering.csv",
+}
+
+DEFAULT_OUT_DIR = "reports/session"
+DEFAULT_WORKERS = os.cpu_count() or 2
+
+# Channels the report reads (driver/lap and the brake flag are optional)
+COLUMNS = ["driver", "lap", "distance_m", "speed", "long_accel", "brake", "brake_event"]
+
+FIGSIZE = (10, 8)
+DPI = 100
+
+
+# ======================================
+# DATA
+# ======================================
+
+@timed
+def load_dataset(path):
+    """Load a processed file and make sure it has driver and lap keys."""
+    df = load_processed(path, columns=COLUMNS)
+
+    if "driver" not in df.columns:
+        df["driver"] = "ALL"
+    df["driver"] = df["driver"].astype(str)
+    if "lap" not in df.columns:
+        df["lap"] = 0
+
+    # SIM data flags braking in brake_event, FastF1 in brake
+    df["brake_flag"] = df["brake_event"] if "brake_event" in df.columns else df["brake"]
+
+    return df
+
+
+def list_jobs(datasets):
+    """One job per (dataset, driver, lap)."""
+    jobs = []
+    for label, path in datasets.items():
+        if not os.path.exists(path):
+            print(f"WARNING: {label} dataset not found at {path}, skipping.")
+            continue
+
+        df = load_dataset(path)
+        keys = df[["driver", "lap"]].drop_duplicates().sort_values(["driver", "lap"])
+        for driver, lap in keys.itertuples(index=False):
+            jobs.append((label, str(driver), int(lap)))
+
+    return jobs
+
+
+# ======================================
+# FIGURE TEMPLATE (ONE PER WORKER)
+# ======================================
+
+_worker = None
+
+
+def build_template():
+    """Create the report figure once; every job only swaps its data."""
+    fig, (ax_speed, ax_accel) = plt.subplots(2, 1, figsize=FIGSIZE, dpi=DPI, sharex=True)
+
+    speed_line, = ax_speed.plot([], [], label="Speed")
+    brake_points = ax_speed.scatter([], [], s=8, color="red", label="Braking Zones")
+    accel_line, = ax_accel.plot([], [], label="Longitudinal Acceleration")
+
+    ax_speed.set_ylabel("Speed (km/h)")
+    ax_speed.legend(loc="lower right")
+    ax_speed.grid(True)
+
+    ax_accel.axhline(0, color="black", linewidth=0.5)
+    ax_accel.set_xlabel("Distance (m)")
+    ax_accel.set_ylabel("Acceleration (m/s²)")
+    ax_accel.grid(True)
+
+    return {
+        "fig": fig,
+        "ax_speed": ax_speed,
+        "ax_accel": ax_accel,
+        "speed_line": speed_line,
+        "brake_points": brake_points,
+        "accel_line": accel_line,
+    }
+
+
+def _init_worker(datasets):
+    global _worker
+
+    frames = {
+        label: load_dataset(path).groupby(["driver", "lap"])
+        for label, path in datasets.items()
+        if os.path.exists(path)
+    }
+    _worker = {"frames": frames, "template": build_template()}
+
+
+def render_lap(job, out_dir):
+    """Fill the template with one lap and save it; returns (job, filename)."""
+    label, driver, lap = job
+    lap_df = _worker["frames"][label].get_group((driver, lap))
+    t = _worker["template"]
+
+    distance = lap_df["distance_m"].values
+    t["speed_line"].set_data(distance, lap_df["speed"].values)
+    t["accel_line"].set_data(distance, lap_df["long_accel"].values)
+
+    braking = lap_df[lap_df["brake_flag"] == 1]
+    t["brake_points"].set_offsets(braking[["distance_m", "speed"]].values.reshape(-1, 2))
+
+    for ax in [t["ax_speed"], t["ax_accel"]]:
+        ax.relim()
+        ax.autoscale_view()
+
+    t["ax_speed"].set_title(f"{label} — {driver} — Lap {lap}: Speed vs Distance with Braking Zones")
+    t["ax_accel"].set_title("Acceleration vs Distance")
+
+    filename = f"{label}_{driver}_lap{lap:03d}.png"
+    t["fig"].savefig(os.path.join(out_dir, filename))
+
+    return job, filename
+
+
+# ======================================
+# SESSION COMPARISONS
+# ======================================
+
+def list_session_jobs(datasets, lap_jobs):
+    """
+    One job per session comparison the datasets support: a multi-lap
+    comparison per driver with two or more laps, SIM vs F1, and the FastF1
+    braking zones by corner.
+    """
+    laps = {}
+    for label, driver, lap in lap_jobs:
+        laps.setdefault((label, driver), set()).add(lap)
+    jobs = [("multilap", label, driver) for (label, driver), seen in laps.items() if len(seen) >= 2]
+
+    sim_path, f1_path = datasets.get("SIM"), datasets.get("F1")
+    f1_exists = bool(f1_path) and os.path.exists(f1_path)
+    if f1_exists and sim_path and os.path.exists(sim_path):
+        jobs.append(("sim_vs_f1", "SIM", "F1"))
+    if f1_exists:
+        jobs.append(("f1_corners", "F1", None))
+    return jobs
+
+
+def _session_figures(job, datasets):
+    """(title, name, figure) for one session comparison job."""
+    kind, label, driver = job
+    figures = []
+
+    if kind == "multilap":
+        df = load_processed(datasets[label], columns=multi_lap_comparison.COLUMNS + ["driver"])
+        if "driver" in df.columns:
+            df = df[df["driver"].astype(str) == driver]
+        title = f"{label} — {driver} — Multi-Lap Comparison"
+        for name, fig in multi_lap_comparison.build_overlays(df):
+            figures.append((title, f"{label}_{driver}_multilap_{name}", fig))
+        for name, fig in multi_lap_comparison.build_delta(df):
+            figures.append((title, f"{label}_{driver}_multilap_{name}", fig))
+
+    elif kind == "sim_vs_f1":
+        columns = unified_sim_vs_f1_comparison.COLUMNS
+        sim_df = load_processed(datasets["SIM"], columns=columns)
+        sim_lap = sim_df[sim_df["lap"] == sim_df["lap"].min()] if "lap" in sim_df.columns else sim_df
+        comparison = unified_sim_vs_f1_comparison.compare_laps(sim_lap, load_processed(datasets["F1"], columns=columns))
+        for name, fig in unified_sim_vs_f1_comparison.build_figures(*comparison):
+            figures.append(("SIM vs F1", f"sim_vs_f1_{name}", fig))
+
+    elif kind == "f1_corners":
+        f1_df = load_processed(datasets["F1"], columns=INPUT_COLUMNS)
+        zones = fastf1_braking_accel_plot.braking_zones(f1_df)
+        for name, fig in fastf1_braking_accel_plot.build_figures(f1_df, *zones):
+            figures.append(("F1 — Braking Zones by Corner", f"F1_corners_{name}", fig))
+
+    return figures
+
+
+def render_session(job, datasets, out_dir):
+    """Build and save one session comparison in a worker; returns [(title, filename)]."""
+    saved = []
+    for title, name, fig in _session_figures(job, datasets):
+        filename = f"session_{name}.png"
+        fig.set_size_inches(*FIGSIZE)
+        fig.savefig(os.path.join(out_dir, filename), dpi=DPI)
+        plt.close(fig)
+        saved.append((title, filename))
+    return saved
+
+
+# ======================================
+# INDEX PAGE
+# ======================================
+
+def write_index(out_dir, results, session=()):
+    rows = []
+    current = None
+    for title, filename in session:
+        if title != current:
+            current = title
+            rows.append(f"<h2>{html.escape(title)}</h2>")
+        rows.append(
+            f'<a href="{html.escape(filename)}"><img src="{html.escape(filename)}" width="320"></a>'
+        )
+
+    current = None
+    for (label, driver, lap), filename in sorted(results):
+        if (label, driver) != current:
+            current = (label, driver)
+            rows.append(f"<h2>{html.escape(label)} — {html.escape(driver)}</h2>")
+        rows.append(
+            f'<a href="{html.escape(filename)}"><img src="{html.escape(filename)}" '
+            f'width="320" title="Lap {lap}"></a>'
+        )
+
+    page = (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        "<title>Session Report</title></head><body>\n"
+        "<h1>Session Report</h1>\n" + "\n".join(rows) + "\n</body></html>\n"
+    )
+
+    index_path = os.path.join(out_dir, "index.html")
+    with open(index_path, "w") as f:
+        f.write(page)
+    return index_path
+
+
+# ======================================
+# BATCH RUN
+# ======================================
+
+def generate_report(datasets=DATASETS, out_dir=DEFAULT_OUT_DIR, workers=DEFAULT_WORKERS):
+    os.makedirs(out_dir, exist_ok=True)
+
+    jobs = list_jobs(datasets)
+    if not jobs:
+        print("No laps found, nothing to render.")
+        return None
+
+    session_jobs = list_session_jobs(datasets, jobs)
+    print(f"Rendering {len(jobs)} lap reports and {len(session_jobs)} session comparisons "
+          f"on {workers} worker(s)...")
+    t0 = time.perf_counter()
+
+    # Small chunks keep workers busy without shipping one job per round trip
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(datasets,),
+    ) as pool, section("batch_report.render_pool"):
+        # Figures are drawn in the workers; only the fan-out is timed here.
+        # Comparisons are the slowest jobs, so they are queued first
+        pending = [pool.submit(render_session, job, datasets, out_dir) for job in session_jobs]
+        results = list(pool.map(render_lap, jobs, [out_dir] * len(jobs), chunksize=chunksize))
+        session = [saved for future in pending for saved in future.result()]
+    count("figures_rendered", len(results) + len(session))
+
+    elapsed = time.perf_counter() - t0
+    index_path = write_index(out_dir, results, session)
+
+    n_figures = len(results) + len(session)
+    print(f"\n✅ {n_figures} figures in {elapsed:.1f} s "
+          f"({n_figures / elapsed:.1f} figures/s)")
+    print(f"Index: {index_path}")
+
+    return index_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch report for every driver and lap")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    generate_report(out_dir=args.out, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
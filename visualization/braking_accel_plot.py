@@ -1,56 +1,79 @@
-import pandas as pd
+import argparse
+
 import matplotlib.pyplot as plt
 
+from processing.columnar import load_processed
+
 # ======================================
-# LOAD PROCESSED RACE TELEMETRY
+# CONFIG
 # ======================================
 
 DATA_PATH = "data/sim_racing/processed_rio_race_engineering.csv"
-df = pd.read_csv(DATA_PATH)
+COLUMNS = ["lap", "distance_m", "speed", "brake_event", "long_accel"]
 
-print("Loaded processed telemetry:", len(df), "samples")
+# Every lap of every driver: python -m visualization.batch_report
+DEFAULT_LAP = 0
 
 # ======================================
-# FILTER TO A SINGLE LAP (START WITH LAP 0)
+# FIGURES FOR ONE LAP
 # ======================================
 
-lap_to_plot = 0
-lap_df = df[df["lap"] == lap_to_plot]
+def build_lap_figures(lap_df, lap):
+    """(name, figure) pairs: speed with braking zones, acceleration."""
+    distance = lap_df["distance_m"]
+    speed = lap_df["speed"]
+    brake_event = lap_df["brake_event"]
+    long_accel = lap_df["long_accel"]
 
-print("Samples in lap:", len(lap_df))
+    # ======================================
+    # PLOT 1 — SPEED VS DISTANCE WITH BRAKING
+    # ======================================
 
-distance = lap_df["distance_m"]
-speed = lap_df["speed"]
-brake = lap_df["brake"]
-brake_event = lap_df["brake_event"]
-long_accel = lap_df["long_accel"]
+    fig_speed, ax = plt.subplots()
+    ax.plot(distance, speed)
 
-# ======================================
-# PLOT 1 — SPEED VS DISTANCE WITH BRAKING
-# ======================================
+    # Overlay braking zones
+    braking_points = lap_df[brake_event == 1]
+    ax.scatter(braking_points["distance_m"], braking_points["speed"])
+
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Speed")
+    ax.set_title(f"Speed vs Distance with Braking Zones (Lap {lap})")
+    ax.grid(True)
+
+    # ======================================
+    # PLOT 2 — LONGITUDINAL ACCELERATION VS DISTANCE
+    # ======================================
 
-plt.figure()
-plt.plot(distance, speed)
+    fig_accel, ax = plt.subplots()
+    ax.plot(distance, long_accel)
 
-# Overlay braking zones
-braking_points = lap_df[brake_event == 1]
-plt.scatter(braking_points["distance_m"], braking_points["speed"])
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Longitudinal Acceleration")
+    ax.set_title(f"Acceleration vs Distance (Lap {lap})")
+    ax.grid(True)
+
+    return [("speed_braking", fig_speed), ("accel", fig_accel)]
 
-plt.xlabel("Distance (m)")
-plt.ylabel("Speed")
-plt.title("Speed vs Distance with Braking Zones (Lap 0)")
-plt.grid(True)
-plt.show()
 
 # ======================================
-# PLOT 2 — LONGITUDINAL ACCELERATION VS DISTANCE
+# MAIN
 # ======================================
 
-plt.figure()
-plt.plot(distance, long_accel)
+def main():
+    parser = argparse.ArgumentParser(description="Speed, braking and acceleration for one lap")
+    parser.add_argument("--lap", type=int, default=DEFAULT_LAP)
+    args = parser.parse_args()
+
+    df = load_processed(DATA_PATH, columns=COLUMNS)
+    print("Loaded processed telemetry:", len(df), "samples")
+
+    lap_df = df[df["lap"] == args.lap]
+    print("Samples in lap:", len(lap_df))
+
+    build_lap_figures(lap_df, args.lap)
+    plt.show()
+
 
-plt.xlabel("Distance (m)")
-plt.ylabel("Longitudinal Acceleration")
-plt.title("Acceleration vs Distance (Lap 0)")
-plt.grid(True)
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import numpy as np
+
+# ======================================
+# CONFIG
+# ======================================
+
+MIN_SPEED = 0.0
+MAX_SPEED = 350.0
+
+BRAKE_RGBA = (1.0, 0.0, 0.0, 1.0)
+
+
+# ======================================
+# RAMPS (EVALUATED ONCE, AT TABLE BUILD TIME)
+# ======================================
+
+def heat_ramp(ratio):
+    """Continuous blue → yellow → red ramp for ratios in [0, 1]."""
+    ratio = np.clip(ratio, 0, 1)
+    low = ratio < 0.5
+
+    r = np.where(low, ratio * 2, 1.0)
+    g = np.where(low, ratio * 2, 1 - (ratio - 0.5) * 2)
+    b = np.where(low, 1 - ratio * 2, 0.0)
+
+    return np.stack([r, g, b, np.ones_like(ratio)], axis=-1)
+
+
+def band_ramp(speed, bands=((120, (0.1, 0.4, 1.0)), (230, (1.0, 1.0, 0.1))),
+              top=(1.0, 0.1, 0.1)):
+    """Stepped colours: each (limit, rgb) applies below its limit."""
+    rgb = np.empty(speed.shape + (3,))
+    rgb[:] = top
+    for limit, color in reversed(bands):
+        rgb[speed < limit] = color
+
+    return np.concatenate([rgb, np.ones(speed.shape + (1,))], axis=-1)
+
+
+# ======================================
+# LOOKUP TABLE
+# ======================================
+
+class SpeedColorLUT:
+    """
+    Precomputed speed → RGBA table.
+
+    The ramp is evaluated once per bin; mapping a whole lap (or a
+    frames x cars matrix) is then a single fancy-indexing op. Bins are
+    `bin_width` km/h wide and speeds are floored into them, so integer
+    band limits stay exact.
+    """
+
+    def __init__(self, ramp="heat", min_speed=MIN_SPEED, max_speed=MAX_SPEED,
+                 bin_width=1.0, brake_rgba=BRAKE_RGBA, brake_threshold=0.0):
+        self.min_speed = min_speed
+        self.bin_width = bin_width
+        self.n_bins = int(np.ceil((max_speed - min_speed) / bin_width)) + 1
+        self.brake_rgba = np.asarray(brake_rgba, dtype=np.float64)
+        self.brake_threshold = brake_threshold
+
+        bin_speeds = min_speed + np.arange(self.n_bins) * bin_width
+        if ramp == "heat":
+            self.table = heat_ramp((bin_speeds - min_speed) / (max_speed - min_speed))
+        elif ramp == "bands":
+            self.table = band_ramp(bin_speeds)
+        else:
+            raise ValueError(f"Unknown ramp: {ramp}")
+
+    def indices(self, speed):
+        idx = ((np.asarray(speed, dtype=np.float64) - self.min_speed) / self.bin_width).astype(np.intp)
+        return np.clip(idx, 0, self.n_bins - 1)
+
+    def colors(self, speed, brake=None):
+        """
+        RGBA for every sample, shape speed.shape + (4,). Samples with
+        brake above the threshold are overridden with the brake colour.
+        """
+        rgba = self.table[self.indices(speed)]
+
+        if brake is not None:
+            braking = np.asarray(brake, dtype=np.float64) > self.brake_threshold
+            rgba = np.where(braking[..., None], self.brake_rgba, rgba)
+
+        return rgba
+
+
+# Shared instances used by the replays
+HEAT_LUT = SpeedColorLUT(ramp="heat")
+BAND_LUT = SpeedColorLUT(ramp="bands", brake_rgba=(0.8, 0.1, 0.1, 1.0), brake_threshold=0.05)
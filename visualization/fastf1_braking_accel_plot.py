@@ -1,84 +1,110 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 
+from processing.columnar import load_processed
+from processing.events import INPUT_COLUMNS, extract_events, load_corner_catalogue, assign_corners
+
 # ======================================
-# LOAD PROCESSED FASTF1 TELEMETRY
+# CONFIG
 # ======================================
 
 DATA_PATH = "data/fastf1/processed_fastf1_race_engineering.csv"
-df = pd.read_csv(DATA_PATH)
-
-print("Loaded processed FastF1 telemetry:", len(df), "samples")
 
 # ======================================
-# BASIC SANITY CHECK
+# BRAKING / FULL-THROTTLE INTERVALS + CORNER CATALOGUE
 # ======================================
 
-print("\nColumns:")
-print(df.columns.tolist())
+def braking_zones(df):
+    """Corner catalogue, braking zones tagged by corner, full-throttle zones."""
+    catalogue = load_corner_catalogue(processed=df)
+    events = extract_events(df)
+    braking = assign_corners(events["braking"], catalogue)
+    return catalogue, braking, events["full_throttle"]
+
 
 # ======================================
-# EXTRACT ENGINEERING SIGNALS
+# FIGURES
 # ======================================
 
-distance = df["distance_m"]
-speed = df["speed"]
-long_accel = df["long_accel"]
-brake_event = df["brake"]
-full_throttle = df["full_throttle"]
+def build_figures(df, catalogue, braking, throttle_zones):
+    """(name, figure) pairs for the speed, acceleration and throttle plots."""
+    distance = df["distance_m"]
+    speed = df["speed"]
+    long_accel = df["long_accel"]
 
-# ======================================
-# PLOT 1 — SPEED VS DISTANCE WITH BRAKING ZONES
-# ======================================
+    # ======================================
+    # PLOT 1 — SPEED VS DISTANCE WITH BRAKING ZONES
+    # ======================================
 
-plt.figure()
-plt.plot(distance, speed, label="Speed")
-
-# Overlay braking points
-braking_points = df[brake_event == 1]
-plt.scatter(
-    braking_points["distance_m"],
-    braking_points["speed"],
-    label="Braking Zones",
-    s=10
-)
-
-plt.xlabel("Distance (m)")
-plt.ylabel("Speed (km/h)")
-plt.title("FastF1 — Speed vs Distance with Braking Zones")
-plt.legend()
-plt.grid(True)
-plt.show()
+    fig_speed, ax = plt.subplots()
+    ax.plot(distance, speed, label="Speed")
 
-# ======================================
-# PLOT 2 — LONGITUDINAL ACCELERATION VS DISTANCE
-# ======================================
+    # Shade each braking interval, label corners at their apex
+    for i, zone in enumerate(braking.itertuples()):
+        ax.axvspan(zone.start_distance_m, zone.end_distance_m, color="red", alpha=0.2,
+                   label="Braking Zones" if i == 0 else None)
+
+    for corner in catalogue.itertuples():
+        ax.annotate(f"C{corner.corner}", (corner.apex_distance_m, corner.apex_speed),
+                    textcoords="offset points", xytext=(0, -12), ha="center", fontsize=8)
+
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Speed (km/h)")
+    ax.set_title("FastF1 — Speed vs Distance with Braking Zones")
+    ax.legend()
+    ax.grid(True)
+
+    # ======================================
+    # PLOT 2 — LONGITUDINAL ACCELERATION VS DISTANCE
+    # ======================================
+
+    fig_accel, ax = plt.subplots()
+    ax.plot(distance, long_accel, label="Longitudinal Acceleration")
 
-plt.figure()
-plt.plot(distance, long_accel, label="Longitudinal Acceleration")
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Acceleration (m/s²)")
+    ax.set_title("FastF1 — Acceleration vs Distance")
+    ax.legend()
+    ax.grid(True)
+
+    # ======================================
+    # OPTIONAL — FULL THROTTLE PHASE OVERLAY
+    # ======================================
+
+    fig_throttle, ax = plt.subplots()
+    ax.plot(distance, speed, label="Speed")
+
+    for i, zone in enumerate(throttle_zones.itertuples()):
+        ax.axvspan(zone.start_distance_m, zone.end_distance_m, color="green", alpha=0.2,
+                   label="Full Throttle" if i == 0 else None)
+
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Speed (km/h)")
+    ax.set_title("FastF1 — Full Throttle Zones")
+    ax.legend()
+    ax.grid(True)
+
+    return [("speed_braking", fig_speed), ("accel", fig_accel), ("full_throttle", fig_throttle)]
 
-plt.xlabel("Distance (m)")
-plt.ylabel("Acceleration (m/s²)")
-plt.title("FastF1 — Acceleration vs Distance")
-plt.legend()
-plt.grid(True)
-plt.show()
 
 # ======================================
-# OPTIONAL — FULL THROTTLE PHASE OVERLAY
+# MAIN
 # ======================================
 
-plt.figure()
-plt.scatter(
-    df[full_throttle == 1]["distance_m"],
-    df[full_throttle == 1]["speed"],
-    s=5,
-    label="Full Throttle"
-)
-
-plt.xlabel("Distance (m)")
-plt.ylabel("Speed (km/h)")
-plt.title("FastF1 — Full Throttle Zones")
-plt.legend()
-plt.grid(True)
-plt.show()
\ No newline at end of file
+def main():
+    df = load_processed(DATA_PATH, columns=INPUT_COLUMNS)
+    print("Loaded processed FastF1 telemetry:", len(df), "samples")
+
+    print("\nColumns:")
+    print(df.columns.tolist())
+
+    catalogue, braking, throttle_zones = braking_zones(df)
+
+    print("\nBraking zones per corner:")
+    print(braking[["corner", "start_distance_m", "entry_speed", "min_speed", "peak_decel"]].to_string(index=False))
+
+    build_figures(df, catalogue, braking, throttle_zones)
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
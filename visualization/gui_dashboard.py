@@ -1,8 +1,7 @@
 import sys
-import pandas as pd
 from mpl_toolkits.mplot3d import Axes3D
 from PyQt5.QtWidgets import QSlider
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget,
@@ -13,10 +12,40 @@ from PyQt5.QtWidgets import (
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+from telemetry.live_stream import LiveTelemetryBuffer, LiveIngestionThread
+from telemetry.shm_transport import SEGMENT_NAME, segment_exists, shm_telemetry_stream
+from telemetry.telemetry_ingestion import telemetry_stream
+from telemetry.latency import LatencyTracker
+from processing.filters import make_online_filters
+from processing.telemetry_store import F1_SESSION, SIM_SESSION, ensure_session, load_session
+
 
 SIM_PATH = "data/sim_racing/processed_rio_race_engineering.csv"
 F1_PATH = "data/fastf1/processed_fastf1_race_engineering.csv"
 
+# LIVE mode: ingestion runs at LIVE_INPUT_HZ on its own thread, the plots
+# redraw at LIVE_REFRESH_HZ from a snapshot of the last LIVE_WINDOW_S seconds
+LIVE_INPUT_HZ = 100.0
+LIVE_REFRESH_HZ = 20
+LIVE_WINDOW_S = 10.0
+
+# LIVE source: "shm" reads frames a producer publishes to shared memory
+# (python -m telemetry.load_generator --shm), "local" generates them
+# in-process, "auto" uses the segment when one exists
+LIVE_SOURCE = "auto"
+LIVE_SHM_SEGMENT = SEGMENT_NAME
+
+# Per-channel online smoothing in the ingestion thread (see processing.filters)
+LIVE_FILTERS = {
+    "speed_kmh": ("lowpass", {"cutoff_hz": 10.0}),
+    "rpm": ("ema", {"alpha": 0.3}),
+}
+
+# Live latency histograms (telemetry.latency): dumped to a JSON file while
+# LIVE runs; set a port to also serve them at http://127.0.0.1:<port>/metrics
+LIVE_LATENCY_DUMP_PATH = "reports/latency.json"
+LIVE_METRICS_PORT = None
+
 
 class TelemetryDashboard(QMainWindow):
     def __init__(self):
@@ -29,12 +58,25 @@ class TelemetryDashboard(QMainWindow):
         # LOAD DATA
         # ==============================
 
-        self.sim_df = pd.read_csv(SIM_PATH)
-        self.f1_df = pd.read_csv(F1_PATH)
+        # SIM laps are fetched from the store one at a time as the lap
+        # selector changes; the single F1 lap is read once
+        self.store = ensure_session(SIM_SESSION, SIM_PATH)
+        self.f1_df = load_session(F1_SESSION, F1_PATH, store=self.store)
 
         self.current_source = "SIM"
         self.current_lap = 0
 
+        # Live stream state (started on first switch to LIVE)
+        self.live_buffer = LiveTelemetryBuffer(
+            capacity=int(LIVE_INPUT_HZ * LIVE_WINDOW_S)
+        )
+        self.live_thread = None
+        self.latency = LatencyTracker()
+        self._drawn_recv_ns = 0     # receipt time of the newest sample in the pending draw
+        self.live_timer = QTimer(self)
+        self.live_timer.setInterval(int(1000 / LIVE_REFRESH_HZ))
+        self.live_timer.timeout.connect(self.update_live_plots)
+
         # ==============================
         # MAIN LAYOUT
         # ==============================
@@ -57,7 +99,7 @@ class TelemetryDashboard(QMainWindow):
 
         # Data source selector
         self.source_selector = QComboBox()
-        self.source_selector.addItems(["SIM", "F1"])
+        self.source_selector.addItems(["SIM", "F1", "LIVE"])
         self.source_selector.currentTextChanged.connect(self.change_source)
 
         control_panel.addWidget(QLabel("Data Source"))
@@ -114,7 +156,7 @@ class TelemetryDashboard(QMainWindow):
 
     def populate_laps(self):
         self.lap_selector.clear()
-        laps = sorted(self.sim_df["lap"].unique())
+        laps = self.store.laps(*SIM_SESSION)["lap"].tolist()
         for lap in laps:
             self.lap_selector.addItem(str(lap))
 
@@ -126,7 +168,11 @@ class TelemetryDashboard(QMainWindow):
         else:
             self.lap_selector.setEnabled(False)
 
-        self.update_plots()
+        if source == "LIVE":
+            self.start_live()
+        else:
+            self.live_timer.stop()
+            self.update_plots()
 
     def change_lap(self, idx):
         self.current_lap = idx
@@ -137,6 +183,10 @@ class TelemetryDashboard(QMainWindow):
     # ==============================
 
     def update_plots(self):
+        if self.current_source == "LIVE":
+            # Redraws are driven by the live timer
+            return
+
         self.fig.clear()
 
         ax1 = self.fig.add_subplot(311)                 # Speed vs Distance
@@ -144,7 +194,7 @@ class TelemetryDashboard(QMainWindow):
         ax3 = self.fig.add_subplot(313, projection='3d')  # 3D Track View
 
         if self.current_source == "SIM":
-            df = self.sim_df[self.sim_df["lap"] == self.current_lap]
+            df = self.store.query(*SIM_SESSION, laps=[self.current_lap])
 
             distance = df["distance_m"]
             speed = df["speed"]
@@ -244,6 +294,109 @@ class TelemetryDashboard(QMainWindow):
         self.fig.tight_layout()
         self.canvas.draw()
 
+    # ==============================
+    # LIVE STREAMING MODE
+    # ==============================
+
+    def live_stream_factory(self):
+        use_shm = LIVE_SOURCE == "shm" or (LIVE_SOURCE == "auto" and segment_exists(LIVE_SHM_SEGMENT))
+        if use_shm:
+            print(f"LIVE: reading shared-memory segment '{LIVE_SHM_SEGMENT}'")
+            return shm_telemetry_stream(LIVE_SHM_SEGMENT)
+        return telemetry_stream
+
+    def start_live(self):
+        if self.live_thread is None:
+            self.live_thread = LiveIngestionThread(
+                self.live_buffer,
+                rate_hz=LIVE_INPUT_HZ,
+                stream_factory=self.live_stream_factory(),
+                filters=make_online_filters(LIVE_FILTERS, fs=LIVE_INPUT_HZ),
+                latency=self.latency,
+            )
+            self.live_thread.start()
+
+            self.canvas.mpl_connect("draw_event", self.on_live_drawn)
+            self.latency.start_periodic_dump(LIVE_LATENCY_DUMP_PATH)
+            if LIVE_METRICS_PORT:
+                self.latency.serve(port=LIVE_METRICS_PORT)
+
+        self.build_live_axes()
+        self.live_timer.start()
+
+    def build_live_axes(self):
+        """Create the live figure once; each refresh only swaps line data."""
+        self.fig.clear()
+
+        self.live_ax_speed = self.fig.add_subplot(411)
+        self.live_ax_pedals = self.fig.add_subplot(412, sharex=self.live_ax_speed)
+        self.live_ax_rpm = self.fig.add_subplot(413, sharex=self.live_ax_speed)
+        self.live_ax_tires = self.fig.add_subplot(414, sharex=self.live_ax_speed)
+
+        self.live_speed_line, = self.live_ax_speed.plot([], [])
+        self.live_throttle_line, = self.live_ax_pedals.plot([], [], label="Throttle", color="green")
+        self.live_brake_line, = self.live_ax_pedals.plot([], [], label="Brake", color="red")
+        self.live_rpm_line, = self.live_ax_rpm.plot([], [])
+        self.live_tire_lines = [
+            self.live_ax_tires.plot([], [], label=corner)[0]
+            for corner in ["FL", "FR", "RL", "RR"]
+        ]
+
+        self.live_ax_speed.set_title("Speed (km/h)")
+        self.live_ax_pedals.set_title("Throttle vs Brake (%)")
+        self.live_ax_rpm.set_title("RPM")
+        self.live_ax_tires.set_title("Tire Temperature per Corner (°C)")
+
+        self.live_ax_speed.set_ylim(0, 350)
+        self.live_ax_pedals.set_ylim(-5, 105)
+        self.live_ax_rpm.set_ylim(0, 16000)
+        self.live_ax_tires.set_ylim(60, 120)
+
+        self.live_ax_pedals.legend(loc="upper left", fontsize=8)
+        self.live_ax_tires.legend(loc="upper left", fontsize=8, ncol=4)
+        self.live_ax_tires.set_xlabel("Time (s)")
+
+        for ax in [self.live_ax_speed, self.live_ax_pedals, self.live_ax_rpm, self.live_ax_tires]:
+            ax.grid(True)
+
+        self.fig.tight_layout()
+        self.canvas.draw()
+
+    def update_live_plots(self):
+        recv_ns = self.live_buffer.last_recv_ns
+        snap = self.live_buffer.snapshot()
+        t = snap["t_s"]
+        if len(t) == 0:
+            return
+
+        self.live_speed_line.set_data(t, snap["speed_kmh"])
+        self.live_throttle_line.set_data(t, snap["throttle_pct"])
+        self.live_brake_line.set_data(t, snap["brake_pct"])
+        self.live_rpm_line.set_data(t, snap["rpm"])
+
+        for line, key in zip(self.live_tire_lines, ["tire_temp_fl", "tire_temp_fr", "tire_temp_rl", "tire_temp_rr"]):
+            line.set_data(t, snap[key])
+
+        # Rolling window: x-axis follows the newest sample
+        t_end = t[-1]
+        self.live_ax_speed.set_xlim(max(0.0, t_end - LIVE_WINDOW_S), max(LIVE_WINDOW_S, t_end))
+
+        self._drawn_recv_ns = recv_ns
+        self.canvas.draw_idle()
+
+    def on_live_drawn(self, event):
+        """Receipt -> pixels latency of the newest sample in this frame."""
+        if self.current_source == "LIVE" and self._drawn_recv_ns:
+            self.latency.record("render", self._drawn_recv_ns)
+            self._drawn_recv_ns = 0
+
+    def closeEvent(self, event):
+        self.live_timer.stop()
+        if self.live_thread is not None:
+            self.live_thread.stop()
+            self.latency.dump(LIVE_LATENCY_DUMP_PATH)
+        super().closeEvent(event)
+
 # ==============================
 # APPLICATION ENTRY POINT
 # ==============================
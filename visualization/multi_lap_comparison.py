@@ -1,83 +1,167 @@
-import pandas as pd
+import argparse
+
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+
+from processing.resampling import split_laps, resample_laps
+from processing.lap_delta import compute_lap_deltas
+from processing.columnar import load_processed
 
 # ======================================
-# LOAD PROCESSED TELEMETRY
+# CONFIG
 # ======================================
 
 DATA_PATH = "data/sim_racing/processed_rio_race_engineering.csv"
-df = pd.read_csv(DATA_PATH)
 
-print("Loaded processed telemetry:", len(df), "samples")
+# Laps overlaid in "overlay" mode; "delta" mode uses every lap unless
+# --laps is given
+LAPS_TO_COMPARE = [0, 1, 2]
+
+COLUMNS = ["lap", "time_s", "distance_m", "speed", "long_accel", "brake_event"]
 
 # ======================================
-# SELECT LAPS TO COMPARE
+# PLOTS 1-3 — OVERLAYS ON A SHARED 1 m DISTANCE GRID
 # ======================================
 
-laps_to_compare = [0, 1, 2]
-lap_data = df[df["lap"].isin(laps_to_compare)]
+def build_overlays(lap_data):
+    """(name, figure) pairs: speed, braking points and acceleration per lap."""
+    laps = split_laps(lap_data)
+    grid, resampled = resample_laps(laps, ["speed", "long_accel"])
+    lap_labels = [f"Lap {key[0]}" for key in laps]
 
-# ======================================
-# PLOT 1 — SPEED VS DISTANCE (MULTI-LAP)
-# ======================================
+    # ======================================
+    # PLOT 1 — SPEED VS DISTANCE (MULTI-LAP)
+    # ======================================
+
+    fig_speed, ax = plt.subplots()
+
+    speed_lines = ax.plot(grid, resampled["speed"].T)
+
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Speed")
+    ax.set_title("Multi-Lap Speed Comparison")
+    ax.legend(speed_lines, lap_labels)
+    ax.grid(True)
+
+    # ======================================
+    # PLOT 2 — BRAKING ZONES (MULTI-LAP)
+    # ======================================
+
+    fig_braking, ax = plt.subplots()
+
+    for (lap,), lap_df in laps.items():
+        braking_points = lap_df[lap_df["brake_event"] == 1]
+
+        ax.scatter(
+            braking_points["distance_m"],
+            braking_points["speed"],
+            label=f"Lap {lap}",
+            s=8
+        )
+
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Speed at Braking")
+    ax.set_title("Braking Zones Comparison (All Laps)")
+    ax.legend()
+    ax.grid(True)
+
+    # ======================================
+    # PLOT 3 — ACCELERATION VS DISTANCE (MULTI-LAP)
+    # ======================================
 
-plt.figure()
+    fig_accel, ax = plt.subplots()
 
-for lap in laps_to_compare:
-    lap_df = lap_data[lap_data["lap"] == lap]
-    plt.plot(lap_df["distance_m"], lap_df["speed"], label=f"Lap {lap}")
+    accel_lines = ax.plot(grid, resampled["long_accel"].T)
 
-plt.xlabel("Distance (m)")
-plt.ylabel("Speed")
-plt.title("Multi-Lap Speed Comparison")
-plt.legend()
-plt.grid(True)
-plt.show()
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Longitudinal Acceleration")
+    ax.set_title("Multi-Lap Acceleration Comparison")
+    ax.legend(accel_lines, lap_labels)
+    ax.grid(True)
+
+    return [("speed", fig_speed), ("braking", fig_braking), ("accel", fig_accel)]
 
 # ======================================
-# PLOT 2 — BRAKING ZONES (MULTI-LAP)
+# PLOT 4 — DELTA TIME VS REFERENCE LAP
 # ======================================
 
-plt.figure()
+def build_delta(lap_data, reference="fastest"):
+    """
+    Time gained/lost against the reference lap for every lap at once.
+    All traces go into one LineCollection coloured by lap number, so the
+    plot stays responsive with dozens of laps.
+    """
+    laps = split_laps(lap_data)
+    if reference != "fastest":
+        reference = (int(reference),)
+
+    grid, delta, keys, ref_key = compute_lap_deltas(laps, reference=reference)
+    lap_numbers = np.array([key[0] for key in keys], dtype=float)
+
+    # (laps, grid, 2) segments: one polyline per lap
+    segments = np.stack([np.broadcast_to(grid, delta.shape), delta], axis=-1)
+
+    fig, ax = plt.subplots()
+    traces = LineCollection(segments, cmap="viridis", linewidths=1.0)
+    traces.set_array(lap_numbers)
+    ax.add_collection(traces)
 
-for lap in laps_to_compare:
-    lap_df = lap_data[lap_data["lap"] == lap]
-    braking_points = lap_df[lap_df["brake_event"] == 1]
+    ax.plot(grid, delta[keys.index(ref_key)], color="black", linewidth=1.5,
+            label=f"Reference: Lap {ref_key[0]}")
 
-    plt.scatter(
-        braking_points["distance_m"],
-        braking_points["speed"],
-        label=f"Lap {lap}",
-        s=8
-    )
+    ax.set_xlim(grid[0], grid[-1])
+    finite = delta[np.isfinite(delta)]
+    if finite.size:
+        ax.set_ylim(finite.min() - 0.1, finite.max() + 0.1)
 
-plt.xlabel("Distance (m)")
-plt.ylabel("Speed at Braking")
-plt.title("Braking Zones Comparison (All Laps)")
-plt.legend()
-plt.grid(True)
-plt.show()
+    cbar = fig.colorbar(traces, ax=ax)
+    cbar.set_label("Lap")
+
+    ax.set_xlabel("Distance (m)")
+    ax.set_ylabel("Delta Time (s)  + = slower")
+    ax.set_title(f"Delta Time vs Lap {ref_key[0]} ({len(keys)} laps)")
+    ax.legend(loc="upper left")
+    ax.grid(True)
+
+    return [("delta", fig)]
 
 # ======================================
-# PLOT 3 — ACCELERATION VS DISTANCE (MULTI-LAP)
+# ENTRY POINT
 # ======================================
 
-plt.figure()
+def main():
+    parser = argparse.ArgumentParser(description="Multi-lap comparison plots")
+    parser.add_argument("--mode", choices=["overlay", "delta"], default="overlay")
+    parser.add_argument("--laps", type=int, nargs="*", help="laps to include")
+    parser.add_argument("--reference", default="fastest", help='"fastest" or a lap number (delta mode)')
+    args = parser.parse_args()
+
+    # ======================================
+    # LOAD PROCESSED TELEMETRY
+    # ======================================
 
-for lap in laps_to_compare:
-    lap_df = lap_data[lap_data["lap"] == lap]
-    plt.plot(
-        lap_df["distance_m"],
-        lap_df["long_accel"],
-        label=f"Lap {lap}"
-    )
+    df = load_processed(DATA_PATH, columns=COLUMNS)
+    print("Loaded processed telemetry:", len(df), "samples")
 
-plt.xlabel("Distance (m)")
-plt.ylabel("Longitudinal Acceleration")
-plt.title("Multi-Lap Acceleration Comparison")
-plt.legend()
-plt.grid(True)
-plt.show()
+    # ======================================
+    # SELECT LAPS TO COMPARE
+    # ======================================
+
+    laps_to_compare = args.laps
+    if laps_to_compare is None and args.mode == "overlay":
+        laps_to_compare = LAPS_TO_COMPARE
+
+    lap_data = df if laps_to_compare is None else df[df["lap"].isin(laps_to_compare)]
+
+    if args.mode == "overlay":
+        build_overlays(lap_data)
+    else:
+        build_delta(lap_data, reference=args.reference)
+    plt.show()
+
+if __name__ == "__main__":
+    main()
 
 """
 Plot 1 — Speed vs Distance (Multi-Lap)
@@ -102,4 +186,11 @@ You’ll see:
 - Throttle pickup aggression (via power + accel proxy)
 - Traction limitation zones
 This shows car balance and grip phase usage.
-"""
\ No newline at end of file
+
+Plot 4 — Delta Time (--mode delta)
+You’ll see:
+- One trace per lap: cumulative time lost (+) or gained (−) vs the reference
+- Where along the lap the time goes, not just the final lap-time gap
+- Every lap of the stint at once, coloured by lap number
+This is the trace engineers read first in a debrief.
+"""
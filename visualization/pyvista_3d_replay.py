@@ -1,145 +1,216 @@
+import glob
+import os
+
 import pandas as pd
 import numpy as np
 import pyvista as pv
-import time
+from vtkmodules.vtkFiltersCore import vtkGlyph3D
+
+from processing.profiling import count, timed
+from visualization.color_lut import BAND_LUT
 
 # =========================
-# LOAD DATA
+# CONFIG
 # =========================
 
 INPUT_PATH = "data/fastf1/bahrain_2023_verstappen.csv"
-df = pd.read_csv(INPUT_PATH)
 
-x = df["X"].values
-y = df["Y"].values
-z = np.zeros_like(x)
+# One CSV per driver (written by telemetry/fastf1_export.py). If the folder
+# is missing or empty the replay falls back to the single INPUT_PATH lap.
+FIELD_DIR = "data/fastf1/field"
+
+# Common replay time base (frames per second of session time)
+REPLAY_HZ = 25
 
-speed = df["Speed"].values
-gear = df["nGear"].values
-brake = df["Brake"].values
+CAR_RADIUS = 80
 
-points = np.column_stack((x, y, z))
-n_points = len(points)
 
 # =========================
-# TRACK
+# LOAD DATA
 # =========================
 
-lines = np.hstack(([n_points], np.arange(n_points)))
-track = pv.PolyData(points, lines=lines)
-track["speed"] = speed
-track_tube = track.tube(radius=25)
+def load_car(path):
+    """Read one driver's telemetry and return time (s) plus the replay channels."""
+    df = pd.read_csv(path)
 
-# =========================
-# CAR
-# =========================
+    if not pd.api.types.is_numeric_dtype(df["Time"]):
+        time_s = pd.to_timedelta(df["Time"]).dt.total_seconds().values
+    else:
+        time_s = df["Time"].astype(float).values
+    time_s = time_s - time_s[0]
+
+    return {
+        "name": os.path.splitext(os.path.basename(path))[0],
+        "time_s": time_s,
+        "x": df["X"].values.astype(float),
+        "y": df["Y"].values.astype(float),
+        "speed": df["Speed"].values.astype(float),
+        "gear": df["nGear"].values.astype(float),
+        "brake": df["Brake"].astype(float).values,
+    }
+
+
+def load_field(field_dir=FIELD_DIR, fallback_path=INPUT_PATH):
+    paths = sorted(glob.glob(os.path.join(field_dir, "*.csv")))
+    if not paths:
+        paths = [fallback_path]
+    return [load_car(p) for p in paths]
 
-car = pv.Sphere(radius=80)
-car.translate(points[0])
 
 # =========================
-# PLOTTER
-# =========================
+# COMMON TIME BASE
+# =========================
+
+@timed
+def resample_field(cars, hz=REPLAY_HZ):
+    """
+    Interpolate every car onto one shared time base up front.
 
-plotter = pv.Plotter(window_size=(1400, 900))
-plotter.set_background("white")
+    Returns a dict of (n_frames, n_cars) arrays, so each replay frame is a
+    single row slice no matter how many cars are on track. Cars whose lap
+    ended stay parked at their last sample.
+    """
+    t_end = max(car["time_s"][-1] for car in cars)
+    timebase = np.arange(0.0, t_end, 1.0 / hz)
 
-plotter.add_mesh(
-    track_tube,
-    scalars="speed",
-    cmap="turbo",
-    smooth_shading=True,
-    show_scalar_bar=True,
-)
+    field = {"time_s": timebase, "names": [car["name"] for car in cars]}
 
-car_actor = plotter.add_mesh(car, color="red", smooth_shading=True)
-plotter.camera_position = "iso"
+    for key in ["x", "y", "speed", "brake"]:
+        field[key] = np.column_stack([
+            np.interp(timebase, car["time_s"], car[key]) for car in cars
+        ])
 
-# =========================
-# HUD
-# =========================
+    # Gear is discrete: take the last sample at or before each frame
+    field["gear"] = np.column_stack([
+        car["gear"][np.clip(np.searchsorted(car["time_s"], timebase, side="right") - 1, 0, None)]
+        for car in cars
+    ])
 
-hud = plotter.add_text(
-    "Speed: 0 km/h\nGear: 0",
-    position="upper_left",
-    font_size=20,
-    color="black",
-)
+    field["points"] = np.stack(
+        [field["x"], field["y"], np.zeros_like(field["x"])], axis=-1
+    )
 
-# =========================
-# SHOW WINDOW ONCE
-# =========================
+    # Per-frame, per-car RGB looked up once from the shared colour table
+    rgba = BAND_LUT.colors(field["speed"], field["brake"])
+    field["colors"] = (rgba[..., :3] * 255).astype(np.uint8)
+
+    return field
 
-# plotter.show(auto_close=False)
 
 # =========================
-# ANIMATION STATE
+# SCENE
 # =========================
 
-frame = 0
-stride = 2
-is_playing = False
+def build_scene(plotter, cars, field):
+    """Add the track and a single glyphed point cloud holding every car."""
+    ref = cars[0]
+    points = np.column_stack((ref["x"], ref["y"], np.zeros_like(ref["x"])))
+    n_points = len(points)
 
+    lines = np.hstack(([n_points], np.arange(n_points)))
+    track = pv.PolyData(points, lines=lines)
+    track["speed"] = ref["speed"]
+    track_tube = track.tube(radius=25)
 
-# =========================
-# ANIMATION FUNCTION
-# =========================
+    plotter.set_background("white")
+    plotter.add_mesh(
+        track_tube,
+        scalars="speed",
+        cmap="turbo",
+        smooth_shading=True,
+        show_scalar_bar=True,
+    )
 
-def animate():
-    global frame, is_playing
+    # All cars live in one point cloud; a glyph filter stamps a sphere on
+    # each point, so a frame update is two in-place array writes.
+    cars_cloud = pv.PolyData(field["points"][0].copy())
+    cars_cloud["rgb"] = field["colors"][0].copy()
 
-    if not is_playing:
-        return
+    glyphs = vtkGlyph3D()
+    glyphs.SetInputData(cars_cloud)
+    glyphs.SetSourceData(pv.Sphere(radius=CAR_RADIUS))
+    glyphs.ScalingOff()
+    glyphs.SetColorModeToColorByScalar()
 
-    if frame >= n_points:
-        frame = 0
+    plotter.add_mesh(glyphs, scalars="rgb", rgb=True, smooth_shading=True)
+    plotter.camera_position = "iso"
 
-    new_pos = points[frame]
-    car_actor.SetPosition(new_pos.tolist())
+    hud = plotter.add_text(
+        "Speed: 0 km/h\nGear: 0",
+        position="upper_left",
+        font_size=20,
+        color="black",
+    )
 
-    v = float(speed[frame])
-    g = int(gear[frame])
-    b = float(brake[frame])
+    return cars_cloud, hud
 
-    # Brake tint
-    if b > 0.05:
-        car_actor.prop.color = (0.8, 0.1, 0.1)
-    else:
-        if v < 120:
-            car_actor.prop.color = (0.1, 0.4, 1.0)
-        elif v < 230:
-            car_actor.prop.color = (1.0, 1.0, 0.1)
-        else:
-            car_actor.prop.color = (1.0, 0.1, 0.1)
 
-    hud.SetText(0, f"Speed: {v:6.1f} km/h\nGear: {g}")
+@timed
+def update_frame(cars_cloud, hud, field, frame):
+    """Move every car to `frame` of the shared time base."""
+    cars_cloud.points[:] = field["points"][frame]
+    cars_cloud.point_data["rgb"][:] = field["colors"][frame]
+    cars_cloud.Modified()
+    count("frames_drawn")
 
-    frame += stride
-    plotter.render()
+    # HUD follows the first car in the field
+    v = float(field["speed"][frame, 0])
+    g = int(field["gear"][frame, 0])
+    t = field["time_s"][frame]
+    # Corner 2 = upper_left, where add_text placed the HUD
+    hud.SetText(
+        2,
+        f"{field['names'][0]}  t = {t:6.2f} s\n"
+        f"Speed: {v:6.1f} km/h\nGear: {g}\n"
+        f"Cars: {len(field['names'])}"
+    )
 
 
 # =========================
-# SPACE BAR TOGGLE
+# INTERACTIVE REPLAY
 # =========================
 
-def toggle_play():
-    global is_playing
-    is_playing = not is_playing
-    print("Playing" if is_playing else "Paused")
+def main():
+    cars = load_field()
+    field = resample_field(cars)
+    n_frames = len(field["time_s"])
+    print(f"Loaded {len(cars)} car(s), {n_frames} frames at {REPLAY_HZ} Hz")
 
+    plotter = pv.Plotter(window_size=(1400, 900))
+    cars_cloud, hud = build_scene(plotter, cars, field)
 
-plotter.add_key_event("space", toggle_play)
+    state = {"frame": 0, "stride": 1, "is_playing": False}
 
+    def animate():
+        if not state["is_playing"]:
+            return
 
-# =========================
-# TIMER (CALLS ANIMATE)
-# =========================
+        if state["frame"] >= n_frames:
+            state["frame"] = 0
 
-plotter.add_callback(animate, interval=10)
+        update_frame(cars_cloud, hud, field, state["frame"])
 
+        state["frame"] += state["stride"]
+        plotter.render()
+
+    # =========================
+    # SPACE BAR TOGGLE
+    # =========================
+
+    def toggle_play():
+        state["is_playing"] = not state["is_playing"]
+        print("Playing" if state["is_playing"] else "Paused")
+
+    plotter.add_key_event("space", toggle_play)
+
+    # =========================
+    # TIMER (CALLS ANIMATE)
+    # =========================
+
+    plotter.add_callback(animate, interval=int(1000 / REPLAY_HZ))
+
+    plotter.show()
 
-# =========================
-# START WINDOW
-# =========================
 
-plotter.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
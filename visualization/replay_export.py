@@ -0,0 +1,219 @@
+"""
+Headless replay export.
+
+Renders the matplotlib track replay or the PyVista 3D replay offscreen to a
+PNG sequence (and optionally an MP4), without a display or GPU:
+
+    python -m visualization.replay_export --replay track --out exports/track
+    python -m visualization.replay_export --replay 3d --out exports/3d --video
+
+The timeline is split into chunks and each worker process renders its
+chunks with a scene it built once. Matplotlib uses the Agg backend; PyVista
+renders off screen, which on a machine with no X server or GPU needs a VTK
+build with OSMesa or EGL support (the default VTK wheels fall back to it).
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+# ======================================
+# CONFIG
+# ======================================
+
+DEFAULT_WORKERS = os.cpu_count() or 2
+DEFAULT_CHUNK_FRAMES = 50
+DEFAULT_FPS = 25
+
+FRAME_PATTERN = "frame_{:06d}.png"
+
+TRACK_FIGSIZE = (12.8, 7.2)     # inches
+TRACK_DPI = 100                 # → 1280 x 720
+PYVISTA_WINDOW = (1280, 720)
+
+
+# ======================================
+# PER-WORKER SCENES (BUILT ONCE PER PROCESS)
+# ======================================
+
+_scene = None
+
+
+def _init_track_worker(camera_follow):
+    global _scene
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from visualization.fastf1_track_replay import load_replay_data, build_track_view
+
+    data = load_replay_data()
+    fig = plt.figure(figsize=TRACK_FIGSIZE, dpi=TRACK_DPI)
+    ax = fig.add_subplot(111)
+    view = build_track_view(fig, ax, data)
+
+    _scene = {"kind": "track", "data": data, "view": view, "camera_follow": camera_follow}
+
+
+def _init_3d_worker():
+    global _scene
+
+    import pyvista as pv
+
+    from visualization.pyvista_3d_replay import load_field, resample_field, build_scene
+
+    pv.OFF_SCREEN = True
+    cars = load_field()
+    field = resample_field(cars)
+
+    plotter = pv.Plotter(off_screen=True, window_size=PYVISTA_WINDOW)
+    cars_cloud, hud = build_scene(plotter, cars, field)
+    plotter.show(auto_close=False, interactive=False)
+
+    _scene = {"kind": "3d", "field": field, "plotter": plotter, "cloud": cars_cloud, "hud": hud}
+
+
+def _render_chunk(frames, out_dir):
+    """Render one slice of the timeline to PNGs; returns the number of frames."""
+    if _scene["kind"] == "track":
+        from visualization.fastf1_track_replay import draw_frame
+
+        view = _scene["view"]
+        for out_idx, src_idx in frames:
+            draw_frame(view, _scene["data"], src_idx, _scene["camera_follow"])
+            view["fig"].savefig(os.path.join(out_dir, FRAME_PATTERN.format(out_idx)))
+    else:
+        from visualization.pyvista_3d_replay import update_frame
+
+        plotter = _scene["plotter"]
+        for out_idx, src_idx in frames:
+            update_frame(_scene["cloud"], _scene["hud"], _scene["field"], src_idx)
+            plotter.render()
+            plotter.screenshot(os.path.join(out_dir, FRAME_PATTERN.format(out_idx)))
+
+    return len(frames)
+
+
+# ======================================
+# TIMELINE
+# ======================================
+
+def _timeline_length(replay):
+    """Number of source frames, computed in the parent before fan-out."""
+    if replay == "track":
+        from visualization.fastf1_track_replay import load_replay_data
+        return load_replay_data()["n_samples"]
+
+    from visualization.pyvista_3d_replay import load_field, resample_field
+    return len(resample_field(load_field())["time_s"])
+
+
+def _chunk_timeline(n_frames, stride, chunk_frames):
+    src = list(range(0, n_frames, stride))
+    numbered = list(enumerate(src))
+    return [numbered[i:i + chunk_frames] for i in range(0, len(numbered), chunk_frames)]
+
+
+# ======================================
+# VIDEO ENCODING
+# ======================================
+
+def encode_video(frame_dir, out_path, fps=DEFAULT_FPS):
+    """Encode the PNG sequence with ffmpeg if it is on PATH."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        print("WARNING: ffmpeg not found, keeping the PNG sequence only.")
+        return None
+
+    subprocess.run([
+        ffmpeg, "-y", "-loglevel", "error",
+        "-framerate", str(fps),
+        "-i", os.path.join(frame_dir, "frame_%06d.png"),
+        "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        out_path,
+    ], check=True)
+
+    return out_path
+
+
+# ======================================
+# EXPORT
+# ======================================
+
+def export_replay(replay, out_dir, workers=DEFAULT_WORKERS, chunk_frames=DEFAULT_CHUNK_FRAMES,
+                  stride=1, camera_follow=False, video=False, fps=DEFAULT_FPS):
+    """Render a replay headlessly across a process pool; returns frames/s."""
+    os.makedirs(out_dir, exist_ok=True)
+
+    n_frames = _timeline_length(replay)
+    chunks = _chunk_timeline(n_frames, stride, chunk_frames)
+    total = sum(len(c) for c in chunks)
+
+    if replay == "track":
+        initializer, initargs = _init_track_worker, (camera_follow,)
+    else:
+        initializer, initargs = _init_3d_worker, ()
+
+    print(f"Rendering {total} frames of the '{replay}' replay "
+          f"in {len(chunks)} chunks on {workers} worker(s)...")
+
+    # Spawned (not forked) workers so each gets a clean GL/VTK context
+    t0 = time.perf_counter()
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        futures = [pool.submit(_render_chunk, chunk, out_dir) for chunk in chunks]
+        for fut in as_completed(futures):
+            done += fut.result()
+            elapsed = time.perf_counter() - t0
+            print(f"  {done}/{total} frames  ({done / elapsed:6.1f} frames/s)")
+
+    elapsed = time.perf_counter() - t0
+    fps_rendered = total / elapsed if elapsed > 0 else float("inf")
+
+    print(f"\n✅ Rendered {total} frames in {elapsed:.1f} s "
+          f"({fps_rendered:.1f} frames/s) to {out_dir}")
+
+    if video:
+        video_path = encode_video(out_dir, os.path.join(out_dir, f"{replay}_replay.mp4"), fps)
+        if video_path:
+            print(f"Video written to {video_path}")
+
+    return fps_rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless replay export")
+    parser.add_argument("--replay", choices=["track", "3d"], default="track")
+    parser.add_argument("--out", default="exports/replay")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES)
+    parser.add_argument("--stride", type=int, default=1, help="render every Nth source frame")
+    parser.add_argument("--follow-cam", action="store_true", help="track replay: follow camera")
+    parser.add_argument("--video", action="store_true", help="also encode an MP4 (needs ffmpeg)")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    args = parser.parse_args()
+
+    export_replay(
+        args.replay,
+        args.out,
+        workers=args.workers,
+        chunk_frames=args.chunk_frames,
+        stride=args.stride,
+        camera_follow=args.follow_cam,
+        video=args.video,
+        fps=args.fps,
+    )
+
+
+if __name__ == "__main__":
+    main()
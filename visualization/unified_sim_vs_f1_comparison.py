@@ -1,69 +1,149 @@
+import argparse
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from processing.resampling import LapResampler
+from processing.alignment import align_traces
+from processing.columnar import load_processed
+
 # ======================================
-# LOAD BOTH DATASETS
+# CONFIG
 # ======================================
 
 SIM_PATH = "data/sim_racing/processed_rio_race_engineering.csv"
 F1_PATH = "data/fastf1/processed_fastf1_race_engineering.csv"
 
-sim_df = pd.read_csv(SIM_PATH)
-f1_df = pd.read_csv(F1_PATH)
+# Grid step as a fraction of the lap (0.0001 ≈ 0.5 m on a 5 km lap)
+GRID_STEP = 0.0001
 
-print("Loaded SIM data:", len(sim_df), "samples")
-print("Loaded F1 data:", len(f1_df), "samples")
+# Per-segment difference report resolution
+N_SEGMENTS = 20
 
-# ======================================
-# FILTER SIM TO A SINGLE LAP (LAP 0)
-# ======================================
+COLUMNS = ["lap", "distance_m", "speed", "long_accel"]
 
-sim_lap = sim_df[sim_df["lap"] == 0]
+DEFAULT_SIM_LAP = 0
 
 # ======================================
-# NORMALIZE DISTANCE AXIS (0 → 1)
-# This removes track-length differences
+# RESAMPLE + ALIGN
 # ======================================
 
-sim_dist_norm = sim_lap["distance_m"] / sim_lap["distance_m"].max()
-f1_dist_norm = f1_df["distance_m"] / f1_df["distance_m"].max()
+def compare_laps(sim_lap, f1_lap):
+    """
+    Resample both laps onto a normalized distance grid (0 → 1), which
+    removes track-length differences, then align the SIM lap to F1 by FFT
+    cross-correlation on speed (the recordings may start at different
+    places on the lap). Returns (lap_fraction, resampled, alignment).
+    """
+    lap_fraction, resampled = LapResampler(mode="fraction", step=GRID_STEP).resample(
+        {("SIM", 0): sim_lap, ("F1", 0): f1_lap},
+        ["speed", "long_accel"],
+    )
+
+    alignment = align_traces(
+        lap_fraction,
+        {"speed": resampled["speed"][1], "long_accel": resampled["long_accel"][1]},
+        {"speed": resampled["speed"][0], "long_accel": resampled["long_accel"][0]},
+        align_on="speed",
+        n_segments=N_SEGMENTS,
+    )
+    return lap_fraction, resampled, alignment
+
 
 # ======================================
-# EXTRACT ENGINEERING SIGNALS
+# FIGURES
 # ======================================
 
-sim_speed = sim_lap["speed"]
-f1_speed = f1_df["speed"]
+def build_figures(lap_fraction, resampled, alignment):
+    """(name, figure) pairs: speed, acceleration and per-segment difference."""
+    f1_speed = resampled["speed"][1]
+    f1_accel = resampled["long_accel"][1]
 
-sim_accel = sim_lap["long_accel"]
-f1_accel = f1_df["long_accel"]
+    sim_speed = alignment["aligned"]["speed"]
+    sim_accel = alignment["aligned"]["long_accel"]
 
-# ======================================
-# PLOT 1 — SPEED COMPARISON
-# ======================================
+    segment_df = pd.DataFrame(alignment["segments"])
+
+    # ======================================
+    # PLOT 1 — SPEED COMPARISON
+    # ======================================
+
+    fig_speed, ax = plt.subplots()
+    ax.plot(lap_fraction, sim_speed, label="SIM Speed")
+    ax.plot(lap_fraction, f1_speed, label="F1 Speed")
+
+    ax.set_xlabel("Normalized Distance (Lap %)")
+    ax.set_ylabel("Speed (km/h)")
+    ax.set_title("SIM vs F1 — Speed Comparison")
+    ax.legend()
+    ax.grid(True)
+
+    # ======================================
+    # PLOT 2 — ACCELERATION COMPARISON
+    # ======================================
+
+    fig_accel, ax = plt.subplots()
+    ax.plot(lap_fraction, sim_accel, label="SIM Acceleration")
+    ax.plot(lap_fraction, f1_accel, label="F1 Acceleration")
 
-plt.figure()
-plt.plot(sim_dist_norm, sim_speed, label="SIM Speed")
-plt.plot(f1_dist_norm, f1_speed, label="F1 Speed")
+    ax.set_xlabel("Normalized Distance (Lap %)")
+    ax.set_ylabel("Longitudinal Acceleration (m/s²)")
+    ax.set_title("SIM vs F1 — Acceleration Comparison")
+    ax.legend()
+    ax.grid(True)
+
+    # ======================================
+    # PLOT 3 — PER-SEGMENT SPEED DIFFERENCE
+    # ======================================
+
+    fig_segments, ax = plt.subplots()
+    ax.bar(
+        segment_df["start"],
+        segment_df["speed_diff"],
+        width=segment_df["end"] - segment_df["start"],
+        align="edge",
+    )
+    ax.axhline(0, color="black", linewidth=0.5)
+
+    ax.set_xlabel("Normalized Distance (Lap %)")
+    ax.set_ylabel("Mean Speed Difference SIM − F1 (km/h)")
+    ax.set_title(f"SIM vs F1 — Speed Difference per Segment (alignment r = {alignment['correlation']:.2f})")
+    ax.grid(True)
+
+    return [("speed", fig_speed), ("accel", fig_accel), ("segments", fig_segments)]
 
-plt.xlabel("Normalized Distance (Lap %)")
-plt.ylabel("Speed (km/h)")
-plt.title("SIM vs F1 — Speed Comparison")
-plt.legend()
-plt.grid(True)
-plt.show()
 
 # ======================================
-# PLOT 2 — ACCELERATION COMPARISON
+# MAIN
 # ======================================
 
-plt.figure()
-plt.plot(sim_dist_norm, sim_accel, label="SIM Acceleration")
-plt.plot(f1_dist_norm, f1_accel, label="F1 Acceleration")
+def main():
+    parser = argparse.ArgumentParser(description="SIM lap vs FastF1 lap comparison")
+    parser.add_argument("--sim-lap", type=int, default=DEFAULT_SIM_LAP)
+    args = parser.parse_args()
+
+    sim_df = load_processed(SIM_PATH, columns=COLUMNS)
+    f1_df = load_processed(F1_PATH, columns=COLUMNS)
+
+    print("Loaded SIM data:", len(sim_df), "samples")
+    print("Loaded F1 data:", len(f1_df), "samples")
+
+    sim_lap = sim_df[sim_df["lap"] == args.sim_lap]
+    lap_fraction, resampled, alignment = compare_laps(sim_lap, f1_df)
+
+    print("\n===== SIM → F1 ALIGNMENT =====")
+    print(f"Offset: {alignment['shift_samples']} samples "
+          f"({alignment['shift_grid'] * 100:+.2f}% of lap)")
+    print(f"Speed correlation before: {alignment['correlation_before']:.3f}")
+    print(f"Speed correlation after:  {alignment['correlation']:.3f}")
+
+    segment_df = pd.DataFrame(alignment["segments"])
+    print("\n===== PER-SEGMENT DIFFERENCES (SIM − F1) =====")
+    print(segment_df.to_string(index=False, float_format=lambda v: f"{v:8.3f}"))
+
+    build_figures(lap_fraction, resampled, alignment)
+    plt.show()
+
 
-plt.xlabel("Normalized Distance (Lap %)")
-plt.ylabel("Longitudinal Acceleration (m/s²)")
-plt.title("SIM vs F1 — Acceleration Comparison")
-plt.legend()
-plt.grid(True)
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()